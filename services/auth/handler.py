@@ -3,6 +3,7 @@ Auth Lambda Handler
 
 Endpoints:
     POST /api/auth/init - Initialize user session, create user if needed, return user + tags
+                          (and optionally tag counts, the first bookmark page and note count)
 """
 import json
 import sys
@@ -11,11 +12,21 @@ import os
 # Add shared module to path for Lambda
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from shared.db import get_session, User, Tag
+from shared.db import get_session, Tag
+from shared.db.fields import BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS, row_serializer
+from shared.db.queries import (
+    NOTE_COUNT, TAG_BOOKMARK_COUNTS, bookmark_search_count, bookmark_search_page,
+    parse_bookmark_search, upsert_user
+)
 from shared.utils import validate_token, success, error, bad_request, unauthorized, AuthError
+from shared.utils.ratelimit import rate_limited
 from shared.utils.response import options_response
 
 
+# Extra data init can return, so the first render needs no further requests
+INCLUDE_OPTIONS = ("tagCounts", "bookmarks", "noteCount")
+
+
 def handler(event, context):
     """Main Lambda handler - routes to appropriate function."""
     # Support both API Gateway REST API (v1) and HTTP API (v2) formats
@@ -44,6 +55,7 @@ def handler(event, context):
     return error("Not found", status=404)
 
 
+@rate_limited("write")
 def init(event, context):
     """
     POST /api/auth/init
@@ -55,13 +67,21 @@ def init(event, context):
         {
             "id": "cognito-sub",
             "email": "user@example.com",
-            "name": "User Name"
+            "name": "User Name",
+            "includeBookmarkIDs": true,  // Optional, false omits tag.bookmarkID
+            "include": ["tagCounts", "bookmarks", "noteCount"],  // Optional
+            "bookmarkLimit": 15          // Optional, page size for "bookmarks"
         }
 
     Response:
         {
             "user": { "id": "...", "email": "...", "name": "..." },
-            "tags": [{ "ID": "...", "title": "...", ... }]
+            "tags": [{ "ID": "...", "title": "...", ... }],
+            // With include:
+            //   tagCounts - tags[].bookmarkCount
+            //   bookmarks - "bookmarks" and "bookmarkCount", as GET /api/bookmarks
+            //               with no filters returns them
+            //   noteCount - "noteCount"
         }
     """
     try:
@@ -71,7 +91,7 @@ def init(event, context):
         return unauthorized(str(e))
 
     try:
-        body = json.loads(event.get("body", "{}"))
+        body = json.loads(event.get("body") or "{}")
     except json.JSONDecodeError:
         return bad_request("Invalid JSON body")
 
@@ -82,34 +102,62 @@ def init(event, context):
     if not cognito_sub or not email:
         return bad_request("Missing required fields: id, email")
 
+    include_bookmark_ids = body.get("includeBookmarkIDs", True) is not False
+
+    include = body.get("include") or []
+    if isinstance(include, str):
+        include = [option.strip() for option in include.split(",") if option.strip()]
+    if not isinstance(include, list) or any(option not in INCLUDE_OPTIONS for option in include):
+        return bad_request(f"include must be some of: {', '.join(INCLUDE_OPTIONS)}")
+
     try:
-        with get_session() as db:
-            # Find or create user
-            user = db.query(User).filter(User.cognito_sub == cognito_sub).first()
-
-            if user:
-                # Update user info if changed
-                if user.email != email or user.name != name:
-                    user.email = email
-                    user.name = name
-            else:
-                # Create new user
-                user = User(
-                    cognito_sub=cognito_sub,
-                    email=email,
-                    name=name,
-                    picture_url=token_user.get("picture"),
-                )
-                db.add(user)
-                db.flush()  # Get the user ID
+        bookmark_limit = min(max(int(body.get("bookmarkLimit", 15)), 1), 100)
+    except (TypeError, ValueError):
+        return bad_request("bookmarkLimit must be an integer")
+
+    try:
+        with get_session(sticky_key=cognito_sub) as db:
+            # Find or create user, in a single statement
+            user = upsert_user(db, cognito_sub, email, name, token_user.get("picture"))
 
-            # Fetch user's tags
+            # Fetch user's tags, with all bookmark associations in one query
             tags = db.query(Tag).filter(Tag.author_id == user.id).all()
+            bookmark_ids = (
+                Tag.bookmark_ids_by_tag(db, user.id) if include_bookmark_ids else {}
+            )
 
-            return success({
-                "user": user.to_dict(),
-                "tags": [tag.to_dict() for tag in tags],
-            })
+            tag_data = [
+                tag.to_dict(
+                    bookmark_ids=bookmark_ids.get(tag.id, []) if include_bookmark_ids else None
+                )
+                for tag in tags
+            ]
+
+            response = {"user": user.to_dict(), "tags": tag_data}
+
+            if "tagCounts" in include:
+                if include_bookmark_ids:
+                    counts = {tag_id: len(ids) for tag_id, ids in bookmark_ids.items()}
+                else:
+                    counts = dict(db.execute(TAG_BOOKMARK_COUNTS, {"author_id": user.id}).all())
+                for tag, data in zip(tags, tag_data, strict=True):
+                    data["bookmarkCount"] = counts.get(tag.id, 0)
+
+            if "bookmarks" in include:
+                search = parse_bookmark_search({})
+                rows = db.execute(*bookmark_search_page(
+                    user.id, search, 0, bookmark_limit, BOOKMARK_DEFAULT_KEYS
+                ))
+                serialize = row_serializer(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS)
+                response["bookmarks"] = [serialize(row) for row in rows]
+                response["bookmarkCount"] = db.execute(
+                    *bookmark_search_count(user.id, search)
+                ).scalar()
+
+            if "noteCount" in include:
+                response["noteCount"] = db.execute(NOTE_COUNT, {"author_id": user.id}).scalar()
+
+            return success(response)
 
     except Exception as e:
         import traceback
@@ -6,25 +6,65 @@ Endpoints:
     POST   /api/bookmarks      - Create bookmark
     PUT    /api/bookmarks/:id  - Update bookmark
     DELETE /api/bookmarks/:id  - Delete bookmark
+    POST   /api/bookmarks/batch - Delete, retag or update many bookmarks
+    POST   /api/bookmarks/lookup - Check which URLs are already bookmarked
+    GET    /api/bookmarks/status - Metadata status of recently created bookmarks
 """
 import json
+import math
 import re
 import sys
 import os
-import boto3
+import time
 from uuid import UUID
 
 # Add shared module to path for Lambda
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from shared.db import get_session, User, Bookmark, Tag, BookmarkTag
+from sqlalchemy import delete as sql_delete, func, literal, select, update as sql_update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from shared.db import get_session, get_read_session, Bookmark, Tag, BookmarkTag
+from shared.db.fields import (
+    BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS, BOOKMARK_JSON_FIELDS, parse_fields, row_serializer
+)
+from shared.db.outbox import add_outbox_message
+from shared.db.queries import (
+    BOOKMARK_PREVIEWS, BOOKMARK_STATUSES, bookmark_search_count, bookmark_search_filters,
+    bookmark_search_page, get_bookmark_for_author, get_user_by_cognito_sub,
+    parse_bookmark_search, parse_uuid_list
+)
 from shared.utils import validate_token, success, error, bad_request, unauthorized, not_found
 from shared.utils.auth import AuthError
+from shared.utils.cache import cache_key, get_cache
+from shared.utils.idempotency import idempotent
+from shared.utils.ratelimit import rate_limited
 from shared.utils.response import options_response
+from shared.utils.urls import url_hash
 
 
-SQS_METADATA_QUEUE_URL = os.environ.get("METADATA_QUEUE_URL")
-_sqs_client = boto3.client("sqs") if SQS_METADATA_QUEUE_URL else None
+# What POST /api/bookmarks does when the URL is already bookmarked
+DUPLICATE_POLICIES = ("return", "merge")
+DUPLICATE_POLICY = os.environ.get("BOOKMARK_DUPLICATE_POLICY", "return")
+LOOKUP_MAX_URLS = int(os.environ.get("BOOKMARK_LOOKUP_MAX_URLS", "500"))
+
+STATUS_MAX_IDS = int(os.environ.get("BOOKMARK_STATUS_MAX_IDS", "100"))
+# Long-poll bounds for GET /api/bookmarks/status?wait=
+STATUS_MAX_WAIT_SECONDS = 20
+STATUS_POLL_INTERVAL_SECONDS = 1.0
+# Left for serializing the response before the Lambda times out
+STATUS_TIMEOUT_MARGIN_SECONDS = 2
+
+BATCH_MAX_BOOKMARKS = int(os.environ.get("BOOKMARK_BATCH_MAX", "5000"))
+BATCH_OPERATIONS = ("delete", "addTags", "removeTags", "update")
+# Request field -> Bookmark column for batch "update"
+BATCH_UPDATE_FIELDS = {
+    "title": "title",
+    "description": "description",
+    "videoURL": "video_url",
+    "screenshotURL": "screenshot_url",
+}
 
 
 def handler(event, context):
@@ -48,6 +88,15 @@ def handler(event, context):
     bookmark_id = id_match.group(1) if id_match else None
 
     # Route requests
+    if path == "/api/bookmarks/batch" and http_method == "POST":
+        return batch(event, context)
+
+    if path == "/api/bookmarks/lookup" and http_method == "POST":
+        return lookup(event, context)
+
+    if path == "/api/bookmarks/status" and http_method == "GET":
+        return status(event, context)
+
     if path == "/api/bookmarks":
         if http_method == "GET":
             return search(event, context)
@@ -63,11 +112,7 @@ def handler(event, context):
     return error("Not found", status=404)
 
 
-def _get_user_by_cognito_sub(db, cognito_sub: str) -> User:
-    """Get user by Cognito sub, returns None if not found."""
-    return db.query(User).filter(User.cognito_sub == cognito_sub).first()
-
-
+@rate_limited("search")
 def search(event, context):
     """
     GET /api/bookmarks
@@ -79,6 +124,10 @@ def search(event, context):
         offset      - Pagination offset (default: 0)
         limit       - Pagination limit (default: 15)
         ids         - Comma-separated bookmark IDs to fetch
+        tags        - Comma-separated tag IDs to filter by
+        tagMatch    - "any" (default) or "all" of the given tags
+        fields      - Comma-separated response keys to return, e.g.
+                      "title,url,metadata.image" ("id" is always included)
 
     Response:
         {
@@ -95,56 +144,264 @@ def search(event, context):
 
     offset = int(params.get("offset", 0))
     limit = min(int(params.get("limit", 15)), 100)  # Cap at 100
-    title_search = params.get("title", "")
-    description_search = params.get("description", "")
-    ids_param = params.get("ids", "")
 
     try:
-        with get_session() as db:
+        search_params = parse_bookmark_search(params)
+        fields = (
+            parse_fields(params["fields"], BOOKMARK_FIELDS, BOOKMARK_JSON_FIELDS)
+            if params.get("fields")
+            else BOOKMARK_DEFAULT_KEYS
+        )
+    except ValueError as e:
+        return bad_request(str(e))
+
+    try:
+        with get_read_session(token_user["sub"]) as db:
             # Get the authenticated user
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            # Build query - always filter by authenticated user for security
-            query = db.query(Bookmark).filter(Bookmark.author_id == user.id)
+            # Keyed by the user's data version, so any write invalidates it
+            key = cache_key(user.id, "bookmarks.search", params, user.data_version)
+            data = get_cache().get(key)
+            if data is not None:
+                return success(data)
 
-            # Filter by specific IDs if provided
-            if ids_param:
-                try:
-                    id_list = [UUID(id.strip()) for id in ids_param.split(",") if id.strip()]
-                    query = query.filter(Bookmark.id.in_(id_list))
-                except ValueError:
-                    return bad_request("Invalid bookmark ID format")
-
-            # Search filters
-            if title_search:
-                query = query.filter(Bookmark.title.ilike(f"%{title_search}%"))
-
-            if description_search:
-                query = query.filter(Bookmark.description.ilike(f"%{description_search}%"))
-
-            # Get total count before pagination
-            total_count = query.count()
-
-            # Apply pagination and ordering
-            bookmarks = (
-                query
-                .order_by(Bookmark.created_at.desc())
-                .offset(offset)
-                .limit(limit)
-                .all()
+            # Always filter by authenticated user for security
+            total_count = db.execute(*bookmark_search_count(user.id, search_params)).scalar()
+
+            # Only the requested columns, serialized straight from the rows
+            rows = db.execute(
+                *bookmark_search_page(user.id, search_params, offset, limit, fields)
             )
+            serialize = row_serializer(fields, BOOKMARK_FIELDS)
 
-            return success({
-                "bookmarks": [b.to_dict() for b in bookmarks],
+            data = {
+                "bookmarks": [serialize(row) for row in rows],
                 "count": total_count,
+            }
+            get_cache().set(key, data)
+            return success(data)
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
+
+
+class _BatchTooLarge(Exception):
+    """Raised inside the session to roll back an oversized filter batch."""
+
+
+@rate_limited("bulk")
+@idempotent
+def batch(event, context):
+    """
+    POST /api/bookmarks/batch
+
+    Applies one operation to many bookmarks in a single transaction, using
+    set-based statements scoped to the authenticated user.
+
+    Request body:
+        {
+            "operation": "delete" | "addTags" | "removeTags" | "update",
+            "ids": ["bookmark-id-1", ...],           // Either explicit IDs...
+            "filter": {"title": "...", "tags": ["id1", "id2"], "tagMatch": "all"},
+                                                     // ...or search params; ids and
+                                                     // tags take a list or a
+                                                     // comma-separated string
+            "tagIds": ["tag-id-1"],                  // addTags / removeTags
+            "fields": {"description": "..."}         // update
+        }
+
+    Response:
+        {
+            "results": [{"id": "...", "status": "ok" | "not_found" | "invalid"}],
+            "count": 12  // Bookmarks affected
+        }
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    try:
+        body = json.loads(event.get("body", "{}"))
+    except json.JSONDecodeError:
+        return bad_request("Invalid JSON body")
+
+    operation = body.get("operation")
+    if operation not in BATCH_OPERATIONS:
+        return bad_request(f"operation must be one of: {', '.join(BATCH_OPERATIONS)}")
+
+    raw_ids = body.get("ids")
+    filter_params = body.get("filter")
+    if (raw_ids is None) == (filter_params is None):
+        return bad_request("Provide exactly one of ids or filter")
+
+    results = {}
+    if raw_ids is not None:
+        if not isinstance(raw_ids, list) or not raw_ids:
+            return bad_request("ids must be a non-empty list")
+        if len(raw_ids) > BATCH_MAX_BOOKMARKS:
+            return bad_request(f"At most {BATCH_MAX_BOOKMARKS} ids per batch")
+        valid_ids = []
+        for raw_id in raw_ids:
+            try:
+                valid_ids.append(UUID(str(raw_id)))
+            except ValueError:
+                results[str(raw_id)] = "invalid"
+        filters = [Bookmark.id.in_(valid_ids)]
+    else:
+        if not isinstance(filter_params, dict):
+            return bad_request("filter must be an object")
+        search_params = {
+            key: ",".join(map(str, value)) if isinstance(value, list) else str(value)
+            for key, value in filter_params.items()
+        }
+        try:
+            filters = bookmark_search_filters(parse_bookmark_search(search_params))
+        except ValueError as e:
+            return bad_request(str(e))
+        if not filters:
+            # An empty filter would match the whole library
+            return bad_request("filter must set at least one of ids, tags, title or description")
+
+    tag_ids = []
+    if operation in ("addTags", "removeTags"):
+        try:
+            tag_ids = [UUID(str(tag_id)) for tag_id in body.get("tagIds") or []]
+        except ValueError:
+            return bad_request("Invalid tag ID format")
+        if not tag_ids:
+            return bad_request("tagIds is required")
+
+    values = {}
+    if operation == "update":
+        fields = body.get("fields")
+        if not isinstance(fields, dict) or not fields:
+            return bad_request("fields is required")
+        unknown = set(fields) - set(BATCH_UPDATE_FIELDS)
+        if unknown:
+            return bad_request(f"Unsupported fields: {', '.join(sorted(unknown))}")
+        values = {BATCH_UPDATE_FIELDS[key]: value for key, value in fields.items()}
+        if "title" in values:
+            values["title"] = str(values["title"] or "").strip()
+            if not values["title"]:
+                return bad_request("title cannot be empty")
+
+    try:
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            # Always scoped to the authenticated user. Ids are selected first
+            # (bounded), so an oversized filter is rejected before any row is
+            # written or locked.
+            affected = db.scalars(
+                select(Bookmark.id)
+                .where(Bookmark.author_id == user.id, *filters)
+                .limit(BATCH_MAX_BOOKMARKS + 1)
+            ).all()
+            if len(affected) > BATCH_MAX_BOOKMARKS:
+                # Only reachable via filter
+                raise _BatchTooLarge()
+            scope = [Bookmark.author_id == user.id, Bookmark.id.in_(affected)]
+
+            if affected:
+                if operation == "delete":
+                    # bookmark_tags rows go with ON DELETE CASCADE
+                    affected = db.scalars(
+                        sql_delete(Bookmark).where(*scope).returning(Bookmark.id)
+                    ).all()
+                elif operation == "update":
+                    affected = db.scalars(
+                        sql_update(Bookmark).where(*scope).values(**values).returning(Bookmark.id)
+                    ).all()
+                elif operation == "addTags":
+                    # Joining on author keeps foreign tags out
+                    pairs = (
+                        select(Bookmark.id, Tag.id)
+                        .join(Tag, Tag.author_id == Bookmark.author_id)
+                        .where(*scope, Tag.id.in_(tag_ids))
+                    )
+                    db.execute(
+                        pg_insert(BookmarkTag)
+                        .from_select(["bookmark_id", "tag_id"], pairs)
+                        .on_conflict_do_nothing()
+                    )
+                else:
+                    db.execute(
+                        sql_delete(BookmarkTag).where(
+                            BookmarkTag.bookmark_id.in_(affected),
+                            BookmarkTag.tag_id.in_(tag_ids),
+                        )
+                    )
+
+            affected_ids = {str(bookmark_id) for bookmark_id in affected}
+            if raw_ids is not None:
+                for raw_id in raw_ids:
+                    if str(raw_id) not in results:
+                        found = str(UUID(str(raw_id))) in affected_ids
+                        results[str(raw_id)] = "ok" if found else "not_found"
+            else:
+                results = dict.fromkeys(affected_ids, "ok")
+
+            return success({
+                "results": [{"id": id, "status": status} for id, status in results.items()],
+                "count": len(affected_ids),
             })
 
+    except _BatchTooLarge:
+        return bad_request(f"filter matches more than {BATCH_MAX_BOOKMARKS} bookmarks")
     except Exception as e:
         return error(f"Database error: {str(e)}")
 
 
+def _find_by_url_hash(db, author_id, hashed: str) -> Bookmark | None:
+    """Find an author's bookmark by canonical URL hash (unique index lookup)."""
+    return db.query(Bookmark).filter(
+        Bookmark.author_id == author_id,
+        Bookmark.url_hash == hashed
+    ).first()
+
+
+def _add_tags(db, bookmark_id, author_id, tag_ids) -> None:
+    """Associate a bookmark with the author's tags, skipping invalid or foreign IDs."""
+    tag_uuids = []
+    for tag_id in tag_ids or []:
+        try:
+            tag_uuids.append(UUID(tag_id))
+        except ValueError:
+            pass  # Invalid UUID, skip
+    if not tag_uuids:
+        return
+
+    # Security: only the user's tags are selected
+    owned_tags = select(literal(bookmark_id, Bookmark.id.type), Tag.id).where(
+        Tag.id.in_(tag_uuids),
+        Tag.author_id == author_id
+    )
+    db.execute(
+        pg_insert(BookmarkTag)
+        .from_select(["bookmark_id", "tag_id"], owned_tags)
+        .on_conflict_do_nothing()
+    )
+
+
+def _merge_duplicate(bookmark: Bookmark, body: dict) -> None:
+    """Fill gaps in an existing bookmark from a duplicate create request."""
+    title = body.get("title", "").strip()
+    if title and bookmark.title == bookmark.url:
+        bookmark.title = title
+    if body.get("description") and not bookmark.description:
+        bookmark.description = body["description"]
+    if body.get("videoURL") and not bookmark.video_url:
+        bookmark.video_url = body["videoURL"]
+
+
+@rate_limited("write")
+@idempotent
 def create(event, context):
     """
     POST /api/bookmarks
@@ -155,11 +412,18 @@ def create(event, context):
             "url": "https://example.com",
             "description": "Optional description",
             "videoURL": "Optional video URL",
-            "tagIds": ["tag-id-1", "tag-id-2"]  // Optional
+            "tagIds": ["tag-id-1", "tag-id-2"],  // Optional
+            "onDuplicate": "return" | "merge"    // Optional, see below
         }
 
+    If the user already has a bookmark with the same canonical URL, no new
+    bookmark is created. "return" responds with the existing bookmark as is;
+    "merge" first adds the tags and fills in empty fields from the request.
+    The default comes from BOOKMARK_DUPLICATE_POLICY.
+
     Response:
-        { "bookmark": {...} }
+        { "bookmark": {...} }                     // 201 Created
+        { "bookmark": {...}, "duplicate": true }  // 200, existing bookmark
     """
     try:
         token_user = validate_token(event)
@@ -173,72 +437,240 @@ def create(event, context):
 
     title = body.get("title", "").strip()
     url = body.get("url", "").strip()
+    on_duplicate = body.get("onDuplicate", DUPLICATE_POLICY)
 
     if not url:
         return bad_request("url is required")
 
+    if on_duplicate not in DUPLICATE_POLICIES:
+        return bad_request(f"onDuplicate must be one of: {', '.join(DUPLICATE_POLICIES)}")
+
     if not title:
         title = url
 
+    hashed = url_hash(url)
+
     try:
-        bookmark_id = None
-        bookmark_url = None
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            bookmark = Bookmark(
-                author_id=user.id,
-                title=title,
-                url=url,
-                description=body.get("description", ""),
-                video_url=body.get("videoURL"),
-                metadata_status="pending",
-            )
-            db.add(bookmark)
-            db.flush()  # Get the bookmark ID
-            bookmark_id = str(bookmark.id)
-            bookmark_url = bookmark.url
+            existing = _find_by_url_hash(db, user.id, hashed)
+            if existing is None:
+                bookmark = Bookmark(
+                    author_id=user.id,
+                    title=title,
+                    url=url,
+                    url_hash=hashed,
+                    description=body.get("description", ""),
+                    video_url=body.get("videoURL"),
+                    metadata_status="pending",
+                    metadata_requested_at=func.now(),
+                )
+                try:
+                    with db.begin_nested():
+                        db.add(bookmark)
+                        db.flush()  # Get the bookmark ID
+                except IntegrityError:
+                    # A concurrent request created the same URL first
+                    existing = _find_by_url_hash(db, user.id, hashed)
+                    if existing is None:
+                        raise
+
+            if existing is not None:
+                if on_duplicate == "merge":
+                    _merge_duplicate(existing, body)
+                    _add_tags(db, existing.id, user.id, body.get("tagIds"))
+                    db.flush()
+                return success({"bookmark": existing.to_dict(), "duplicate": True})
 
             # Associate with tags if provided
-            tag_ids = body.get("tagIds", [])
-            if tag_ids:
-                for tag_id in tag_ids:
-                    try:
-                        tag = db.query(Tag).filter(
-                            Tag.id == UUID(tag_id),
-                            Tag.author_id == user.id  # Security: only user's tags
-                        ).first()
-                        if tag:
-                            bookmark_tag = BookmarkTag(
-                                bookmark_id=bookmark.id,
-                                tag_id=tag.id
-                            )
-                            db.add(bookmark_tag)
-                    except ValueError:
-                        pass  # Invalid UUID, skip
-
-            response = success({"bookmark": bookmark.to_dict()}, status=201)
-
-        if _sqs_client and bookmark_id and bookmark_url:
-            try:
-                _sqs_client.send_message(
-                    QueueUrl=SQS_METADATA_QUEUE_URL,
-                    MessageBody=json.dumps({
-                        "bookmarkId": bookmark_id,
-                        "url": bookmark_url,
-                    })
+            _add_tags(db, bookmark.id, user.id, body.get("tagIds"))
+
+            # Committed with the bookmark; sent by outbox/dispatcher.py
+            add_outbox_message(db, "metadata", {
+                "bookmarkId": str(bookmark.id),
+                "url": bookmark.url,
+            })
+
+            return success({"bookmark": bookmark.to_dict()}, status=201)
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
+
+
+def _str_or_none(value):
+    return str(value) if value is not None else None
+
+
+@rate_limited("read")
+@idempotent
+def lookup(event, context):
+    """
+    POST /api/bookmarks/lookup
+
+    Checks which of many URLs the user has already bookmarked (e.g. all
+    open tabs in a browser extension), matching on canonical URL.
+
+    Request body:
+        { "urls": ["https://example.com/a", ...] }
+
+    Response:
+        {
+            "results": [{"url": "https://example.com/a", "bookmarkID": "uuid" | null}]
+        }
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    try:
+        body = json.loads(event.get("body", "{}"))
+    except json.JSONDecodeError:
+        return bad_request("Invalid JSON body")
+
+    urls = body.get("urls")
+    if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+        return bad_request("urls must be a list of strings")
+    if len(urls) > LOOKUP_MAX_URLS:
+        return bad_request(f"At most {LOOKUP_MAX_URLS} urls per lookup")
+
+    hashes = {u: url_hash(u) for u in urls if u.strip()}
+
+    try:
+        with get_read_session(token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            found = dict(db.execute(
+                select(Bookmark.url_hash, Bookmark.id).where(
+                    Bookmark.author_id == user.id,
+                    Bookmark.url_hash.in_(set(hashes.values()))
                 )
-            except Exception:
-                pass
+            ).all()) if hashes else {}
+
+            return success({
+                "results": [
+                    {"url": u, "bookmarkID": _str_or_none(found.get(hashes.get(u)))}
+                    for u in urls
+                ],
+            })
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
+
+
+def _status_deadline(context, wait: float) -> float:
+    """Monotonic time to stop long-polling, inside the Lambda's remaining time."""
+    wait = min(wait, STATUS_MAX_WAIT_SECONDS)
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        remaining = context.get_remaining_time_in_millis() / 1000 - STATUS_TIMEOUT_MARGIN_SECONDS
+        wait = min(wait, remaining)
+    return time.monotonic() + max(wait, 0)
 
-        return response
+
+@rate_limited("read")
+def status(event, context):
+    """
+    GET /api/bookmarks/status
+
+    Lightweight polling for metadata fetches after creating bookmarks.
+    Statuses come from a covering index; title and image are only read for
+    bookmarks that are no longer pending.
+
+    Query params:
+        ids  - Comma-separated bookmark IDs (max 100)
+        wait - Seconds to wait for any of them to leave "pending" before
+               responding (long-poll; default 0, max 20)
+
+    Response:
+        {
+            "statuses": [
+                {"id": "uuid", "metadataStatus": "pending", "metadataUpdatedAt": null},
+                {"id": "uuid", "metadataStatus": "ready", "metadataUpdatedAt": "...",
+                 "title": "...", "image": "https://..." | null}
+            ],
+            "missing": ["uuid"]  // Deleted or not the caller's
+        }
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    params = event.get("queryStringParameters", {}) or {}
+
+    try:
+        ids = list(dict.fromkeys(parse_uuid_list(params.get("ids", ""), "bookmark")))
+    except ValueError as e:
+        return bad_request(str(e))
+    if not ids:
+        return bad_request("ids is required")
+    if len(ids) > STATUS_MAX_IDS:
+        return bad_request(f"At most {STATUS_MAX_IDS} ids per request")
+
+    try:
+        wait = float(params.get("wait", 0))
+    except ValueError:
+        wait = math.nan
+    # float() also accepts "nan" and "inf"; a NaN deadline would never pass
+    if not math.isfinite(wait) or wait < 0:
+        return bad_request("wait must be a non-negative number of seconds")
+
+    deadline = _status_deadline(context, wait)
+
+    try:
+        with get_read_session(token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+            author_id = user.id
+
+        # A session per poll, so no connection is held while sleeping
+        while True:
+            with get_read_session(token_user["sub"]) as db:
+                rows = db.execute(BOOKMARK_STATUSES, {"author_id": author_id, "ids": ids}).all()
+                pending = sum(row.metadata_status == "pending" for row in rows)
+                # Against the rows found, not ids: missing ids never leave "pending"
+                if pending < len(rows) or not pending or time.monotonic() >= deadline:
+                    ready = [row.id for row in rows if row.metadata_status == "ready"]
+                    previews = {
+                        row.id: row for row in db.execute(
+                            BOOKMARK_PREVIEWS, {"author_id": author_id, "ids": ready}
+                        )
+                    } if ready else {}
+                    break
+            time.sleep(min(STATUS_POLL_INTERVAL_SECONDS, max(deadline - time.monotonic(), 0)))
+
+        statuses = []
+        for row in rows:
+            item = {
+                "id": str(row.id),
+                "metadataStatus": row.metadata_status,
+                "metadataUpdatedAt": row.metadata_updated_at.isoformat()
+                if row.metadata_updated_at
+                else None,
+            }
+            if row.id in previews:
+                item["title"] = previews[row.id].title
+                item["image"] = previews[row.id].image
+            statuses.append(item)
+
+        found = {row.id for row in rows}
+        return success({
+            "statuses": statuses,
+            "missing": [str(id) for id in ids if id not in found],
+        })
 
     except Exception as e:
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def update(event, context, bookmark_id: str):
     """
     PUT /api/bookmarks/:id
@@ -271,25 +703,32 @@ def update(event, context, bookmark_id: str):
         return bad_request("Invalid bookmark ID")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
             # Find bookmark - must belong to authenticated user
-            bookmark = db.query(Bookmark).filter(
-                Bookmark.id == bookmark_uuid,
-                Bookmark.author_id == user.id
-            ).first()
+            bookmark = get_bookmark_for_author(db, bookmark_uuid, user.id)
 
             if not bookmark:
                 return not_found("Bookmark not found")
 
+            # Refuse a URL change that would duplicate another bookmark
+            if "url" in body:
+                new_url = body["url"].strip()
+                new_hash = url_hash(new_url)
+                if new_hash != bookmark.url_hash:
+                    clash = _find_by_url_hash(db, user.id, new_hash)
+                    if clash and clash.id != bookmark.id:
+                        return error("A bookmark with this URL already exists", status=409)
+
             # Update fields if provided
             if "title" in body:
                 bookmark.title = body["title"].strip()
             if "url" in body:
-                bookmark.url = body["url"].strip()
+                bookmark.url = new_url
+                bookmark.url_hash = new_hash
             if "description" in body:
                 bookmark.description = body["description"]
             if "videoURL" in body:
@@ -305,20 +744,7 @@ def update(event, context, bookmark_id: str):
                 ).delete()
 
                 # Add new tags
-                for tag_id in body["tagIds"]:
-                    try:
-                        tag = db.query(Tag).filter(
-                            Tag.id == UUID(tag_id),
-                            Tag.author_id == user.id
-                        ).first()
-                        if tag:
-                            bookmark_tag = BookmarkTag(
-                                bookmark_id=bookmark.id,
-                                tag_id=tag.id
-                            )
-                            db.add(bookmark_tag)
-                    except ValueError:
-                        pass
+                _add_tags(db, bookmark.id, user.id, body["tagIds"])
 
             return success({"bookmark": bookmark.to_dict()})
 
@@ -326,6 +752,8 @@ def update(event, context, bookmark_id: str):
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def delete(event, context, bookmark_id: str):
     """
     DELETE /api/bookmarks/:id
@@ -344,15 +772,12 @@ def delete(event, context, bookmark_id: str):
         return bad_request("Invalid bookmark ID")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            bookmark = db.query(Bookmark).filter(
-                Bookmark.id == bookmark_uuid,
-                Bookmark.author_id == user.id
-            ).first()
+            bookmark = get_bookmark_for_author(db, bookmark_uuid, user.id)
 
             if not bookmark:
                 return not_found("Bookmark not found")
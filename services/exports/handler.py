@@ -0,0 +1,214 @@
+"""
+Exports Lambda Handler
+
+Endpoints:
+    POST /api/exports      - Start a full-account export
+    GET  /api/exports/:id  - Export status, with a download URL once ready
+
+Exports are built asynchronously by exports/worker.py and kept in
+EXPORT_BUCKET for EXPORT_RETENTION_DAYS.
+"""
+import json
+import re
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import boto3
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import select, update as sql_update
+
+from shared.db import get_session, get_read_session, Export
+from shared.db.queries import get_user_by_cognito_sub
+from shared.utils import validate_token, success, error, bad_request, unauthorized, not_found
+from shared.utils.auth import AuthError
+from shared.utils.idempotency import idempotent
+from shared.utils.ratelimit import rate_limited
+from shared.utils.response import options_response
+
+
+EXPORT_BUCKET = os.environ.get("EXPORT_BUCKET")
+SQS_EXPORT_QUEUE_URL = os.environ.get("EXPORT_QUEUE_URL")
+S3_REGION = os.environ.get("AWS_REGION", "eu-west-2")
+_s3_client = boto3.client("s3", region_name=S3_REGION) if EXPORT_BUCKET else None
+_sqs_client = boto3.client("sqs") if SQS_EXPORT_QUEUE_URL else None
+
+EXPORT_FORMATS = ("ndjson", "html")
+# Matches the bucket's lifecycle expiration
+RETENTION_DAYS = int(os.environ.get("EXPORT_RETENTION_DAYS", "7"))
+URL_EXPIRES_SECONDS = int(os.environ.get("EXPORT_URL_EXPIRES_SECONDS", "3600"))
+# A queued/running export older than this is assumed lost (the worker times
+# out after 15 minutes) and no longer blocks a new one
+ACTIVE_TIMEOUT = timedelta(hours=1)
+
+
+def handler(event, context):
+    """Main Lambda handler - routes to appropriate function."""
+    if "httpMethod" in event:
+        http_method = event.get("httpMethod", "")
+        path = event.get("path", "")
+    else:
+        request_context = event.get("requestContext", {})
+        http_info = request_context.get("http", {})
+        http_method = http_info.get("method", "")
+        path = event.get("rawPath", "")
+
+    # Handle CORS preflight
+    if http_method == "OPTIONS":
+        return options_response()
+
+    id_match = re.match(r"^/api/exports/([a-f0-9-]+)$", path)
+
+    if path == "/api/exports" and http_method == "POST":
+        return create(event, context)
+
+    if id_match and http_method == "GET":
+        return get(event, context, id_match.group(1))
+
+    return error("Not found", status=404)
+
+
+@rate_limited("bulk")
+@idempotent
+def create(event, context):
+    """
+    POST /api/exports
+
+    Request body:
+        { "format": "ndjson" | "html" }  // default "ndjson"
+
+    Response (202 Accepted):
+        { "export": {"id": "uuid", "status": "queued", ...} }
+
+    While an export is queued or running, it is returned instead of
+    starting another one.
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    try:
+        body = json.loads(event.get("body") or "{}")
+    except json.JSONDecodeError:
+        return bad_request("Invalid JSON body")
+
+    export_format = body.get("format", "ndjson")
+    if export_format not in EXPORT_FORMATS:
+        return bad_request(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    if _sqs_client is None or _s3_client is None:
+        return error("Exports are not configured", status=503)
+
+    try:
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            active = db.execute(
+                select(Export)
+                .where(
+                    Export.author_id == user.id,
+                    Export.status.in_(("queued", "running")),
+                    Export.created_at > datetime.now(timezone.utc) - ACTIVE_TIMEOUT,
+                )
+                .order_by(Export.created_at.desc())
+                .limit(1)
+            ).scalar_one_or_none()
+            if active:
+                return success({"export": active.to_dict()})
+
+            export = Export(author_id=user.id, format=export_format)
+            db.add(export)
+            db.flush()
+            export_id = export.id
+            response = success({"export": export.to_dict()}, status=202)
+
+        try:
+            _sqs_client.send_message(
+                QueueUrl=SQS_EXPORT_QUEUE_URL,
+                MessageBody=json.dumps({"exportId": str(export_id)}),
+            )
+        except Exception as e:
+            with get_session() as db:
+                db.execute(
+                    sql_update(Export)
+                    .where(Export.id == export_id)
+                    .values(status="failed", error=f"Could not queue export: {e}")
+                )
+            return error("Could not queue export", status=503)
+
+        return response
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
+
+
+@rate_limited("read")
+def get(event, context, export_id: str):
+    """
+    GET /api/exports/:id
+
+    Response:
+        {
+            "export": {
+                "id": "uuid",
+                "format": "ndjson",
+                "status": "queued" | "running" | "ready" | "failed" | "expired",
+                "sizeBytes": 12345,        // gzip-compressed size
+                "itemCount": 678,
+                "downloadURL": "https://...",  // presigned, when ready
+                ...
+            }
+        }
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    try:
+        export_id = UUID(export_id)
+    except ValueError:
+        return not_found("Export not found")
+
+    try:
+        with get_read_session(token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            export = db.execute(
+                select(Export).where(Export.id == export_id, Export.author_id == user.id)
+            ).scalar_one_or_none()
+            if not export:
+                return not_found("Export not found")
+
+            data = export.to_dict()
+
+            if export.status == "ready":
+                expires_at = export.completed_at + timedelta(days=RETENTION_DAYS)
+                if expires_at <= datetime.now(timezone.utc):
+                    data["status"] = "expired"
+                else:
+                    filename = f"poucher-export-{export.completed_at:%Y%m%d}.{export.format}.gz"
+                    data["expiresAt"] = expires_at.isoformat()
+                    data["downloadURL"] = _s3_client.generate_presigned_url(
+                        "get_object",
+                        Params={
+                            "Bucket": EXPORT_BUCKET,
+                            "Key": export.s3_key,
+                            "ResponseContentDisposition": f'attachment; filename="{filename}"',
+                        },
+                        ExpiresIn=URL_EXPIRES_SECONDS,
+                    ) if _s3_client else None
+
+            return success({"export": data})
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
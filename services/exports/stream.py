@@ -0,0 +1,100 @@
+"""
+Write-only file object backed by an S3 multipart upload.
+
+Bytes are buffered until a part is full and then uploaded, so memory use is
+bounded by the part size however much is written. Wrap it in
+gzip.GzipFile to compress on the way out.
+"""
+import io
+
+
+# S3 minimum for every part but the last
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class MultipartUploadWriter(io.RawIOBase):
+    """
+    Usage:
+        with MultipartUploadWriter(s3, bucket, key) as out:
+            out.write(b"...")
+        # complete() is called on a clean exit, abort() on an exception;
+        # outside a with block, call complete() explicitly
+    """
+
+    def __init__(
+        self, s3, bucket: str, key: str, part_size: int = 8 * 1024 * 1024, **create_kwargs
+    ):
+        super().__init__()
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._part_size = max(part_size, MIN_PART_SIZE)
+        self._buffer = bytearray()
+        self._parts = []
+        self.bytes_written = 0
+        self._upload_id = s3.create_multipart_upload(
+            Bucket=bucket, Key=key, **create_kwargs
+        )["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed upload")
+        self._buffer += data
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self._part_size:
+            self._upload_part()
+        return len(data)
+
+    def _upload_part(self) -> None:
+        part_number = len(self._parts) + 1
+        response = self._s3.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+        self._buffer.clear()
+
+    def complete(self) -> None:
+        """Upload what is buffered as the last part and assemble the object."""
+        if self.closed:
+            return
+        # An upload needs at least one part, which may then be empty
+        if self._buffer or not self._parts:
+            self._upload_part()
+        self._s3.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        super().close()
+
+    def abort(self) -> None:
+        """Discard the upload and its parts."""
+        if self.closed:
+            return
+        self._buffer.clear()
+        try:
+            self._s3.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+        finally:
+            super().close()
+
+    def close(self) -> None:
+        # Only complete() publishes the object, so an upload that is closed
+        # or garbage-collected part-way never leaves a truncated file
+        self.abort()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.complete()
+        else:
+            self.abort()
+        return False
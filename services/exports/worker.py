@@ -0,0 +1,216 @@
+"""
+Export Worker
+
+Triggered by SQS messages from POST /api/exports:
+    {"exportId": "uuid"}
+
+Streams the user's tags, bookmarks, tag associations and notes from a
+server-side cursor (yield_per) through gzip into an S3 multipart upload, so
+memory use stays constant whatever the size of the library. All rows are
+read in one REPEATABLE READ transaction, so the export is a consistent
+snapshot.
+
+Formats:
+    ndjson - One JSON object per line: {"type": "bookmark", "data": {...}},
+             with the same data keys as GET /api/sync
+    html   - Netscape bookmark file (importable by browsers), bookmarks only,
+             with tag titles in TAGS
+"""
+import gzip
+import html
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from uuid import UUID
+
+import boto3
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select, update
+
+from shared.db import get_read_session, get_session, Bookmark, BookmarkTag, Export, Note, Tag
+from shared.db.fields import (
+    BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS, NOTE_DEFAULT_KEYS, NOTE_FIELDS, TAG_DEFAULT_KEYS,
+    TAG_FIELDS, field_columns, row_serializer
+)
+from exports.stream import MultipartUploadWriter
+
+
+EXPORT_BUCKET = os.environ.get("EXPORT_BUCKET")
+S3_REGION = os.environ.get("AWS_REGION", "eu-west-2")
+_s3_client = boto3.client("s3", region_name=S3_REGION) if EXPORT_BUCKET else None
+
+# Rows per server-side cursor fetch
+FETCH_SIZE = int(os.environ.get("EXPORT_FETCH_SIZE", "1000"))
+PART_SIZE = 8 * 1024 * 1024
+
+FILE_EXTENSIONS = {"ndjson": "ndjson.gz", "html": "html.gz"}
+
+
+def handler(event, context):
+    """Process SQS export messages."""
+    results = []
+
+    for record in event.get("Records", []):
+        try:
+            body = json.loads(record.get("body", "{}"))
+            export_id = UUID(body["exportId"])
+        except (KeyError, TypeError, ValueError):
+            results.append({"error": "Missing or invalid exportId"})
+            continue
+
+        results.append({"exportId": str(export_id), "status": run_export(export_id)})
+
+    return {"results": results}
+
+
+def export_key(export: Export) -> str:
+    return f"exports/{export.author_id}/{export.id}.{FILE_EXTENSIONS[export.format]}"
+
+
+def run_export(export_id: UUID) -> str:
+    """Build one export; returns its final status."""
+    with get_session() as db:
+        export = db.execute(
+            update(Export)
+            .where(Export.id == export_id, Export.status.in_(("queued", "running")))
+            .values(status="running", started_at=func.now(), error=None)
+            .returning(Export)
+        ).scalar_one_or_none()
+        if export is None:
+            # Already finished (redelivered message) or deleted
+            return "skipped"
+        db.expunge(export)
+
+    if _s3_client is None:
+        _finish(export_id, status="failed", error="EXPORT_BUCKET is not configured")
+        return "failed"
+
+    key = export_key(export)
+    try:
+        with MultipartUploadWriter(
+            _s3_client, EXPORT_BUCKET, key, part_size=PART_SIZE,
+            ContentType="application/gzip",
+        ) as out:
+            with gzip.GzipFile(fileobj=out, mode="wb") as gz:
+                if export.format == "html":
+                    item_count = write_html(gz, export.author_id)
+                else:
+                    item_count = write_ndjson(gz, export.author_id)
+    except Exception as e:
+        _finish(export_id, status="failed", error=str(e))
+        return "failed"
+
+    _finish(
+        export_id, status="ready", s3_key=key, size_bytes=out.bytes_written,
+        item_count=item_count,
+    )
+    return "ready"
+
+
+def _finish(export_id: UUID, **values) -> None:
+    with get_session() as db:
+        db.execute(
+            update(Export)
+            .where(Export.id == export_id)
+            .values(completed_at=func.now(), **values)
+        )
+
+
+def _snapshot(db) -> None:
+    """Read everything that follows from one snapshot."""
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+def _stream(db, stmt):
+    """Rows of stmt from a server-side cursor, FETCH_SIZE at a time."""
+    return db.execute(stmt.execution_options(yield_per=FETCH_SIZE))
+
+
+def write_ndjson(out, author_id: UUID) -> int:
+    """Write one line per tag, bookmark, tag association and note; returns the count."""
+    count = 0
+
+    def emit(entity: str, data: dict) -> None:
+        nonlocal count
+        line = json.dumps({"type": entity, "data": data}, default=str, separators=(",", ":"))
+        out.write(line.encode() + b"\n")
+        count += 1
+
+    out.write(json.dumps({
+        "type": "export",
+        "data": {"version": 1, "exportedAt": datetime.now(timezone.utc).isoformat()},
+    }, separators=(",", ":")).encode() + b"\n")
+
+    with get_read_session() as db:
+        _snapshot(db)
+
+        serialize = row_serializer(TAG_DEFAULT_KEYS, TAG_FIELDS)
+        for row in _stream(db, select(*field_columns(TAG_DEFAULT_KEYS, TAG_FIELDS))
+                           .where(Tag.author_id == author_id).order_by(Tag.title)):
+            emit("tag", serialize(row))
+
+        serialize = row_serializer(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS)
+        for row in _stream(db, select(*field_columns(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS))
+                           .where(Bookmark.author_id == author_id)
+                           .order_by(Bookmark.created_at)):
+            emit("bookmark", serialize(row))
+
+        for row in _stream(db, select(BookmarkTag.bookmark_id, BookmarkTag.tag_id)
+                           .join(Bookmark, Bookmark.id == BookmarkTag.bookmark_id)
+                           .where(Bookmark.author_id == author_id)):
+            emit("bookmarkTag", {"bookmarkID": str(row.bookmark_id), "tagID": str(row.tag_id)})
+
+        serialize = row_serializer(NOTE_DEFAULT_KEYS, NOTE_FIELDS)
+        for row in _stream(db, select(*field_columns(NOTE_DEFAULT_KEYS, NOTE_FIELDS))
+                           .where(Note.author_id == author_id).order_by(Note.created_at)):
+            emit("note", serialize(row))
+
+    return count
+
+
+NETSCAPE_HEADER = (
+    "<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+    '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+    "<TITLE>Bookmarks</TITLE>\n"
+    "<H1>Bookmarks</H1>\n"
+    "<DL><p>\n"
+)
+NETSCAPE_FOOTER = "</DL><p>\n"
+
+
+def write_html(out, author_id: UUID) -> int:
+    """Write a Netscape bookmark file of the user's bookmarks; returns the count."""
+    count = 0
+    tag_titles = (
+        select(func.array_agg(Tag.title))
+        .join(BookmarkTag, BookmarkTag.tag_id == Tag.id)
+        .where(BookmarkTag.bookmark_id == Bookmark.id)
+        .scalar_subquery()
+        .label("tags")
+    )
+
+    out.write(NETSCAPE_HEADER.encode())
+    with get_read_session() as db:
+        _snapshot(db)
+        rows = _stream(db, select(
+            Bookmark.title, Bookmark.url, Bookmark.description, Bookmark.created_at, tag_titles,
+        ).where(Bookmark.author_id == author_id).order_by(Bookmark.created_at))
+
+        for row in rows:
+            attrs = f'HREF="{html.escape(row.url)}"'
+            if row.created_at:
+                attrs += f' ADD_DATE="{int(row.created_at.timestamp())}"'
+            if row.tags:
+                attrs += f' TAGS="{html.escape(",".join(row.tags))}"'
+            entry = f"    <DT><A {attrs}>{html.escape(row.title)}</A>\n"
+            if row.description:
+                entry += f"    <DD>{html.escape(row.description)}\n"
+            out.write(entry.encode())
+            count += 1
+    out.write(NETSCAPE_FOOTER.encode())
+
+    return count
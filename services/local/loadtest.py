@@ -0,0 +1,308 @@
+"""
+Load-test scenarios against the local server (or any deployment that
+accepts its tokens).
+
+Each virtual user gets a stub token, calls POST /api/auth/init and seeds a
+library through the API, then the chosen scenario runs on --concurrency
+threads with keep-alive connections. Reports throughput and latency
+percentiles per request type.
+
+Scenarios:
+    browse        - Bookmark list pages (with and without a tag filter) and notes summaries
+    search        - Bookmark title and notes full-text searches
+    bulk-tag      - POST /api/bookmarks/batch addTags/removeTags over a page of IDs
+    create-burst  - POST /api/bookmarks with fresh URLs
+    all           - Each of the above in turn
+
+Usage:
+    python -m local.server --migrate &
+    python -m local.loadtest --scenario browse --concurrency 20 --duration 30
+
+With the default pool (5 + 10 overflow), --concurrency above 15 saturates
+the pool: searches, then reads, are shed with 503 (shared/utils/ratelimit.py)
+while writes queue. Per-user rate limits show up as 429s in the report.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlencode, urlsplit
+
+
+SCENARIOS = ("browse", "search", "bulk-tag", "create-burst")
+SEED_RETRIES = 30
+WORDS = (
+    "python", "postgres", "lambda", "react", "design", "recipe", "travel", "music",
+    "garden", "finance", "history", "physics", "climbing", "coffee", "cycling", "photo",
+)
+
+
+@dataclass
+class VirtualUser:
+    sub: str
+    token: str
+    tag_ids: list = field(default_factory=list)
+    bookmark_ids: list = field(default_factory=list)
+
+
+class Client:
+    """Per-thread keep-alive connections to one base URL."""
+
+    def __init__(self, base_url: str, timeout: float):
+        url = urlsplit(base_url)
+        self._https = url.scheme == "https"
+        self._netloc = url.netloc
+        self._prefix = url.path.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self._netloc, timeout=self._timeout)
+        return conn
+
+    def request(self, method: str, path: str, token: str | None = None,
+                body: dict | None = None, params: dict | None = None):
+        """Returns (status, parsed body); status 0 on a connection error."""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        target = self._prefix + path + (f"?{urlencode(params)}" if params else "")
+        payload = json.dumps(body) if body is not None else None
+
+        conn = self._connection()
+        try:
+            conn.request(method, target, body=payload, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            return 0, None
+        try:
+            return response.status, json.loads(data) if data else None
+        except json.JSONDecodeError:
+            return response.status, None
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._errors = defaultdict(int)
+        self._statuses = defaultdict(lambda: defaultdict(int))
+        self.elapsed = 0.0
+
+    def record(self, label: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self._latencies[label].append(seconds)
+            self._statuses[label][status] += 1
+            if not 200 <= status < 300:
+                self._errors[label] += 1
+
+    def report(self, elapsed: float) -> str:
+        lines = [
+            f"{'request':<24}{'count':>8}{'errors':>8}{'rps':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        ]
+        total = 0
+        for label in sorted(self._latencies):
+            samples = sorted(self._latencies[label])
+            total += len(samples)
+            lines.append(
+                f"{label:<24}{len(samples):>8}{self._errors[label]:>8}"
+                f"{len(samples) / elapsed:>9.1f}"
+                f"{_percentile(samples, 50):>9.1f}{_percentile(samples, 95):>9.1f}"
+                f"{_percentile(samples, 99):>9.1f}{samples[-1] * 1000:>9.1f}"
+            )
+            failed = {s: n for s, n in self._statuses[label].items() if not 200 <= s < 300}
+            if failed:
+                lines.append(f"{'':<24}statuses: {dict(sorted(failed.items()))}")
+        lines.append(f"{'total':<24}{total:>8}{sum(self._errors.values()):>8}"
+                     f"{total / elapsed:>9.1f}")
+        return "\n".join(lines)
+
+
+def _percentile(samples: list, pct: float) -> float:
+    """Nearest-rank percentile of sorted samples, in milliseconds."""
+    index = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[index] * 1000
+
+
+def _timed(client: Client, stats: Stats, label: str, method: str, path: str, user, **kwargs):
+    started = time.perf_counter()
+    status, data = client.request(method, path, user.token, **kwargs)
+    stats.record(label, status, time.perf_counter() - started)
+    return status, data
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.sample(WORDS, 3)).title()
+
+
+def _seed(client: Client, method: str, path: str, token: str, body: dict):
+    """A seeding request, retried while rate limited or shed."""
+    for _ in range(SEED_RETRIES):
+        status, data = client.request(method, path, token, body=body)
+        if status not in (429, 503):
+            return status, data
+        time.sleep(1)
+    return status, data
+
+
+def setup_user(client: Client, index: int, run_id: str, bookmarks: int, tags: int,
+               notes: int) -> VirtualUser:
+    """Create a user with a seeded library through the API."""
+    sub = f"loadtest-{run_id}-{index}"
+    status, data = client.request("POST", "/local/token", body={"sub": sub})
+    if status != 200:
+        raise RuntimeError(f"Could not get a token (status {status}); is local.server running?")
+    user = VirtualUser(sub=sub, token=data["token"])
+
+    status, _ = _seed(client, "POST", "/api/auth/init", user.token, {})
+    if status != 200:
+        raise RuntimeError(f"POST /api/auth/init failed with status {status}")
+
+    rng = random.Random(f"{run_id}-{index}")
+    for word in WORDS[:tags]:
+        status, data = _seed(client, "POST", "/api/tags", user.token, {"title": word})
+        if status in (200, 201):
+            user.tag_ids.append(data["tag"]["ID"])
+
+    for n in range(bookmarks):
+        status, data = _seed(client, "POST", "/api/bookmarks", user.token, {
+            "title": _title(rng),
+            "url": f"https://example.com/{run_id}/{index}/{n}",
+            "description": " ".join(rng.sample(WORDS, 5)),
+            "tagIds": rng.sample(user.tag_ids, min(2, len(user.tag_ids))),
+        })
+        if status in (200, 201):
+            user.bookmark_ids.append(data["bookmark"]["id"])
+
+    for _ in range(notes):
+        _seed(client, "POST", "/api/notes", user.token, {
+            "title": _title(rng),
+            "content": " ".join(rng.choices(WORDS, k=200)),
+        })
+
+    return user
+
+
+def browse(client, stats, user, rng):
+    pages = max(1, len(user.bookmark_ids) // 15)
+    _timed(client, stats, "bookmarks.list", "GET", "/api/bookmarks", user,
+           params={"offset": rng.randrange(pages) * 15, "limit": 15})
+    if user.tag_ids:
+        _timed(client, stats, "bookmarks.list?tags", "GET", "/api/bookmarks", user,
+               params={"tags": rng.choice(user.tag_ids), "limit": 15})
+    _timed(client, stats, "notes.list", "GET", "/api/notes", user,
+           params={"view": "summary", "limit": 15})
+
+
+def search(client, stats, user, rng):
+    _timed(client, stats, "bookmarks.search", "GET", "/api/bookmarks", user,
+           params={"title": rng.choice(WORDS)[:4], "limit": 15})
+    _timed(client, stats, "notes.search", "GET", "/api/notes", user,
+           params={"q": rng.choice(WORDS), "view": "summary", "limit": 15})
+
+
+def bulk_tag(client, stats, user, rng):
+    if not user.tag_ids or not user.bookmark_ids:
+        return
+    ids = rng.sample(user.bookmark_ids, min(50, len(user.bookmark_ids)))
+    operation = rng.choice(("addTags", "removeTags"))
+    _timed(client, stats, f"bookmarks.batch.{operation}", "POST", "/api/bookmarks/batch", user,
+           body={"operation": operation, "ids": ids, "tagIds": [rng.choice(user.tag_ids)]})
+
+
+def create_burst(client, stats, user, rng):
+    status, data = _timed(client, stats, "bookmarks.create", "POST", "/api/bookmarks", user, body={
+        "title": _title(rng),
+        "url": f"https://example.com/burst/{uuid.uuid4()}",
+        "tagIds": rng.sample(user.tag_ids, min(1, len(user.tag_ids))),
+    })
+    if status in (200, 201):
+        user.bookmark_ids.append(data["bookmark"]["id"])
+
+
+SCENARIO_STEPS = {
+    "browse": browse,
+    "search": search,
+    "bulk-tag": bulk_tag,
+    "create-burst": create_burst,
+}
+
+
+def run_scenario(name: str, client: Client, users: list, concurrency: int,
+                 duration: float, requests: int) -> Stats:
+    """Run one scenario until duration elapses or requests iterations are done."""
+    step = SCENARIO_STEPS[name]
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    lock = threading.Lock()
+    started = 0
+
+    def worker(worker_index: int):
+        nonlocal started
+        rng = random.Random(worker_index)
+        while time.monotonic() < deadline:
+            with lock:
+                if requests and started >= requests:
+                    return
+                started += 1
+            step(client, stats, rng.choice(users), rng)
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    stats.elapsed = time.perf_counter() - began
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--users", type=int, default=5, help="virtual users to seed")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="seconds per scenario")
+    parser.add_argument("--requests", type=int, default=0,
+                        help="stop each scenario after this many iterations (default: duration)")
+    parser.add_argument("--bookmarks", type=int, default=200, help="bookmarks seeded per user")
+    parser.add_argument("--tags", type=int, default=8,
+                        help=f"tags seeded per user (max {len(WORDS)})")
+    parser.add_argument("--notes", type=int, default=20, help="notes seeded per user")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    args = parser.parse_args()
+
+    client = Client(args.base_url, args.timeout)
+    run_id = uuid.uuid4().hex[:8]
+
+    print(f"Seeding {args.users} users ({args.bookmarks} bookmarks, {args.tags} tags, "
+          f"{args.notes} notes each)...")
+    seeded = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(args.users, args.concurrency)) as pool:
+        users = list(pool.map(
+            lambda i: setup_user(client, i, run_id, args.bookmarks, args.tags, args.notes),
+            range(args.users),
+        ))
+    print(f"Seeded in {time.perf_counter() - seeded:.1f}s\n")
+
+    for name in SCENARIOS if args.scenario == "all" else (args.scenario,):
+        stats = run_scenario(name, client, users, args.concurrency, args.duration, args.requests)
+        print(f"== {name} (concurrency {args.concurrency}, {stats.elapsed:.1f}s)")
+        print(stats.report(stats.elapsed))
+        print()
+
+
+if __name__ == "__main__":
+    main()
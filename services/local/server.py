@@ -0,0 +1,310 @@
+"""
+Local all-in-one API server.
+
+Mounts every Lambda handler under its API Gateway path behind a threaded
+HTTP server, translating each request into an HTTP API (payload v2) event.
+Tokens come from a stub issuer whose JWKS the handlers fetch from this
+server, so the full auth path runs without Cognito.
+
+All handlers share this process and therefore one connection pool
+(pool_size=5 + max_overflow=10, pool_timeout=30 in shared/db/connection.py):
+more than 15 concurrent database requests saturate it, which is how pool
+exhaustion (and load shedding in shared/utils/ratelimit.py) shows up under
+local/loadtest.py.
+
+Usage:
+    DATABASE_URL=... python -m local.server [--port 8000] [--migrate]
+
+    curl -s -X POST localhost:8000/local/token -d '{"sub": "alice"}'
+    curl -s -X POST localhost:8000/api/auth/init -H "Authorization: Bearer <token>"
+
+Local-only endpoints:
+    POST /local/token       - {"sub", "email"?, "name"?, "ttl"?} -> {"token": "..."}
+    GET  /local/jwks.json   - Public keys of the stub issuer
+"""
+import argparse
+import base64
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from local.tokens import StubIssuer, AUDIENCE, ISSUER  # noqa: E402
+
+
+logger = logging.getLogger("local.server")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+# Path prefix -> handler package, as routed by API Gateway
+ROUTES = {
+    "/api/auth": "auth",
+    "/api/bookmarks": "bookmarks",
+    "/api/tags": "tags",
+    "/api/users": "users",
+    "/api/notes": "notes",
+    "/api/sync": "sync",
+    "/api/exports": "exports",
+    "/api/suggest": "suggest",
+    "/api/screenshot": "screenshot",
+}
+
+# Lambda timeout for API handlers (terraform/modules/lambda)
+LAMBDA_TIMEOUT_MS = 30_000
+
+_handlers: dict = {}
+_handlers_lock = threading.Lock()
+
+
+def _handler_for(path: str):
+    for prefix, package in ROUTES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            with _handlers_lock:
+                if package not in _handlers:
+                    _handlers[package] = importlib.import_module(f"{package}.handler").handler
+            return _handlers[package]
+    return None
+
+
+class LocalContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    function_name = "poucher-local"
+
+    def __init__(self, request_id: str, timeout_ms: int = LAMBDA_TIMEOUT_MS):
+        self.aws_request_id = request_id
+        self._deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def build_event(method: str, target: str, headers, body: bytes, source_ip: str) -> dict:
+    """An API Gateway HTTP API (payload format 2.0) event for one request."""
+    url = urlsplit(target)
+    query = parse_qs(url.query, keep_blank_values=True)
+    lowered = {}
+    for name, value in headers.items():
+        name = name.lower()
+        lowered[name] = f"{lowered[name]},{value}" if name in lowered else value
+
+    event = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": url.path,
+        "rawQueryString": url.query,
+        "headers": lowered,
+        "requestContext": {
+            "http": {
+                "method": method,
+                "path": url.path,
+                "protocol": "HTTP/1.1",
+                "sourceIp": source_ip,
+                "userAgent": lowered.get("user-agent", ""),
+            },
+            "requestId": f"local-{time.time_ns()}",
+            "timeEpoch": int(time.time() * 1000),
+        },
+        "isBase64Encoded": False,
+    }
+    if query:
+        # API Gateway joins repeated parameters with commas
+        event["queryStringParameters"] = {k: ",".join(v) for k, v in query.items()}
+    if body:
+        try:
+            event["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            event["body"] = base64.b64encode(body).decode()
+            event["isBase64Encoded"] = True
+    return event
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "PoucherLocal/1.0"
+
+    issuer: StubIssuer = None
+    # Caps handler concurrency when set, like reserved Lambda concurrency
+    slots: threading.Semaphore | None = None
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_PATCH(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def do_OPTIONS(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        started = time.perf_counter()
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = urlsplit(self.path).path
+
+        if path == "/local/jwks.json" and self.command == "GET":
+            response = _json_response(200, self.issuer.jwks())
+        elif path == "/local/token" and self.command == "POST":
+            response = self._issue_token(body)
+        else:
+            handler = _handler_for(path)
+            if handler is None:
+                response = _json_response(404, {"error": "Not found"})
+            else:
+                response = self._invoke(handler, body)
+
+        self._send(response)
+        logger.info(
+            "%s %s %s %.1fms", self.command, self.path, response.get("statusCode"),
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def _issue_token(self, body: bytes) -> dict:
+        try:
+            claims = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return _json_response(400, {"error": "Invalid JSON body"})
+        if not claims.get("sub"):
+            return _json_response(400, {"error": "sub is required"})
+        token = self.issuer.issue(
+            claims["sub"], claims.get("email"), claims.get("name"), int(claims.get("ttl", 3600))
+        )
+        return _json_response(200, {"token": token})
+
+    def _invoke(self, handler, body: bytes) -> dict:
+        event = build_event(
+            self.command, self.path, self.headers, body, self.client_address[0]
+        )
+        context = LocalContext(event["requestContext"]["requestId"])
+        if self.slots and not self.slots.acquire(blocking=False):
+            # What API Gateway returns when Lambda concurrency is exhausted
+            return _json_response(429, {"message": "Too Many Requests"})
+        try:
+            return handler(event, context)
+        except Exception:
+            logger.exception("Unhandled error in handler")
+            return _json_response(502, {"message": "Internal Server Error"})
+        finally:
+            if self.slots:
+                self.slots.release()
+
+    def _send(self, response: dict):
+        body = response.get("body") or ""
+        payload = (
+            base64.b64decode(body) if response.get("isBase64Encoded") else body.encode("utf-8")
+        )
+        self.send_response(response.get("statusCode", 200))
+        for name, value in (response.get("headers") or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        # Requests are logged once, with timing, by _dispatch
+        pass
+
+
+def _json_response(status: int, body: dict) -> dict:
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json"},
+        "body": json.dumps(body),
+    }
+
+
+def migrate() -> list[str]:
+    """Apply migrations/*.sql not yet recorded in schema_migrations; returns their names."""
+    from sqlalchemy import text
+
+    from shared.db import get_engine
+
+    applied = []
+    with get_engine().begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " name TEXT PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+        done = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        if path.name in done:
+            continue
+        # Raw DBAPI cursor: the files contain multiple statements and
+        # dollar-quoted function bodies
+        with get_engine().begin() as conn:
+            conn.exec_driver_sql(path.read_text())
+            conn.execute(
+                text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": path.name}
+            )
+        applied.append(path.name)
+    return applied
+
+
+def configure_auth(host: str, port: int) -> StubIssuer:
+    """Point shared.utils.auth at the stub issuer; must run before handlers are imported."""
+    os.environ["COGNITO_ISSUER"] = ISSUER
+    os.environ["COGNITO_CLIENT_ID"] = AUDIENCE
+    jwks_host = "127.0.0.1" if host in ("", "0.0.0.0") else host
+    os.environ["COGNITO_JWKS_URL"] = f"http://{jwks_host}:{port}/local/jwks.json"
+    return StubIssuer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--migrate", action="store_true",
+                        help="apply pending migrations/*.sql before serving")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="max handlers running at once, 429 beyond it (default: no cap)")
+    parser.add_argument("--quiet", action="store_true", help="don't log each request")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format="%(asctime)s %(message)s",
+    )
+
+    if not os.environ.get("DATABASE_URL"):
+        parser.error("DATABASE_URL is not set")
+
+    RequestHandler.issuer = configure_auth(args.host, args.port)
+    if args.concurrency:
+        RequestHandler.slots = threading.BoundedSemaphore(args.concurrency)
+
+    if args.migrate:
+        for name in migrate():
+            logger.warning("applied %s", name)
+
+    server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+    server.daemon_threads = True
+    logger.warning("Serving on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Stub JWT issuer for the local server.
+
+Signs RS256 tokens with a key generated at startup and publishes the
+matching JWKS, so handlers validate tokens exactly as they do against
+Cognito (shared/utils/auth.py with COGNITO_ISSUER / COGNITO_JWKS_URL
+pointed here).
+"""
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+
+ISSUER = "http://poucher.local/issuer"
+AUDIENCE = "local"
+KEY_ID = "local-1"
+
+
+class StubIssuer:
+    def __init__(self, issuer: str = ISSUER, audience: str = AUDIENCE):
+        self.issuer = issuer
+        self.audience = audience
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        self._public_jwk = {
+            **jwk.construct(public_pem, "RS256").to_dict(),
+            "kid": KEY_ID,
+            "use": "sig",
+        }
+
+    def jwks(self) -> dict:
+        return {"keys": [self._public_jwk]}
+
+    def issue(self, sub: str, email: str | None = None, name: str | None = None,
+              ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "sub": sub,
+            "email": email or f"{sub}@example.com",
+            "name": name or sub,
+            "iss": self.issuer,
+            "aud": self.audience,
+            "iat": now,
+            "exp": now + ttl,
+        }
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": KEY_ID})
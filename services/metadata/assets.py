@@ -0,0 +1,199 @@
+"""
+Favicon and og:image proxy cache for the metadata worker.
+
+fetch_metadata() finds third-party image URLs; cache_assets() fetches each
+once, checks that it is a real image within METADATA_ASSET_MAX_BYTES,
+resizes it (og:image to card size, the favicon to icon size) and stores it
+in SCREENSHOT_BUCKET under assets/<size>/<sha256 of the stored bytes>.<ext>
+with a one-year immutable CacheControl. The metadata then points at that
+copy, and the original URL is kept as imageSource / faviconSource (except
+for inline data: URLs).
+
+Identical images (e.g. one favicon for every bookmark of a site) share an
+object, so a refresh of an unchanged image uploads nothing. An image that
+is missing, too large or not an image is dropped (image/favicon is null);
+when only the upload fails, the original URL is kept.
+
+Resizing needs Pillow (the "images" extra, bundled in the Lambda package).
+Without it images are only checked by their file signature and stored as
+fetched.
+"""
+import hashlib
+import http.client
+import io
+import os
+import urllib.request
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: pip install ".[images]"
+    Image = None
+
+
+ASSET_BUCKET = os.environ.get("SCREENSHOT_BUCKET")
+S3_REGION = os.environ.get("AWS_REGION", "eu-west-2")
+# Public URL of the bucket (or a CDN in front of it)
+ASSET_BASE_URL = (
+    os.environ.get("METADATA_ASSET_BASE_URL")
+    or (f"https://{ASSET_BUCKET}.s3.{S3_REGION}.amazonaws.com" if ASSET_BUCKET else None)
+)
+ASSETS_ENABLED = bool(ASSET_BUCKET) and os.environ.get("METADATA_ASSETS", "on") != "off"
+FETCH_TIMEOUT_SECONDS = int(os.environ.get("METADATA_ASSET_TIMEOUT_SECONDS", "5"))
+MAX_BYTES = int(os.environ.get("METADATA_ASSET_MAX_BYTES", "5242880"))
+# Larger images are rejected before decoding (decompression bombs)
+MAX_PIXELS = 40_000_000
+KEY_PREFIX = "assets"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+SCHEMES = ("http", "https", "data")
+
+_s3_client = boto3.client("s3", region_name=S3_REGION) if ASSETS_ENABLED else None
+
+# Leading bytes -> (content type, extension, Pillow format)
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ("image/png", "png", "PNG")),
+    (b"\xff\xd8\xff", ("image/jpeg", "jpg", "JPEG")),
+    (b"GIF87a", ("image/gif", "gif", "GIF")),
+    (b"GIF89a", ("image/gif", "gif", "GIF")),
+    (b"\x00\x00\x01\x00", ("image/x-icon", "ico", "ICO")),
+)
+
+
+@dataclass(frozen=True)
+class AssetSize:
+    name: str
+    box: tuple[int, int]  # fits within, keeping the aspect ratio
+    format: str  # Pillow format of the stored copy
+    content_type: str
+    extension: str
+
+
+# Metadata key -> stored size. Twice the rendered size, for high-DPI screens.
+SIZES = {
+    "image": AssetSize("card", (800, 420), "WEBP", "image/webp", "webp"),
+    "favicon": AssetSize("icon", (64, 64), "PNG", "image/png", "png"),
+}
+
+
+class InvalidAsset(Exception):
+    """The URL did not return a usable image."""
+
+
+def cache_assets(metadata: dict[str, Any]) -> dict[str, Any]:
+    """metadata with image and favicon pointing at stored copies."""
+    if not ASSETS_ENABLED:
+        return metadata
+
+    cached = dict(metadata)
+    for field, size in SIZES.items():
+        source = metadata.get(field)
+        if not source:
+            continue
+        if not source.startswith("data:"):
+            cached[f"{field}Source"] = source
+
+        try:
+            body, content_type, extension, dimensions = _prepare(source, size)
+        except (InvalidAsset, OSError, ValueError, http.client.HTTPException) as exc:
+            # Dead links and non-images are not worth hotlinking either
+            print(f"WARNING: dropping {field} {source[:200]}: {exc}")
+            cached[field] = None
+            continue
+
+        try:
+            cached[field] = store_asset(body, content_type, size.name, extension)
+        except (BotoCoreError, ClientError) as exc:
+            print(f"ERROR: could not store {field} {source[:200]}: {str(exc)}")
+            continue
+        if field == "image" and dimensions:
+            cached["imageWidth"], cached["imageHeight"] = dimensions
+    return cached
+
+
+def _prepare(source: str, size: AssetSize):
+    """(body, content type, extension, (width, height) or None) to store for source."""
+    data = fetch_asset(source)
+    content_type, extension, image_format = _sniff(data)
+    if Image is None:
+        return data, content_type, extension, None
+    body, dimensions = _resize(data, image_format, size)
+    return body, size.content_type, size.extension, dimensions
+
+
+def fetch_asset(url: str) -> bytes:
+    """The bytes at url, at most MAX_BYTES."""
+    if urlsplit(url).scheme.lower() not in SCHEMES:
+        raise InvalidAsset("Unsupported URL scheme")
+
+    request = urllib.request.Request(
+        url,
+        headers={
+            "User-Agent": "PoucherMetadataBot/1.0 (+https://poucher.app)",
+            "Accept": "image/*",
+        },
+    )
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS) as response:
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > MAX_BYTES:
+            raise InvalidAsset(f"{length} bytes is over the {MAX_BYTES} byte limit")
+        data = response.read(MAX_BYTES + 1)
+    if len(data) > MAX_BYTES:
+        raise InvalidAsset(f"Over the {MAX_BYTES} byte limit")
+    return data
+
+
+def _sniff(data: bytes) -> tuple[str, str, str]:
+    """(content type, extension, Pillow format) from the file signature."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp", "WEBP"
+    for signature, kind in SIGNATURES:
+        if data.startswith(signature):
+            return kind
+    # SVG is deliberately unsupported: it can carry scripts
+    raise InvalidAsset("Not a PNG, JPEG, GIF, WebP or ICO image")
+
+
+def _resize(data: bytes, image_format: str, size: AssetSize):
+    """(body, (width, height)) of the image fitted into size.box and re-encoded."""
+    try:
+        with Image.open(io.BytesIO(data), formats=[image_format]) as image:
+            if image.width * image.height > MAX_PIXELS:
+                raise InvalidAsset(f"{image.width}x{image.height} is too many pixels")
+            # Decodes JPEGs at a reduced scale (draft) before resampling
+            image.thumbnail(size.box, Image.Resampling.LANCZOS)
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+            output = io.BytesIO()
+            if size.format == "WEBP":
+                image.save(output, "WEBP", quality=80, method=4)
+            else:
+                image.save(output, size.format, optimize=True)
+            return output.getvalue(), image.size
+    except (Image.DecompressionBombError, SyntaxError) as exc:
+        # Pillow raises SyntaxError for some malformed headers
+        raise InvalidAsset(str(exc)) from exc
+
+
+def store_asset(body: bytes, content_type: str, size_name: str, extension: str) -> str:
+    """Upload body under its content hash unless already there; returns its URL."""
+    key = f"{KEY_PREFIX}/{size_name}/{hashlib.sha256(body).hexdigest()}.{extension}"
+    try:
+        _s3_client.head_object(Bucket=ASSET_BUCKET, Key=key)
+    except ClientError as exc:
+        # 403 without s3:ListBucket, 404 with it
+        if exc.response.get("Error", {}).get("Code") not in ("403", "404", "NoSuchKey"):
+            raise
+        _s3_client.put_object(
+            Bucket=ASSET_BUCKET,
+            Key=key,
+            Body=body,
+            ContentType=content_type,
+            CacheControl=CACHE_CONTROL,
+        )
+    return f"{ASSET_BASE_URL}/{key}"
@@ -4,29 +4,56 @@ Bookmark Metadata Worker
 Triggered by SQS with messages:
 {
     "bookmarkId": "uuid",
-    "url": "https://example.com"
+    "url": "https://example.com",
+    "deferrals": 0,   // Optional, times already deferred for host limits
+    "refresh": false  // Optional, re-fetch of a bookmark that has metadata
 }
+
+Fetches are subject to per-host concurrency caps and a circuit breaker
+(see host_health.py). Messages for an unavailable host are re-queued with a
+backoff delay instead of being attempted.
+
+The page's og:image and favicon are copied to SCREENSHOT_BUCKET and the
+stored metadata points at those copies (see assets.py).
 """
 import json
 import os
+import random
+import socket
 import sys
+import urllib.error
 import urllib.request
 from datetime import datetime, timezone
 from html.parser import HTMLParser
 from typing import Any
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 from uuid import UUID
 
+import boto3
+
 # Add shared module to path for Lambda
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from sqlalchemy import update
+
 from shared.db import get_session, Bookmark
+from metadata import host_health
+from metadata.assets import cache_assets
+from metadata.host_health import HostUnavailable
 
 
 FETCH_TIMEOUT_SECONDS = int(os.environ.get("METADATA_FETCH_TIMEOUT_SECONDS", "10"))
 MAX_BYTES = int(os.environ.get("METADATA_MAX_BYTES", "1048576"))
 MAX_ATTEMPTS = int(os.environ.get("METADATA_MAX_ATTEMPTS", "3"))
 
+# Deferral backoff for hosts at their cap or with an open circuit
+MAX_DEFERRALS = int(os.environ.get("METADATA_MAX_DEFERRALS", "8"))
+DEFER_BASE_SECONDS = 30
+DEFER_MAX_SECONDS = 900  # SQS DelaySeconds limit
+
+SQS_METADATA_QUEUE_URL = os.environ.get("METADATA_QUEUE_URL")
+_sqs_client = boto3.client("sqs") if SQS_METADATA_QUEUE_URL else None
+
 
 class MetadataParser(HTMLParser):
     def __init__(self) -> None:
@@ -84,13 +111,15 @@ def handler(event, context):
             bookmark_id = body.get("bookmarkId")
             url = body.get("url")
             attempts = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+            deferrals = int(body.get("deferrals", 0))
+            refresh = bool(body.get("refresh", False))
 
             if not bookmark_id or not url:
                 results.append({"error": "Missing bookmarkId or url"})
                 continue
 
-            process_metadata(bookmark_id, url, attempts)
-            results.append({"bookmarkId": bookmark_id, "success": True})
+            deferred = process_metadata(bookmark_id, url, attempts, deferrals, refresh)
+            results.append({"bookmarkId": bookmark_id, "success": True, "deferred": deferred})
         except Exception as e:
             results.append({"error": str(e)})
             raise
@@ -98,24 +127,108 @@ def handler(event, context):
     return {"processed": len(results), "results": results}
 
 
-def process_metadata(bookmark_id: str, url: str, attempts: int) -> None:
+def process_metadata(
+    bookmark_id: str, url: str, attempts: int, deferrals: int = 0, refresh: bool = False,
+) -> bool:
+    """
+    Fetch and store metadata. Returns True if the message was deferred instead.
+
+    A failed refresh keeps the bookmark's existing metadata and "ready" status.
+    """
     try:
         bookmark_uuid = UUID(bookmark_id)
     except ValueError:
-        return
+        return False
+
+    host = (urlsplit(url).hostname or "").lower()
+    lease_id = None
+    # A URL without a host fails in fetch_metadata; it gets no lease rather
+    # than sharing one "" host with every other malformed URL
+    if host:
+        try:
+            lease_id = host_health.acquire(host, FETCH_TIMEOUT_SECONDS + 5)
+        except HostUnavailable as exc:
+            defer_metadata(bookmark_uuid, url, deferrals, refresh, exc)
+            return True
 
     try:
-        metadata = fetch_metadata(url)
-        if metadata:
-            update_bookmark_metadata(bookmark_uuid, url, metadata)
-            return
-        raise RuntimeError("No metadata extracted")
+        try:
+            metadata = fetch_metadata(url)
+        except Exception as exc:
+            release_lease(host, lease_id, is_host_failure(exc))
+            raise
+        # Released before the image fetches, which go to other hosts (often
+        # a CDN) and would otherwise hold one of this host's slots
+        release_lease(host, lease_id, False if metadata else None)
+        if not metadata:
+            raise RuntimeError("No metadata extracted")
+        update_bookmark_metadata(bookmark_uuid, url, cache_assets(metadata))
+        return False
     except Exception as exc:
         if attempts >= MAX_ATTEMPTS:
-            mark_metadata_failed(bookmark_uuid, str(exc))
+            mark_metadata_failed(bookmark_uuid, str(exc), refresh)
         raise
 
 
+def release_lease(host: str, lease_id: UUID | None, failed: bool | None) -> None:
+    """Release a page fetch's host lease, if it has one."""
+    if lease_id is None:
+        return
+    try:
+        host_health.release(host, lease_id, failed)
+    except Exception:
+        pass  # The lease expires on its own
+
+
+def is_host_failure(exc: Exception) -> bool | None:
+    """
+    Whether a fetch error counts against the host's health: True for
+    timeouts, connection errors, 5xx and 429, None for anything that says
+    nothing about the host (e.g. 404).
+    """
+    if isinstance(exc, urllib.error.HTTPError):
+        return True if exc.code >= 500 or exc.code == 429 else None
+    if isinstance(exc, (urllib.error.URLError, socket.timeout, TimeoutError, ConnectionError)):
+        return True
+    return None
+
+
+def defer_metadata(
+    bookmark_id: UUID, url: str, deferrals: int, refresh: bool, exc: HostUnavailable,
+) -> None:
+    """
+    Re-queue a message for an unavailable host with an exponential delay.
+
+    A new message is sent (and the current one completes) rather than
+    extending the visibility timeout, so deferrals don't count towards the
+    queue's maxReceiveCount and dead-letter healthy bookmarks.
+    """
+    if _sqs_client is None or deferrals >= MAX_DEFERRALS:
+        mark_metadata_failed(bookmark_id, f"Host unavailable: {exc}", refresh)
+        return
+
+    backoff = DEFER_BASE_SECONDS * 2 ** deferrals
+    delay = min(max(backoff, exc.retry_after) + random.uniform(0, DEFER_BASE_SECONDS), DEFER_MAX_SECONDS)
+    _sqs_client.send_message(
+        QueueUrl=SQS_METADATA_QUEUE_URL,
+        MessageBody=json.dumps({
+            "bookmarkId": str(bookmark_id),
+            "url": url,
+            "deferrals": deferrals + 1,
+            "refresh": refresh,
+        }),
+        DelaySeconds=int(delay),
+    )
+
+    # Still in flight, so the refresh job must not re-enqueue it meanwhile
+    with get_session() as db:
+        db.execute(
+            update(Bookmark)
+            .where(Bookmark.id == bookmark_id)
+            .values(metadata_requested_at=datetime.now(timezone.utc))
+        )
+
+
 def fetch_metadata(url: str) -> dict[str, Any]:
     request = urllib.request.Request(
         url,
@@ -186,11 +299,12 @@ def update_bookmark_metadata(bookmark_id: UUID, url: str, metadata: dict[str, An
         bookmark.metadata_updated_at = datetime.now(timezone.utc)
 
 
-def mark_metadata_failed(bookmark_id: UUID, message: str) -> None:
+def mark_metadata_failed(bookmark_id: UUID, message: str, refresh: bool = False) -> None:
     with get_session() as db:
         bookmark = db.query(Bookmark).filter(Bookmark.id == bookmark_id).first()
         if not bookmark:
             return
-        bookmark.metadata_status = "failed"
+        if not refresh or bookmark.metadata_status != "ready":
+            bookmark.metadata_status = "failed"
         bookmark.metadata_error = message[:500]
         bookmark.metadata_updated_at = datetime.now(timezone.utc)
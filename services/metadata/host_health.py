@@ -0,0 +1,118 @@
+"""
+Per-host concurrency caps and circuit breaker for the metadata worker.
+
+State lives in Postgres (metadata_host_health, metadata_host_leases) so all
+concurrently running workers see it. A fetch takes a lease on its host,
+which counts against METADATA_HOST_MAX_CONCURRENCY until it is released or
+expires. Fetch outcomes are counted per host over a rolling window; when
+enough of them fail the circuit opens and fetches for that host are deferred
+until it closes. After the open period one failure re-opens it for twice as
+long, and one success closes it.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from shared.db import get_session, MetadataHostHealth, MetadataHostLease
+
+
+HOST_MAX_CONCURRENCY = int(os.environ.get("METADATA_HOST_MAX_CONCURRENCY", "2"))
+BREAKER_WINDOW_SECONDS = int(os.environ.get("METADATA_BREAKER_WINDOW_SECONDS", "300"))
+BREAKER_MIN_FAILURES = int(os.environ.get("METADATA_BREAKER_MIN_FAILURES", "5"))
+BREAKER_FAILURE_RATIO = float(os.environ.get("METADATA_BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_OPEN_SECONDS = int(os.environ.get("METADATA_BREAKER_OPEN_SECONDS", "300"))
+BREAKER_MAX_OPEN_SECONDS = 3600
+# Suggested wait when a host is only at its concurrency cap
+BUSY_RETRY_SECONDS = 30
+
+
+class HostUnavailable(Exception):
+    """The host is at its concurrency cap or its circuit is open."""
+
+    def __init__(self, host: str, reason: str, retry_after: float):
+        super().__init__(f"{host}: {reason}")
+        self.host = host
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _locked_health(db, host: str) -> MetadataHostHealth:
+    """The host's health row, created if missing and locked for this transaction."""
+    db.execute(pg_insert(MetadataHostHealth).values(host=host).on_conflict_do_nothing())
+    return db.execute(
+        select(MetadataHostHealth).where(MetadataHostHealth.host == host).with_for_update()
+    ).scalar_one()
+
+
+def acquire(host: str, lease_seconds: float) -> UUID:
+    """
+    Take a fetch lease on host.
+
+    Raises:
+        HostUnavailable when the circuit is open or the host is at its cap
+    """
+    with get_session() as db:
+        health = _locked_health(db, host)
+        now = datetime.now(timezone.utc)
+
+        if health.open_until and health.open_until > now:
+            raise HostUnavailable(host, "circuit open", (health.open_until - now).total_seconds())
+
+        db.execute(delete(MetadataHostLease).where(
+            MetadataHostLease.host == host, MetadataHostLease.expires_at <= now
+        ))
+        in_flight = db.execute(
+            select(func.count()).select_from(MetadataHostLease).where(MetadataHostLease.host == host)
+        ).scalar()
+        if in_flight >= HOST_MAX_CONCURRENCY:
+            raise HostUnavailable(host, "concurrency limit", BUSY_RETRY_SECONDS)
+
+        lease = MetadataHostLease(host=host, expires_at=now + timedelta(seconds=lease_seconds))
+        db.add(lease)
+        db.flush()
+        return lease.id
+
+
+def release(host: str, lease_id: UUID, failed: bool | None) -> None:
+    """
+    Release a lease and record the fetch outcome.
+
+    failed is None when the outcome says nothing about the host's health.
+    """
+    with get_session() as db:
+        db.execute(delete(MetadataHostLease).where(MetadataHostLease.id == lease_id))
+        if failed is None:
+            return
+
+        health = _locked_health(db, host)
+        now = datetime.now(timezone.utc)
+
+        # First outcome after an open period: the probe decides on its own
+        probing = health.trips > 0 and health.open_until is not None and health.open_until <= now
+        if (
+            health.window_started_at is None
+            or health.window_started_at <= now - timedelta(seconds=BREAKER_WINDOW_SECONDS)
+            or (probing and not failed)
+        ):
+            health.failures = 0
+            health.successes = 0
+            health.window_started_at = now
+
+        if not failed:
+            health.successes += 1
+            if probing:
+                health.trips = 0
+            return
+
+        health.failures += 1
+        total = health.failures + health.successes
+        if probing or (
+            health.failures >= BREAKER_MIN_FAILURES
+            and health.failures / total >= BREAKER_FAILURE_RATIO
+        ):
+            open_seconds = min(BREAKER_OPEN_SECONDS * 2 ** health.trips, BREAKER_MAX_OPEN_SECONDS)
+            health.open_until = now + timedelta(seconds=open_seconds)
+            health.trips += 1
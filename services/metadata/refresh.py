@@ -0,0 +1,160 @@
+"""
+Bookmark Metadata Refresh Job
+
+Triggered on a schedule (EventBridge). Re-enqueues metadata fetches for:
+    - "pending" bookmarks whose fetch was requested more than
+      METADATA_STUCK_AFTER_MINUTES ago and never completed (e.g. the message
+      ended up in the dead-letter queue)
+    - "ready" bookmarks never fetched, or last fetched more than
+      METADATA_REFRESH_AFTER_DAYS ago
+
+Each run claims at most METADATA_REFRESH_MAX_PER_RUN rows, stuck ones first,
+by setting metadata_requested_at, and sends them in batches of 10 at no
+more than METADATA_REFRESH_RATE_PER_SECOND messages per second, so backfill
+load on the workers and the database stays bounded.
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import boto3
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, or_, select, update
+
+from shared.db import get_session, Bookmark
+
+
+SQS_METADATA_QUEUE_URL = os.environ.get("METADATA_QUEUE_URL")
+_sqs_client = boto3.client("sqs") if SQS_METADATA_QUEUE_URL else None
+
+STUCK_AFTER_MINUTES = int(os.environ.get("METADATA_STUCK_AFTER_MINUTES", "30"))
+REFRESH_AFTER_DAYS = int(os.environ.get("METADATA_REFRESH_AFTER_DAYS", "30"))
+MAX_PER_RUN = int(os.environ.get("METADATA_REFRESH_MAX_PER_RUN", "500"))
+RATE_PER_SECOND = float(os.environ.get("METADATA_REFRESH_RATE_PER_SECOND", "20"))
+SQS_BATCH_SIZE = 10  # send_message_batch limit
+
+
+def handler(event, context):
+    if _sqs_client is None:
+        return {"error": "METADATA_QUEUE_URL is not configured"}
+
+    now = datetime.now(timezone.utc)
+    # Rows enqueued within this window are in flight (or deferred) already
+    requested_before = now - timedelta(minutes=STUCK_AFTER_MINUTES)
+
+    stuck = claim(
+        Bookmark.metadata_requested_at,
+        Bookmark.metadata_status == "pending",
+        Bookmark.metadata_requested_at < requested_before,
+        limit=MAX_PER_RUN,
+    )
+    never_fetched = claim(
+        None,
+        Bookmark.metadata_status == "ready",
+        Bookmark.metadata_updated_at.is_(None),
+        _not_requested_since(requested_before),
+        limit=MAX_PER_RUN - len(stuck),
+    )
+    stale = claim(
+        Bookmark.metadata_updated_at,
+        Bookmark.metadata_status == "ready",
+        Bookmark.metadata_updated_at < now - timedelta(days=REFRESH_AFTER_DAYS),
+        _not_requested_since(requested_before),
+        limit=MAX_PER_RUN - len(stuck) - len(never_fetched),
+    )
+
+    sent, failed = enqueue(
+        [(row, False) for row in stuck] + [(row, True) for row in never_fetched + stale],
+        deadline=_deadline(context),
+    )
+
+    return {
+        "stuck": len(stuck),
+        "neverFetched": len(never_fetched),
+        "stale": len(stale),
+        "sent": sent,
+        "failed": failed,
+    }
+
+
+def _not_requested_since(cutoff: datetime):
+    return or_(Bookmark.metadata_requested_at.is_(None), Bookmark.metadata_requested_at < cutoff)
+
+
+def claim(order_by, *conditions, limit: int) -> list:
+    """
+    Mark up to limit matching bookmarks (first by order_by, if given) as
+    requested now and return their (id, url) rows.
+
+    SKIP LOCKED keeps overlapping runs from claiming the same rows. Rows
+    whose send fails are picked up again after METADATA_STUCK_AFTER_MINUTES.
+    """
+    if limit <= 0:
+        return []
+
+    candidates = select(Bookmark.id).where(*conditions)
+    if order_by is not None:
+        candidates = candidates.order_by(order_by)
+    candidates = candidates.limit(limit).with_for_update(skip_locked=True).scalar_subquery()
+
+    with get_session() as db:
+        return db.execute(
+            update(Bookmark)
+            .where(Bookmark.id.in_(candidates))
+            .values(metadata_requested_at=func.now())
+            .returning(Bookmark.id, Bookmark.url)
+        ).all()
+
+
+def _deadline(context) -> float | None:
+    """Monotonic time to stop sending, leaving a margin before the Lambda timeout."""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 5
+
+
+def enqueue(rows: list, deadline: float | None = None) -> tuple[int, int]:
+    """
+    Send (row, refresh) pairs to the metadata queue in rate-limited batches.
+
+    Returns (sent, failed). Anything not sent before the deadline counts as
+    failed and is retried by a later run.
+    """
+    sent = failed = 0
+    interval = SQS_BATCH_SIZE / RATE_PER_SECOND
+
+    for start in range(0, len(rows), SQS_BATCH_SIZE):
+        batch = rows[start:start + SQS_BATCH_SIZE]
+        if deadline is not None and time.monotonic() + interval > deadline:
+            failed += len(rows) - start
+            break
+
+        batch_started = time.monotonic()
+        response = _sqs_client.send_message_batch(
+            QueueUrl=SQS_METADATA_QUEUE_URL,
+            Entries=[
+                {
+                    "Id": str(index),
+                    "MessageBody": json.dumps({
+                        "bookmarkId": str(row.id),
+                        "url": row.url,
+                        "refresh": refresh,
+                    }),
+                }
+                for index, (row, refresh) in enumerate(batch)
+            ],
+        )
+        sent += len(response.get("Successful", []))
+        failed += len(response.get("Failed", []))
+
+        # Pace batches to RATE_PER_SECOND messages
+        elapsed = time.monotonic() - batch_started
+        if elapsed < interval and start + SQS_BATCH_SIZE < len(rows):
+            time.sleep(interval - elapsed)
+
+    return sent, failed
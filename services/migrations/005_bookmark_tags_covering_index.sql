@@ -0,0 +1,7 @@
+-- Covering index for tag -> bookmark lookups
+-- Lets tag filters on bookmark search run as index-only semi-joins
+CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag_bookmark
+    ON bookmark_tags (tag_id, bookmark_id);
+
+-- Superseded by the covering index above
+DROP INDEX IF EXISTS idx_bookmark_tags_tag;
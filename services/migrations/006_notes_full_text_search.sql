@@ -0,0 +1,19 @@
+-- Full-text search over note content
+-- content_text holds the note's HTML stripped to plain text; the notes
+-- handler keeps it in sync on every write.
+ALTER TABLE notes ADD COLUMN content_text TEXT NOT NULL DEFAULT '';
+
+-- Approximate backfill for existing notes (tags stripped, whitespace collapsed);
+-- rows are re-extracted precisely on their next save.
+UPDATE notes
+SET content_text = btrim(regexp_replace(
+    regexp_replace(content, '<[^>]*>', ' ', 'g'),
+    '\s+', ' ', 'g'
+));
+
+ALTER TABLE notes ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', left(coalesce(content_text, ''), 100000)), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_notes_search_vector ON notes USING gin(search_vector);
@@ -0,0 +1,6 @@
+-- Plain-text preview for note list views (view=summary), so listings never
+-- read the full content column
+ALTER TABLE notes ADD COLUMN preview TEXT NOT NULL DEFAULT '';
+
+-- Backfill from the plain-text extraction added in 006
+UPDATE notes SET preview = left(content_text, 200);
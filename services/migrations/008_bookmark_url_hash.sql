@@ -0,0 +1,7 @@
+-- Canonical URL hash for duplicate detection on bookmark create
+-- Populated by the bookmarks handler; existing rows are backfilled with
+-- scripts/backfill_url_hashes.py (legacy duplicates keep a NULL hash).
+ALTER TABLE bookmarks ADD COLUMN url_hash VARCHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_bookmarks_author_url_hash
+    ON bookmarks (author_id, url_hash);
@@ -0,0 +1,20 @@
+-- Per-host concurrency caps and circuit breaker state for the metadata worker
+CREATE TABLE IF NOT EXISTS metadata_host_health (
+    host VARCHAR(255) PRIMARY KEY,
+    failures INTEGER NOT NULL DEFAULT 0,
+    successes INTEGER NOT NULL DEFAULT 0,
+    window_started_at TIMESTAMPTZ,
+    open_until TIMESTAMPTZ,
+    trips INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- One row per in-flight fetch; expired rows are ignored and cleaned up lazily
+CREATE TABLE IF NOT EXISTS metadata_host_leases (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    host VARCHAR(255) NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_metadata_host_leases_host
+    ON metadata_host_leases (host, expires_at);
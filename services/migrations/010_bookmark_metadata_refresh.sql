@@ -0,0 +1,16 @@
+-- When metadata was last enqueued for a bookmark, so the refresh job
+-- (metadata/refresh.py) can find stuck and stale rows without rescanning them
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS metadata_requested_at TIMESTAMPTZ;
+
+UPDATE bookmarks SET metadata_requested_at = created_at
+WHERE metadata_status = 'pending' AND metadata_requested_at IS NULL;
+
+-- Stuck "pending" rows, oldest request first
+CREATE INDEX IF NOT EXISTS idx_bookmarks_metadata_pending
+    ON bookmarks (metadata_requested_at)
+    WHERE metadata_status = 'pending';
+
+-- "ready" rows by last fetch (NULL: never fetched)
+CREATE INDEX IF NOT EXISTS idx_bookmarks_metadata_ready_updated
+    ON bookmarks (metadata_updated_at)
+    WHERE metadata_status = 'ready';
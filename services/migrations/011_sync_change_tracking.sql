@@ -0,0 +1,156 @@
+-- Change tracking for GET /api/sync
+--
+-- Every insert/update of a bookmark, tag, note or tag association takes the
+-- next value of a global sequence (change_seq) and records when it did
+-- (changed_at, clock time rather than transaction start). Deletes leave a
+-- tombstone with its own change_seq. A sync token holds the last change_seq a
+-- client has seen and when it was issued.
+
+CREATE SEQUENCE IF NOT EXISTS sync_change_seq;
+
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+ALTER TABLE bookmarks ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+ALTER TABLE tags ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+ALTER TABLE tags ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+ALTER TABLE notes ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+ALTER TABLE notes ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+ALTER TABLE bookmark_tags ADD COLUMN IF NOT EXISTS change_seq BIGINT;
+ALTER TABLE bookmark_tags ADD COLUMN IF NOT EXISTS changed_at TIMESTAMPTZ;
+
+-- Backfill before the triggers exist (this also leaves updated_at alone)
+UPDATE bookmarks SET change_seq = nextval('sync_change_seq'), changed_at = NOW() WHERE change_seq IS NULL;
+UPDATE tags SET change_seq = nextval('sync_change_seq'), changed_at = NOW() WHERE change_seq IS NULL;
+UPDATE notes SET change_seq = nextval('sync_change_seq'), changed_at = NOW() WHERE change_seq IS NULL;
+UPDATE bookmark_tags SET change_seq = nextval('sync_change_seq'), changed_at = NOW() WHERE change_seq IS NULL;
+
+ALTER TABLE bookmarks ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+ALTER TABLE tags ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+ALTER TABLE notes ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+ALTER TABLE bookmark_tags ALTER COLUMN change_seq SET NOT NULL, ALTER COLUMN changed_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_bookmarks_author_change_seq ON bookmarks (author_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_tags_author_change_seq ON tags (author_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_notes_author_change_seq ON notes (author_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_bookmark_tags_change_seq ON bookmark_tags (change_seq);
+
+CREATE OR REPLACE FUNCTION set_sync_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_seq = nextval('sync_change_seq');
+    NEW.changed_at = clock_timestamp();
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS sync_change_bookmarks_insert ON bookmarks;
+CREATE TRIGGER sync_change_bookmarks_insert
+    BEFORE INSERT ON bookmarks
+    FOR EACH ROW
+    EXECUTE FUNCTION set_sync_change();
+
+-- Only changes clients can see (not e.g. metadata_requested_at bookkeeping)
+DROP TRIGGER IF EXISTS sync_change_bookmarks_update ON bookmarks;
+CREATE TRIGGER sync_change_bookmarks_update
+    BEFORE UPDATE ON bookmarks
+    FOR EACH ROW
+    WHEN ((OLD.title, OLD.description, OLD.url, OLD.video_url, OLD.screenshot_url, OLD.metadata,
+           OLD.metadata_status, OLD.metadata_error, OLD.metadata_updated_at)
+          IS DISTINCT FROM
+          (NEW.title, NEW.description, NEW.url, NEW.video_url, NEW.screenshot_url, NEW.metadata,
+           NEW.metadata_status, NEW.metadata_error, NEW.metadata_updated_at))
+    EXECUTE FUNCTION set_sync_change();
+
+DROP TRIGGER IF EXISTS sync_change_tags ON tags;
+CREATE TRIGGER sync_change_tags
+    BEFORE INSERT OR UPDATE ON tags
+    FOR EACH ROW
+    EXECUTE FUNCTION set_sync_change();
+
+DROP TRIGGER IF EXISTS sync_change_notes ON notes;
+CREATE TRIGGER sync_change_notes
+    BEFORE INSERT OR UPDATE ON notes
+    FOR EACH ROW
+    EXECUTE FUNCTION set_sync_change();
+
+DROP TRIGGER IF EXISTS sync_change_bookmark_tags ON bookmark_tags;
+CREATE TRIGGER sync_change_bookmark_tags
+    BEFORE INSERT OR UPDATE ON bookmark_tags
+    FOR EACH ROW
+    EXECUTE FUNCTION set_sync_change();
+
+-- Deleted rows, kept for SYNC_TOMBSTONE_RETENTION_DAYS (see sync/purge.py)
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    change_seq BIGINT PRIMARY KEY DEFAULT nextval('sync_change_seq'),
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    author_id UUID NOT NULL,
+    entity VARCHAR(32) NOT NULL,     -- bookmark, tag, note, bookmarkTag
+    entity_id UUID NOT NULL,         -- bookmarkTag: the bookmark ID
+    related_id UUID                  -- bookmarkTag: the tag ID
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_author_change_seq
+    ON sync_tombstones (author_id, change_seq);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_changed_at
+    ON sync_tombstones (changed_at);
+
+-- Highest change_seq purged, and the changed_at cutoff of the latest purge.
+-- A token below purged_through that was issued before purged_before may
+-- have missed a purged tombstone.
+CREATE TABLE IF NOT EXISTS sync_watermark (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    purged_through BIGINT NOT NULL DEFAULT 0,
+    purged_before TIMESTAMPTZ
+);
+INSERT INTO sync_watermark (id) VALUES (TRUE) ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO sync_tombstones (author_id, entity, entity_id)
+    VALUES (OLD.author_id, TG_ARGV[0], OLD.id);
+    RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+-- Associations removed by a bookmark or tag delete are implied by that
+-- tombstone, so only direct removals (both sides still exist) are recorded
+CREATE OR REPLACE FUNCTION record_bookmark_tag_tombstone()
+RETURNS TRIGGER AS $$
+DECLARE
+    owner UUID;
+BEGIN
+    SELECT b.author_id INTO owner
+    FROM bookmarks b JOIN tags t ON t.id = OLD.tag_id
+    WHERE b.id = OLD.bookmark_id;
+
+    IF owner IS NOT NULL THEN
+        INSERT INTO sync_tombstones (author_id, entity, entity_id, related_id)
+        VALUES (owner, 'bookmarkTag', OLD.bookmark_id, OLD.tag_id);
+    END IF;
+    RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS sync_tombstone_bookmarks ON bookmarks;
+CREATE TRIGGER sync_tombstone_bookmarks
+    AFTER DELETE ON bookmarks
+    FOR EACH ROW
+    EXECUTE FUNCTION record_sync_tombstone('bookmark');
+
+DROP TRIGGER IF EXISTS sync_tombstone_tags ON tags;
+CREATE TRIGGER sync_tombstone_tags
+    AFTER DELETE ON tags
+    FOR EACH ROW
+    EXECUTE FUNCTION record_sync_tombstone('tag');
+
+DROP TRIGGER IF EXISTS sync_tombstone_notes ON notes;
+CREATE TRIGGER sync_tombstone_notes
+    AFTER DELETE ON notes
+    FOR EACH ROW
+    EXECUTE FUNCTION record_sync_tombstone('note');
+
+DROP TRIGGER IF EXISTS sync_tombstone_bookmark_tags ON bookmark_tags;
+CREATE TRIGGER sync_tombstone_bookmark_tags
+    AFTER DELETE ON bookmark_tags
+    FOR EACH ROW
+    EXECUTE FUNCTION record_bookmark_tag_tombstone();
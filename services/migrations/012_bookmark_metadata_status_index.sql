@@ -0,0 +1,6 @@
+-- Covering index for GET /api/bookmarks/status: the author/id lookup returns
+-- metadata_status and metadata_updated_at from the index alone (index-only
+-- scan once the visibility map is current), without reading bookmark rows
+CREATE INDEX IF NOT EXISTS idx_bookmarks_author_id_metadata_status
+    ON bookmarks (author_id, id)
+    INCLUDE (metadata_status, metadata_updated_at);
@@ -0,0 +1,16 @@
+-- Full-account export jobs (exports/handler.py, exports/worker.py)
+CREATE TABLE IF NOT EXISTS exports (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    author_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    format VARCHAR(16) NOT NULL,                     -- ndjson, html
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',    -- queued, running, ready, failed
+    s3_key TEXT,
+    size_bytes BIGINT,
+    item_count INTEGER,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    completed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_exports_author_created ON exports (author_id, created_at DESC);
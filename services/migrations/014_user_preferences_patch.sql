@@ -0,0 +1,34 @@
+-- Server-side preference patching for PATCH /api/users/:id
+--
+-- preferences are changed in a single UPDATE (no read-modify-write in the
+-- handler), and preferences_version is bumped with every change so clients
+-- can make a write conditional on the version they last read.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS preferences_version INTEGER NOT NULL DEFAULT 0;
+
+-- JSON Merge Patch (RFC 7396): objects merge recursively, null removes a
+-- key, any other value replaces the target
+CREATE OR REPLACE FUNCTION jsonb_merge_patch(target JSONB, patch JSONB)
+RETURNS JSONB AS $$
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+    IF target IS NULL OR jsonb_typeof(target) <> 'object' THEN
+        target := '{}'::jsonb;
+    END IF;
+
+    RETURN (
+        SELECT COALESCE(jsonb_object_agg(merged.key, merged.value), '{}'::jsonb)
+        FROM (
+            SELECT t.key, t.value
+            FROM jsonb_each(target) t
+            WHERE NOT patch ? t.key
+            UNION ALL
+            SELECT p.key, jsonb_merge_patch(target -> p.key, p.value)
+            FROM jsonb_each(patch) p
+            WHERE jsonb_typeof(p.value) <> 'null'
+        ) merged
+    );
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
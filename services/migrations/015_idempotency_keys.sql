@@ -0,0 +1,20 @@
+-- Idempotency-Key support for mutating endpoints (shared/utils/idempotency.py)
+--
+-- A key is claimed (status in_progress) before the handler runs and holds
+-- the response once it completes, so a retried request replays it instead
+-- of repeating the write. Rows expire after IDEMPOTENCY_TTL_HOURS and are
+-- removed by the daily purge job (sync/purge.py).
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_sub VARCHAR(255) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,                  -- sha256 of method, path and body
+    status VARCHAR(16) NOT NULL DEFAULT 'in_progress', -- in_progress, completed
+    response_status INTEGER,
+    response_body TEXT,
+    response_headers JSONB,
+    locked_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_sub, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
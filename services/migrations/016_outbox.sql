@@ -0,0 +1,17 @@
+-- Transactional outbox for queue messages (shared/db/outbox.py)
+--
+-- Handlers insert messages in the same transaction as the rows they refer
+-- to; outbox/dispatcher.py sends them to SQS in batches and deletes them.
+-- A message is never lost to a failed send: it stays here and is retried
+-- after available_at.
+CREATE TABLE IF NOT EXISTS outbox (
+    id BIGSERIAL PRIMARY KEY,
+    queue VARCHAR(32) NOT NULL,                 -- metadata
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    available_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_available_at ON outbox (available_at, id);
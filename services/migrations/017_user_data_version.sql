@@ -0,0 +1,94 @@
+-- Per-user data version for the result cache (shared/utils/cache.py)
+--
+-- users.data_version is bumped in the same transaction as any change to the
+-- user's bookmarks, tags, notes or tag associations, so cache entries keyed
+-- by the version are never served after the data they were built from
+-- changed. Statement-level triggers bump each affected user once per
+-- statement, however many rows it touched. Updates only count when they
+-- move a row's change_seq (migration 011), so bookkeeping writes such as
+-- metadata_requested_at leave cached results alone.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS data_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_user_data_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE users SET data_version = data_version + 1
+    WHERE id IN (SELECT author_id FROM changed_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_user_data_version_by_bookmark()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE users SET data_version = data_version + 1
+    WHERE id IN (
+        SELECT b.author_id FROM changed_rows c JOIN bookmarks b ON b.id = c.bookmark_id
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables cannot be combined with UPDATE OF <columns>, so the
+-- columns that matter are the ones whose change sets change_seq
+CREATE OR REPLACE FUNCTION bump_user_data_version_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE users SET data_version = data_version + 1
+    WHERE id IN (
+        SELECT n.author_id FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE n.change_seq IS DISTINCT FROM o.change_seq
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow one event per trigger
+DO $$
+DECLARE
+    tbl TEXT;
+    fn TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['bookmarks', 'tags', 'notes', 'bookmark_tags'] LOOP
+        fn := CASE WHEN tbl = 'bookmark_tags'
+            THEN 'bump_user_data_version_by_bookmark' ELSE 'bump_user_data_version' END;
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_data_version_insert', tbl);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+            tbl || '_data_version_insert', tbl, fn
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_data_version_update', tbl);
+        IF tbl = 'bookmark_tags' THEN
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS changed_rows '
+                'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+                tbl || '_data_version_update', tbl, fn
+            );
+        ELSE
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER UPDATE ON %I '
+                'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                'FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version_on_update()',
+                tbl || '_data_version_update', tbl
+            );
+        END IF;
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_data_version_delete', tbl);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS changed_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION %I()',
+            tbl || '_data_version_delete', tbl, fn
+        );
+    END LOOP;
+END;
+$$;
+
+-- A version bump is not a profile change
+DROP TRIGGER IF EXISTS update_users_updated_at ON users;
+CREATE TRIGGER update_users_updated_at
+    BEFORE UPDATE ON users
+    FOR EACH ROW
+    WHEN (OLD.data_version IS NOT DISTINCT FROM NEW.data_version)
+    EXECUTE FUNCTION update_updated_at_column();
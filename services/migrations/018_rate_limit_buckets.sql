@@ -0,0 +1,13 @@
+-- Token buckets for per-user rate limiting (shared/utils/ratelimit.py)
+--
+-- Only used with RATE_LIMIT_STORE=postgres, which shares the limits across
+-- Lambda containers. Each request refills and takes a token from its bucket
+-- in a single upsert; buckets idle for a day are removed by the daily purge
+-- job (sync/purge.py).
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    key VARCHAR(320) PRIMARY KEY,               -- <route class>:<user sub or ip:address>
+    tokens DOUBLE PRECISION NOT NULL,           -- tokens left as of updated_at
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_buckets_updated_at ON rate_limit_buckets (updated_at);
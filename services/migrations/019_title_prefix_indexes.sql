@@ -0,0 +1,12 @@
+-- Prefix indexes for GET /api/suggest (suggest/handler.py)
+--
+-- text_pattern_ops compares lower(title) byte-wise, so a btree range scan
+-- answers "lower(title) LIKE 'pre%'" within one author regardless of the
+-- database collation. Suggestions only ever match from the start of the
+-- title, which a btree serves with a smaller index and cheaper writes than
+-- a pg_trgm GIN index would.
+CREATE INDEX IF NOT EXISTS idx_tags_author_title_prefix
+    ON tags (author_id, lower(title) text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_bookmarks_author_title_prefix
+    ON bookmarks (author_id, lower(title) text_pattern_ops);
@@ -3,6 +3,7 @@ Notes Lambda Handler
 
 Endpoints:
     GET    /api/notes      - Search/list notes
+    GET    /api/notes/:id  - Get a single note with full content
     POST   /api/notes      - Create note
     PUT    /api/notes/:id  - Update note
     DELETE /api/notes/:id  - Delete note
@@ -16,10 +17,35 @@ from uuid import UUID
 # Add shared module to path for Lambda
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from shared.db import get_session, User, Note
+from sqlalchemy import func, select
+
+from shared.db import get_session, get_read_session, Note
+from shared.db.fields import (
+    NOTE_DEFAULT_KEYS, NOTE_FIELDS, NOTE_SUMMARY_KEYS, field_columns, parse_fields,
+    row_serializer
+)
+from shared.db.queries import get_note_for_author, get_user_by_cognito_sub
+from shared.db.models import NOTE_PREVIEW_CHARS, TEXT_SEARCH_CONFIG
 from shared.utils import validate_token, success, error, bad_request, unauthorized, not_found
 from shared.utils.auth import AuthError
+from shared.utils.cache import cache_key, get_cache
+from shared.utils.idempotency import idempotent
+from shared.utils.ratelimit import rate_limited
 from shared.utils.response import options_response
+from shared.utils.text import (
+    HIGHLIGHT_START, HIGHLIGHT_STOP, highlight_html, html_to_text, truncate_text
+)
+
+
+# ts_headline settings for search snippets. Matches are delimited with
+# sentinels, since content_text is unescaped text; highlight_html() escapes
+# it and turns them into <mark> tags.
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", '
+    "MaxFragments=2, MaxWords=20, MinWords=5"
+)
+# Upper bound on text fed to ts_headline so snippet cost is independent of note size
+HEADLINE_SOURCE_CHARS = 20000
 
 
 def handler(event, context):
@@ -49,7 +75,9 @@ def handler(event, context):
             return create(event, context)
 
     if note_id:
-        if http_method == "PUT":
+        if http_method == "GET":
+            return get(event, context, note_id)
+        elif http_method == "PUT":
             return update(event, context, note_id)
         elif http_method == "DELETE":
             return delete(event, context, note_id)
@@ -57,11 +85,14 @@ def handler(event, context):
     return error("Not found", status=404)
 
 
-def _get_user_by_cognito_sub(db, cognito_sub: str) -> User:
-    """Get user by Cognito sub, returns None if not found."""
-    return db.query(User).filter(User.cognito_sub == cognito_sub).first()
+def _set_content(note: Note, content: str) -> None:
+    """Set a note's HTML content and keep its derived plain-text columns in sync."""
+    note.content = content
+    note.content_text = html_to_text(content)
+    note.preview = truncate_text(note.content_text, NOTE_PREVIEW_CHARS)
 
 
+@rate_limited("search")
 def search(event, context):
     """
     GET /api/notes
@@ -69,6 +100,12 @@ def search(event, context):
     Query params:
         authorID - Filter by author (required for security)
         title    - Search title (partial match)
+        q        - Full-text search over title and content; results are
+                   ranked and include a "snippet" (escaped HTML, matches in
+                   <mark>)
+        view     - "full" (default) or "summary": id, title, timestamps and a
+                   plain-text "preview" instead of content
+        fields   - Comma-separated response keys to return (overrides view)
         offset   - Pagination offset (default: 0)
         limit    - Pagination limit (default: 15)
     """
@@ -82,37 +119,141 @@ def search(event, context):
     offset = int(params.get("offset", 0))
     limit = min(int(params.get("limit", 15)), 100)
     title_search = params.get("title", "")
+    text_search = params.get("q", "").strip()
+    view = params.get("view", "full")
+
+    if view not in ("full", "summary"):
+        return bad_request("view must be 'full' or 'summary'")
+
+    # Rows are serialized straight from the selected columns; summary view
+    # and sparse fieldsets select fewer of them
+    if params.get("fields"):
+        try:
+            fields = parse_fields(params["fields"], NOTE_FIELDS)
+        except ValueError as e:
+            return bad_request(str(e))
+    elif view == "summary":
+        fields = NOTE_SUMMARY_KEYS
+    else:
+        fields = NOTE_DEFAULT_KEYS
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_read_session(token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            query = db.query(Note).filter(Note.author_id == user.id)
+            # Keyed by the user's data version, so any write invalidates it
+            key = cache_key(user.id, "notes.search", params, user.data_version)
+            data = get_cache().get(key)
+            if data is None:
+                data = _search(db, user.id, fields, title_search, text_search, offset, limit)
+                get_cache().set(key, data)
+
+            return success(data)
 
-            if title_search:
-                query = query.filter(Note.title.ilike(f"%{title_search}%"))
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
 
-            total_count = query.count()
 
-            notes = (
-                query
-                .order_by(Note.created_at.desc())
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
+def _search(db, author_id, fields, title_search: str, text_search: str, offset: int,
+            limit: int) -> dict:
+    """One page of an author's notes matching the search, with the total count."""
+    serialize = row_serializer(fields, NOTE_FIELDS)
+
+    filters = [Note.author_id == author_id]
+
+    if title_search:
+        filters.append(Note.title.ilike(f"%{title_search}%"))
+
+    if text_search:
+        ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, text_search)
+        filters.append(Note.search_vector.op("@@")(ts_query))
+
+    total_count = db.execute(
+        select(func.count()).select_from(Note).where(*filters)
+    ).scalar()
+
+    if text_search:
+        rank = func.ts_rank_cd(Note.search_vector, ts_query)
+        # Rank and paginate on the GIN-matched rows first, then build
+        # snippets for the page only
+        page = (
+            select(Note.id)
+            .where(*filters)
+            .order_by(rank.desc(), Note.created_at.desc())
+            .offset(offset)
+            .limit(limit)
+            .subquery()
+        )
+        snippet = func.ts_headline(
+            TEXT_SEARCH_CONFIG,
+            func.left(Note.content_text, HEADLINE_SOURCE_CHARS),
+            ts_query,
+            HEADLINE_OPTIONS,
+        ).label("snippet")
+        order = (rank.desc(), Note.created_at.desc())
+
+        rows = db.execute(
+            select(*field_columns(fields, NOTE_FIELDS), snippet)
+            .join(page, page.c.id == Note.id)
+            .order_by(*order)
+        )
+        notes = [{**serialize(row), "snippet": highlight_html(row.snippet)} for row in rows]
+
+        return {"notes": notes, "count": total_count}
+
+    rows = db.execute(
+        select(*field_columns(fields, NOTE_FIELDS))
+        .where(*filters)
+        .order_by(Note.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+
+    return {
+        "notes": [serialize(row) for row in rows],
+        "count": total_count,
+    }
+
+
+@rate_limited("read")
+def get(event, context, note_id: str):
+    """
+    GET /api/notes/:id
+
+    Response:
+        { "note": {...} }  // Including full content
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
 
-            return success({
-                "notes": [n.to_dict() for n in notes],
-                "count": total_count,
-            })
+    try:
+        note_uuid = UUID(note_id)
+    except ValueError:
+        return bad_request("Invalid note ID")
+
+    try:
+        with get_read_session(token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            note = get_note_for_author(db, note_uuid, user.id)
+
+            if not note:
+                return not_found("Note not found")
+
+            return success({"note": note.to_dict()})
 
     except Exception as e:
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def create(event, context):
     """
     POST /api/notes
@@ -137,16 +278,13 @@ def create(event, context):
     content = body.get("content", "")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            note = Note(
-                author_id=user.id,
-                title=title,
-                content=content,
-            )
+            note = Note(author_id=user.id, title=title)
+            _set_content(note, content)
             db.add(note)
             db.flush()
 
@@ -156,6 +294,8 @@ def create(event, context):
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def update(event, context, note_id: str):
     """
     PUT /api/notes/:id
@@ -182,15 +322,12 @@ def update(event, context, note_id: str):
         return bad_request("Invalid note ID")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            note = db.query(Note).filter(
-                Note.id == note_uuid,
-                Note.author_id == user.id
-            ).first()
+            note = get_note_for_author(db, note_uuid, user.id)
 
             if not note:
                 return not_found("Note not found")
@@ -198,7 +335,7 @@ def update(event, context, note_id: str):
             if "title" in body:
                 note.title = body["title"].strip()
             if "content" in body:
-                note.content = body["content"]
+                _set_content(note, body["content"])
 
             return success({"note": note.to_dict()})
 
@@ -206,6 +343,8 @@ def update(event, context, note_id: str):
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def delete(event, context, note_id: str):
     """
     DELETE /api/notes/:id
@@ -221,15 +360,12 @@ def delete(event, context, note_id: str):
         return bad_request("Invalid note ID")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            note = db.query(Note).filter(
-                Note.id == note_uuid,
-                Note.author_id == user.id
-            ).first()
+            note = get_note_for_author(db, note_uuid, user.id)
 
             if not note:
                 return not_found("Note not found")
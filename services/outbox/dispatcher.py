@@ -0,0 +1,155 @@
+"""
+Outbox Dispatcher
+
+Delivers messages written by shared/db/outbox.py to their SQS queues with
+send_message_batch (10 per call) and deletes them once sent. It is invoked
+asynchronously after a transaction that wrote messages commits (see
+OUTBOX_DISPATCHER_FUNCTION), and on a schedule (EventBridge, every minute)
+as a backstop for missed nudges and retries. Each invocation drains the due
+messages and exits.
+
+Rows are claimed in a short transaction (FOR UPDATE SKIP LOCKED) that moves
+their available_at OUTBOX_CLAIM_SECONDS ahead, then sent with no
+transaction or lock open, then deleted (or rescheduled with exponential
+backoff) in a second short transaction. Overlapping invocations therefore
+never send the same message, and a run that dies mid-batch leaves its
+messages to be sent again once the claim lapses: delivery is at least once.
+Failed sends are retried, never dropped.
+"""
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+import boto3
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete, func, select, update
+
+from shared.db import get_session, OutboxMessage
+
+
+# Outbox queue name -> SQS queue URL
+QUEUE_URLS = {
+    "metadata": os.environ.get("METADATA_QUEUE_URL"),
+}
+_sqs_client = boto3.client("sqs") if any(QUEUE_URLS.values()) else None
+
+SQS_BATCH_SIZE = 10  # send_message_batch limit
+# Messages claimed per transaction
+CLAIM_SIZE = 100
+# How long claimed messages stay hidden from other runs
+CLAIM_TTL = timedelta(seconds=float(os.environ.get("OUTBOX_CLAIM_SECONDS", "60")))
+MAX_BACKOFF = timedelta(minutes=15)
+
+
+def handler(event, context):
+    if _sqs_client is None:
+        return {"error": "No outbox queue is configured"}
+
+    deadline = None
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        # Leave time to finish the batch in hand before the Lambda times out
+        remaining = context.get_remaining_time_in_millis() / 1000
+        deadline = time.monotonic() + remaining - 10
+
+    sent = failed = 0
+    while True:
+        batch_sent, batch_failed, claimed = dispatch_once()
+        sent += batch_sent
+        failed += batch_failed
+        if claimed < CLAIM_SIZE or (deadline is not None and time.monotonic() >= deadline):
+            break
+
+    return {"sent": sent, "failed": failed}
+
+
+def dispatch_once() -> tuple[int, int, int]:
+    """Claim up to CLAIM_SIZE due messages and send them; returns (sent, failed, claimed)."""
+    messages = claim_messages()
+    if not messages:
+        return 0, 0, 0
+
+    delivered = []
+    failures = {}
+    for queue, batch in _batches(messages):
+        queue_url = QUEUE_URLS.get(queue)
+        if not queue_url:
+            failures.update({m.id: f"Unknown or unconfigured queue {queue!r}" for m in batch})
+            continue
+        try:
+            response = _sqs_client.send_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {"Id": str(m.id), "MessageBody": json.dumps(m.payload)} for m in batch
+                ],
+            )
+        except Exception as e:
+            failures.update({m.id: str(e) for m in batch})
+            continue
+        delivered.extend(int(entry["Id"]) for entry in response.get("Successful", []))
+        failures.update({
+            int(entry["Id"]): entry.get("Message") or entry.get("Code", "Send failed")
+            for entry in response.get("Failed", [])
+        })
+
+    attempts = {m.id: m.attempts for m in messages}
+    with get_session() as db:
+        if delivered:
+            db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(delivered)))
+        for message_id, reason in failures.items():
+            db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == message_id)
+                .values(
+                    attempts=OutboxMessage.attempts + 1,
+                    last_error=reason[:1000],
+                    available_at=func.now() + _backoff(attempts[message_id] + 1),
+                )
+            )
+
+    return len(delivered), len(failures), len(messages)
+
+
+def claim_messages() -> list:
+    """
+    Claim up to CLAIM_SIZE due messages, oldest first, by hiding them for
+    CLAIM_TTL; the claim commits before anything is sent.
+    """
+    due = (
+        select(OutboxMessage.id)
+        .where(OutboxMessage.available_at <= func.now())
+        .order_by(OutboxMessage.available_at, OutboxMessage.id)
+        .limit(CLAIM_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    with get_session() as db:
+        messages = db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(due))
+            .values(available_at=func.now() + CLAIM_TTL)
+            .returning(
+                OutboxMessage.id, OutboxMessage.queue, OutboxMessage.payload,
+                OutboxMessage.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+    # RETURNING order is unspecified; ids follow insertion order
+    return sorted(messages, key=lambda m: m.id)
+
+
+def _batches(messages):
+    """(queue, up to SQS_BATCH_SIZE messages) groups, in claim order."""
+    by_queue = {}
+    for message in messages:
+        by_queue.setdefault(message.queue, []).append(message)
+    for queue, queued in by_queue.items():
+        for start in range(0, len(queued), SQS_BATCH_SIZE):
+            yield queue, queued[start:start + SQS_BATCH_SIZE]
+
+
+def _backoff(attempts: int) -> timedelta:
+    return min(timedelta(seconds=2 ** min(attempts, 10)), MAX_BACKOFF)
@@ -0,0 +1,78 @@
+"""
+Backfill bookmarks.url_hash for rows created before migration 008.
+
+Rows are processed oldest first, so when a user has legacy duplicates the
+oldest bookmark gets the hash and the later copies keep a NULL hash (the
+unique index on (author_id, url_hash) ignores NULLs).
+
+Usage:
+    DATABASE_URL=... python scripts/backfill_url_hashes.py [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import bindparam, select, tuple_, update  # noqa: E402
+
+from shared.db import get_session, Bookmark  # noqa: E402
+from shared.utils.urls import url_hash  # noqa: E402
+
+
+def backfill(batch_size: int) -> tuple[int, int]:
+    """Returns (hashed, skipped_as_duplicate)."""
+    hashed = skipped = 0
+    last_key = None
+
+    while True:
+        with get_session() as db:
+            query = (
+                select(Bookmark.id, Bookmark.author_id, Bookmark.url, Bookmark.created_at)
+                .where(Bookmark.url_hash.is_(None))
+                .order_by(Bookmark.created_at, Bookmark.id)
+                .limit(batch_size)
+            )
+            if last_key is not None:
+                query = query.where(
+                    tuple_(Bookmark.created_at, Bookmark.id) > tuple_(*last_key)
+                )
+            rows = db.execute(query).all()
+            if not rows:
+                return hashed, skipped
+            last_key = (rows[-1].created_at, rows[-1].id)
+
+            candidates = {row.id: (row.author_id, url_hash(row.url)) for row in rows}
+            taken = set(db.execute(
+                select(Bookmark.author_id, Bookmark.url_hash).where(
+                    tuple_(Bookmark.author_id, Bookmark.url_hash).in_(set(candidates.values()))
+                )
+            ).all())
+
+            updates = []
+            for bookmark_id, key in candidates.items():
+                if key in taken:
+                    skipped += 1
+                    continue
+                taken.add(key)
+                updates.append({"b_id": bookmark_id, "b_hash": key[1]})
+
+            if updates:
+                db.connection().execute(
+                    update(Bookmark.__table__)
+                    .where(Bookmark.__table__.c.id == bindparam("b_id"))
+                    .values(url_hash=bindparam("b_hash")),
+                    updates,
+                )
+                hashed += len(updates)
+
+        print(f"hashed={hashed} skipped={skipped}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    total_hashed, total_skipped = backfill(args.batch_size)
+    print(f"Done: hashed={total_hashed} skipped={total_skipped}")
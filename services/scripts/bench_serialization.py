@@ -0,0 +1,111 @@
+"""
+Benchmark of list-page serialization: ORM instances + to_dict() versus
+Core rows + fields.row_serializer().
+
+Runs against an in-memory SQLite copy of the bookmarks table, so database
+time is small and the difference is the Python-side cost of loading ORM
+instances into the session and serializing them.
+
+Usage:
+    python scripts/bench_serialization.py [--rows 2000] [--page-size 100] [--iterations 200]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from shared.db import Bookmark  # noqa: E402
+from shared.db.fields import (  # noqa: E402
+    BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS, field_columns, row_serializer
+)
+from shared.db.models import Base  # noqa: E402
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(type_, compiler, **kw):
+    return "JSON"
+
+
+def _seed(engine, rows: int) -> uuid.UUID:
+    # SQLite does not enforce the users foreign key, so no users table
+    Base.metadata.create_all(engine, tables=[Bookmark.__table__])
+    author_id = uuid.uuid4()
+    with Session(engine) as db:
+        now = datetime.now(timezone.utc)
+        db.add_all(
+            Bookmark(
+                author_id=author_id,
+                title=f"Bookmark {i}",
+                description="A bookmark used for benchmarking" if i % 2 else None,
+                url=f"https://example.com/{i}",
+                metadata_json={"title": f"Page {i}", "image": f"https://example.com/{i}.png"},
+                metadata_updated_at=now,
+                created_at=now,
+            )
+            for i in range(rows)
+        )
+        db.commit()
+    return author_id
+
+
+def orm_page(db, author_id, offset: int, limit: int) -> list[dict]:
+    bookmarks = db.execute(
+        select(Bookmark)
+        .where(Bookmark.author_id == author_id)
+        .order_by(Bookmark.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    ).scalars().all()
+    return [b.to_dict() for b in bookmarks]
+
+
+def core_page(db, author_id, offset: int, limit: int) -> list[dict]:
+    rows = db.execute(
+        select(*field_columns(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS))
+        .where(Bookmark.author_id == author_id)
+        .order_by(Bookmark.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    serialize = row_serializer(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS)
+    return [serialize(row) for row in rows]
+
+
+def _time(engine, page, author_id, rows: int, page_size: int, iterations: int) -> float:
+    """Mean milliseconds per page, one session per page as in a request."""
+    pages = max(rows // page_size, 1)
+    start = time.perf_counter()
+    for i in range(iterations):
+        with Session(engine) as db:
+            page(db, author_id, (i % pages) * page_size, page_size)
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    author_id = _seed(engine, args.rows)
+
+    with Session(engine) as db:
+        assert orm_page(db, author_id, 0, args.page_size) == core_page(
+            db, author_id, 0, args.page_size
+        ), "Core serialization must match to_dict()"
+
+    orm_ms = _time(engine, orm_page, author_id, args.rows, args.page_size, args.iterations)
+    core_ms = _time(engine, core_page, author_id, args.rows, args.page_size, args.iterations)
+    print(f"{args.page_size}-bookmark page: ORM + to_dict() {orm_ms:.2f}ms, "
+          f"Core rows {core_ms:.2f}ms ({orm_ms / core_ms:.1f}x)")
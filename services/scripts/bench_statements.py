@@ -0,0 +1,107 @@
+"""
+Micro-benchmark of per-request statement overhead: rebuilding ORM Query
+objects versus the prebuilt statements in shared.db.queries.
+
+Each iteration builds the statement the way a request does and runs it
+through the same compiled-statement cache lookup the engine uses, so the
+numbers show construction + cache-key + compile cost without a database.
+
+Usage:
+    python scripts/bench_statements.py [--iterations 20000]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.orm import Query  # noqa: E402
+
+from shared.db import User, Bookmark, Tag, BookmarkTag  # noqa: E402
+from shared.db.queries import (  # noqa: E402
+    BOOKMARK_FOR_AUTHOR, TAG_FOR_AUTHOR, USER_BY_COGNITO_SUB,
+    bookmark_search_count, bookmark_search_page, parse_bookmark_search,
+)
+
+DIALECT = postgresql.psycopg2.dialect()
+
+
+def _compile(stmt, cache: dict) -> None:
+    """What Connection.execute() does before talking to the driver."""
+    stmt._compile_w_cache(
+        DIALECT, compiled_cache=cache, column_keys=[], for_executemany=False,
+        schema_translate_map=None,
+    )
+
+
+def _legacy_search(author_id, tag_ids, title):
+    query = Query(Bookmark).filter(
+        Bookmark.author_id == author_id,
+        Bookmark.id.in_(select(BookmarkTag.bookmark_id).where(BookmarkTag.tag_id.in_(tag_ids))),
+        Bookmark.title.ilike(f"%{title}%"),
+    )
+    count = select(func.count()).select_from(query.subquery())
+    page = query.order_by(Bookmark.created_at.desc()).offset(0).limit(15)
+    return [count, page._statement_20()]
+
+
+def _cached_search(author_id, tag_ids, title):
+    search = parse_bookmark_search({"tags": ",".join(map(str, tag_ids)), "title": title})
+    return [
+        bookmark_search_count(author_id, search)[0],
+        bookmark_search_page(author_id, search, 0, 15)[0],
+    ]
+
+
+CASES = {
+    "user by cognito_sub": (
+        lambda sub, id, author: [Query(User).filter(User.cognito_sub == sub).limit(1)._statement_20()],
+        lambda sub, id, author: [USER_BY_COGNITO_SUB],
+    ),
+    "bookmark by id+author": (
+        lambda sub, id, author: [Query(Bookmark).filter(
+            Bookmark.id == id, Bookmark.author_id == author
+        ).limit(1)._statement_20()],
+        lambda sub, id, author: [BOOKMARK_FOR_AUTHOR],
+    ),
+    "tag by id+author": (
+        lambda sub, id, author: [Query(Tag).filter(
+            Tag.id == id, Tag.author_id == author
+        ).limit(1)._statement_20()],
+        lambda sub, id, author: [TAG_FOR_AUTHOR],
+    ),
+    "bookmark search": (
+        lambda sub, id, author: _legacy_search(author, [id], sub[:4]),
+        lambda sub, id, author: _cached_search(author, [id], sub[:4]),
+    ),
+}
+
+
+def _time(build, iterations: int) -> float:
+    """Mean microseconds per request."""
+    cache = {}
+    args = [(uuid.uuid4().hex, uuid.uuid4(), uuid.uuid4()) for _ in range(iterations)]
+    for stmt in build(*args[0]):
+        _compile(stmt, cache)  # Warm the cache, as a long-lived container would
+
+    start = time.perf_counter()
+    for sub, id, author in args:
+        for stmt in build(sub, id, author):
+            _compile(stmt, cache)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'query':<24}{'ORM Query':>12}{'cached':>12}{'speedup':>10}")
+    for name, (legacy, cached) in CASES.items():
+        legacy_us = _time(legacy, args.iterations)
+        cached_us = _time(cached, args.iterations)
+        print(f"{name:<24}{legacy_us:>10.1f}us{cached_us:>10.1f}us{legacy_us / cached_us:>9.1f}x")
@@ -0,0 +1,202 @@
+"""
+Replay bookmark metadata messages from the dead-letter queue.
+
+Drains the DLQ in batches of 10 and re-sends matching messages to the
+metadata queue at a bounded rate, deleting each from the DLQ once it has
+been re-sent. Messages are deduplicated by bookmark ID, and messages for
+deleted bookmarks are dropped. Replayed bookmarks go back to "pending".
+
+Filters:
+    --host          only URLs on this host or its subdomains
+    --error         only bookmarks whose recorded metadata_error matches
+                    this regex (e.g. "timed out|HTTP Error 5")
+
+Non-matching messages stay in the DLQ. They are hidden while the run
+lasts (up to --visibility seconds), so they are not received twice, and made
+visible again at the end. With --dry-run nothing is sent, changed or deleted.
+
+A replayed bookmark whose send fails is left "pending" and is picked up by
+the metadata refresh job.
+
+Usage:
+    DATABASE_URL=... METADATA_QUEUE_URL=... METADATA_DLQ_URL=... \\
+        python scripts/replay_metadata_dlq.py [--dry-run] [--host example.com]
+        [--error REGEX] [--rate 10] [--max-messages 1000]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+from uuid import UUID
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select, update  # noqa: E402
+
+from shared.db import get_session, Bookmark  # noqa: E402
+
+
+SQS_BATCH_SIZE = 10  # receive/send/delete batch limit
+
+
+def _host_matches(url: str, host: str) -> bool:
+    hostname = (urlsplit(url).hostname or "").lower()
+    return hostname == host or hostname.endswith(f".{host}")
+
+
+def _parse(message: dict) -> tuple[UUID, str] | None:
+    try:
+        body = json.loads(message["Body"])
+        return UUID(body["bookmarkId"]), body["url"]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _bookmark_states(bookmark_ids) -> dict:
+    """bookmark ID -> (metadata_status, metadata_error) for existing bookmarks."""
+    with get_session() as db:
+        rows = db.execute(
+            select(Bookmark.id, Bookmark.metadata_status, Bookmark.metadata_error)
+            .where(Bookmark.id.in_(bookmark_ids))
+        )
+        return {row.id: (row.metadata_status, row.metadata_error or "") for row in rows}
+
+
+def _mark_pending(bookmark_ids) -> None:
+    with get_session() as db:
+        db.execute(
+            update(Bookmark)
+            .where(Bookmark.id.in_(bookmark_ids), Bookmark.metadata_status == "failed")
+            .values(metadata_status="pending", metadata_error=None)
+        )
+        db.execute(
+            update(Bookmark)
+            .where(Bookmark.id.in_(bookmark_ids))
+            .values(metadata_requested_at=func.now())
+        )
+
+
+def replay(sqs, dlq_url: str, queue_url: str, args) -> dict:
+    stats = {"received": 0, "replayed": 0, "duplicates": 0, "missing": 0, "skipped": 0, "invalid": 0}
+    error_pattern = re.compile(args.error) if args.error else None
+    host = args.host.lower() if args.host else None
+    seen: set[UUID] = set()
+    held = []  # Received but left in the DLQ; released when the run ends
+    interval = SQS_BATCH_SIZE / args.rate
+
+    while stats["received"] < args.max_messages:
+        batch_started = time.monotonic()
+        messages = sqs.receive_message(
+            QueueUrl=dlq_url,
+            MaxNumberOfMessages=SQS_BATCH_SIZE,
+            VisibilityTimeout=args.visibility,
+            WaitTimeSeconds=1,
+        ).get("Messages", [])
+        if not messages:
+            break
+        stats["received"] += len(messages)
+
+        parsed = {m["MessageId"]: _parse(m) for m in messages}
+        states = _bookmark_states({p[0] for p in parsed.values() if p})
+
+        to_send, to_delete = [], []
+        for message in messages:
+            entry = {"Id": message["MessageId"], "ReceiptHandle": message["ReceiptHandle"]}
+            item = parsed[message["MessageId"]]
+            if item is None:
+                stats["invalid"] += 1
+                held.append(entry)
+                continue
+            bookmark_id, url = item
+            if host and not _host_matches(url, host):
+                stats["skipped"] += 1
+                held.append(entry)
+                continue
+            if bookmark_id not in states:
+                stats["missing"] += 1
+                to_delete.append(entry)
+                continue
+            status, last_error = states[bookmark_id]
+            if error_pattern and not error_pattern.search(last_error):
+                stats["skipped"] += 1
+                held.append(entry)
+                continue
+            if bookmark_id in seen:
+                stats["duplicates"] += 1
+                to_delete.append(entry)
+                continue
+            seen.add(bookmark_id)
+            to_send.append((entry, bookmark_id, url, status))
+
+        if args.dry_run:
+            stats["replayed"] += len(to_send)
+            for _, bookmark_id, url, status in to_send:
+                print(f"would replay {bookmark_id} {url} ({status})")
+            held += to_delete + [entry for entry, *_ in to_send]
+            continue
+
+        if to_send:
+            _mark_pending([bookmark_id for _, bookmark_id, _, _ in to_send])
+            response = sqs.send_message_batch(
+                QueueUrl=queue_url,
+                Entries=[
+                    {
+                        "Id": entry["Id"],
+                        "MessageBody": json.dumps({
+                            "bookmarkId": str(bookmark_id),
+                            "url": url,
+                            # A failed refresh left the bookmark "ready"
+                            "refresh": status == "ready",
+                        }),
+                    }
+                    for entry, bookmark_id, url, status in to_send
+                ],
+            )
+            sent_ids = {result["Id"] for result in response.get("Successful", [])}
+            stats["replayed"] += len(sent_ids)
+            to_delete += [entry for entry, *_ in to_send if entry["Id"] in sent_ids]
+            held += [entry for entry, *_ in to_send if entry["Id"] not in sent_ids]
+
+        if to_delete:
+            sqs.delete_message_batch(QueueUrl=dlq_url, Entries=to_delete)
+
+        # Pace to args.rate messages per second
+        elapsed = time.monotonic() - batch_started
+        if elapsed < interval:
+            time.sleep(interval - elapsed)
+
+    for start in range(0, len(held), SQS_BATCH_SIZE):
+        sqs.change_message_visibility_batch(
+            QueueUrl=dlq_url,
+            Entries=[
+                {**entry, "VisibilityTimeout": 0} for entry in held[start:start + SQS_BATCH_SIZE]
+            ],
+        )
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dlq-url", default=os.environ.get("METADATA_DLQ_URL"))
+    parser.add_argument("--queue-url", default=os.environ.get("METADATA_QUEUE_URL"))
+    parser.add_argument("--host", help="Only replay URLs on this host (and subdomains)")
+    parser.add_argument("--error", help="Only replay bookmarks whose metadata_error matches this regex")
+    parser.add_argument("--rate", type=float, default=10, help="Messages per second")
+    parser.add_argument("--max-messages", type=int, default=1000)
+    parser.add_argument("--visibility", type=int, default=900,
+                        help="Seconds received messages stay hidden in the DLQ")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would be replayed without sending or deleting")
+    args = parser.parse_args()
+
+    if not args.dlq_url or not args.queue_url:
+        parser.error("--dlq-url and --queue-url (or METADATA_DLQ_URL / METADATA_QUEUE_URL) are required")
+
+    stats = replay(boto3.client("sqs"), args.dlq_url, args.queue_url, args)
+    print("Done: " + " ".join(f"{key}={value}" for key, value in stats.items()))
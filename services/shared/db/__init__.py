@@ -1,4 +1,29 @@
-from .connection import get_session, get_engine
-from .models import User, Bookmark, Tag, BookmarkTag, Note
+from .connection import (
+    get_session, get_read_session, get_engine, is_replica_session, pool_usage,
+)
+from .models import (
+    User, Bookmark, Tag, BookmarkTag, Note, MetadataHostHealth, MetadataHostLease,
+    SyncTombstone, SyncWatermark, Export, IdempotencyKey,
+    OutboxMessage, RateLimitBucket,
+)
 
-__all__ = ["get_session", "get_engine", "User", "Bookmark", "Tag", "BookmarkTag", "Note"]
+__all__ = [
+    "get_session",
+    "get_read_session",
+    "get_engine",
+    "is_replica_session",
+    "pool_usage",
+    "User",
+    "Bookmark",
+    "Tag",
+    "BookmarkTag",
+    "Note",
+    "MetadataHostHealth",
+    "MetadataHostLease",
+    "SyncTombstone",
+    "SyncWatermark",
+    "Export",
+    "IdempotencyKey",
+    "OutboxMessage",
+    "RateLimitBucket",
+]
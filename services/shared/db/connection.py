@@ -1,10 +1,47 @@
 import os
+import time
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 
+# Reads are served from the primary while the replica is further behind than this
+READ_REPLICA_MAX_LAG_SECONDS = float(os.environ.get("READ_REPLICA_MAX_LAG_SECONDS", "2"))
+# After a write, the writer's reads stay on the primary for this long
+READ_STICKY_SECONDS = float(os.environ.get("READ_STICKY_SECONDS", "10"))
+# How long a replica health (lag) check result is reused
+REPLICA_CHECK_INTERVAL_SECONDS = 5
+# Connections per engine: POOL_SIZE kept open plus MAX_OVERFLOW on demand
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+
 _engine = None
 _SessionLocal = None
+_read_engine = None
+_ReadSessionLocal = None
+
+# sticky key -> monotonic time until which reads go to the primary
+_sticky_until: dict[str, float] = {}
+# (checked_at, usable) for the read replica
+_replica_state: tuple[float, bool] = (0.0, False)
+
+# Lag is zero when everything received has been replayed, even if the
+# primary has been idle (pg_last_xact_replay_timestamp() then looks old)
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def _create_engine(database_url: str, **kwargs):
+    return create_engine(
+        database_url,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=30,
+        pool_recycle=1800,  # Recycle connections after 30 minutes
+        pool_pre_ping=True,  # Verify connections before using
+        **kwargs,
+    )
 
 
 def get_engine():
@@ -15,15 +52,39 @@ def get_engine():
         if not database_url:
             raise ValueError("DATABASE_URL environment variable is required")
 
-        _engine = create_engine(
+        _engine = _create_engine(database_url)
+    return _engine
+
+
+def pool_usage() -> float:
+    """
+    Fraction of the primary pool's connections checked out (0.0-1.0), or
+    0.0 before the engine exists. At 1.0 further sessions wait up to
+    pool_timeout for a connection.
+    """
+    if _engine is None:
+        return 0.0
+    return _engine.pool.checkedout() / (POOL_SIZE + MAX_OVERFLOW)
+
+
+def get_read_engine():
+    """
+    Get or create the read replica engine.
+
+    Returns None when DATABASE_READ_URL is not configured.
+    """
+    global _read_engine
+    if _read_engine is None:
+        database_url = os.environ.get("DATABASE_READ_URL")
+        if not database_url:
+            return None
+
+        _read_engine = _create_engine(
             database_url,
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=30,
-            pool_recycle=1800,  # Recycle connections after 30 minutes
-            pool_pre_ping=True,  # Verify connections before using
+            pool_timeout=5,  # Fail over to the primary quickly
+            execution_options={"postgresql_readonly": True},
         )
-    return _engine
+    return _read_engine
 
 
 def get_session_factory():
@@ -38,11 +99,71 @@ def get_session_factory():
     return _SessionLocal
 
 
+def get_read_session_factory():
+    """Get or create the read replica session factory (None without a replica)."""
+    global _ReadSessionLocal
+    if _ReadSessionLocal is None:
+        read_engine = get_read_engine()
+        if read_engine is None:
+            return None
+        _ReadSessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=read_engine,
+            info={"replica": True},
+        )
+    return _ReadSessionLocal
+
+
+def mark_sticky(sticky_key: str) -> None:
+    """Route sticky_key's reads to the primary for READ_STICKY_SECONDS."""
+    now = time.monotonic()
+    _sticky_until[sticky_key] = now + READ_STICKY_SECONDS
+
+    # Keep the map small in long-lived containers
+    if len(_sticky_until) > 1000:
+        for key, until in list(_sticky_until.items()):
+            if until <= now:
+                del _sticky_until[key]
+
+
+def _is_sticky(sticky_key: str | None) -> bool:
+    return sticky_key is not None and _sticky_until.get(sticky_key, 0.0) > time.monotonic()
+
+
+def _replica_usable() -> bool:
+    """Whether the replica is reachable and within READ_REPLICA_MAX_LAG_SECONDS."""
+    global _replica_state
+    checked_at, usable = _replica_state
+    now = time.monotonic()
+    if now - checked_at < REPLICA_CHECK_INTERVAL_SECONDS:
+        return usable
+
+    try:
+        with get_read_engine().connect() as conn:
+            lag = conn.execute(_REPLICA_LAG_SQL).scalar() or 0
+        usable = float(lag) <= READ_REPLICA_MAX_LAG_SECONDS
+    except Exception:
+        usable = False  # Down or unreachable; use the primary
+
+    _replica_state = (now, usable)
+    return usable
+
+
+def is_replica_session(session: Session) -> bool:
+    """Whether session reads from the read replica."""
+    return session.info.get("replica", False)
+
+
 @contextmanager
-def get_session() -> Session:
+def get_session(sticky_key: str | None = None) -> Session:
     """
     Context manager for database sessions.
 
+    Pass sticky_key (e.g. the user's Cognito sub) on writes so that the
+    same user's reads through get_read_session() keep hitting the primary
+    until the replica has caught up.
+
     Usage:
         with get_session() as db:
             user = db.query(User).first()
@@ -52,8 +173,38 @@ def get_session() -> Session:
     try:
         yield session
         session.commit()
+        if sticky_key is not None:
+            mark_sticky(sticky_key)
     except Exception:
         session.rollback()
         raise
     finally:
         session.close()
+
+
+@contextmanager
+def get_read_session(sticky_key: str | None = None) -> Session:
+    """
+    Context manager for read-only sessions (GET handlers).
+
+    Uses the DATABASE_READ_URL replica when configured, healthy and not
+    lagging, unless sticky_key wrote recently. Otherwise uses the primary.
+    Nothing is committed.
+
+    Stickiness is tracked per container, so a user's next read may land on
+    another Lambda instance; READ_REPLICA_MAX_LAG_SECONDS bounds how stale
+    that read can be.
+
+    Usage:
+        with get_read_session(token_user["sub"]) as db:
+            bookmarks = db.query(Bookmark).all()
+    """
+    ReadSessionLocal = get_read_session_factory()
+    if ReadSessionLocal is None or _is_sticky(sticky_key) or not _replica_usable():
+        ReadSessionLocal = get_session_factory()
+
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
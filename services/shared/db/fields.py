@@ -0,0 +1,168 @@
+"""
+Column-level read path and sparse fieldsets (?fields=) for list endpoints.
+
+Each registry maps a response key to the column it is read from and an
+optional formatter, so a request for a subset of keys selects only those
+columns and serializes only those keys. Sub-keys of JSONB columns can be
+requested with dotted names, e.g. "metadata.image".
+
+List endpoints read through here even without ?fields= (using the default
+keys, which match to_dict()), so pages are built from plain rows without
+loading ORM instances into the session.
+"""
+import re
+from typing import Any, Callable, NamedTuple
+
+from .models import Bookmark, Note, Tag
+
+
+class Field(NamedTuple):
+    column: Any
+    format: Callable[[Any], Any] | None = None
+
+
+def _str(value):
+    return str(value) if value is not None else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _or_empty(value):
+    return value or ""
+
+
+def _or_empty_dict(value):
+    return value or {}
+
+
+# Keys and formatting match Bookmark.to_dict()
+BOOKMARK_FIELDS = {
+    "id": Field(Bookmark.id, _str),
+    "authorID": Field(Bookmark.author_id, _str),
+    "title": Field(Bookmark.title),
+    "description": Field(Bookmark.description, _or_empty),
+    "url": Field(Bookmark.url),
+    "videoURL": Field(Bookmark.video_url),
+    "screenshotURL": Field(Bookmark.screenshot_url),
+    "metadata": Field(Bookmark.metadata_json, _or_empty_dict),
+    "metadataStatus": Field(Bookmark.metadata_status),
+    "metadataError": Field(Bookmark.metadata_error),
+    "metadataUpdatedAt": Field(Bookmark.metadata_updated_at, _iso),
+    "createdAt": Field(Bookmark.created_at, _iso),
+}
+# Response key -> JSONB column whose sub-keys may be requested as "key.subkey"
+BOOKMARK_JSON_FIELDS = {"metadata": Bookmark.metadata_json}
+# Bookmark.to_dict() without tags
+BOOKMARK_DEFAULT_KEYS = tuple(BOOKMARK_FIELDS)
+
+# Keys and formatting match Note.to_dict(), plus the list-view preview
+NOTE_FIELDS = {
+    "id": Field(Note.id, _str),
+    "authorID": Field(Note.author_id, _str),
+    "title": Field(Note.title),
+    "content": Field(Note.content, _or_empty),
+    "preview": Field(Note.preview, _or_empty),
+    "createdAt": Field(Note.created_at, _iso),
+    "updatedAt": Field(Note.updated_at, _iso),
+}
+# Note.to_dict()
+NOTE_DEFAULT_KEYS = ("id", "authorID", "title", "content", "createdAt", "updatedAt")
+# view=summary: no content column is read or detoasted
+NOTE_SUMMARY_KEYS = ("id", "title", "preview", "createdAt", "updatedAt")
+
+# Keys and formatting match Tag.to_dict() without bookmark_ids
+TAG_FIELDS = {
+    "ID": Field(Tag.id, _str),
+    "title": Field(Tag.title),
+    "authorID": Field(Tag.author_id, _str),
+}
+TAG_DEFAULT_KEYS = tuple(TAG_FIELDS)
+
+_SUBKEY = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def parse_fields(raw: str, registry: dict, json_fields: dict | None = None) -> tuple[str, ...]:
+    """
+    Parse and validate a comma-separated fields param.
+
+    "id" is always included. A dotted sub-key is dropped when its whole
+    parent field is also requested.
+
+    Raises:
+        ValueError with a client-facing message on unknown fields
+    """
+    json_fields = json_fields or {}
+    keys = ["id"]
+    for key in (part.strip() for part in raw.split(",")):
+        if not key or key in keys:
+            continue
+        parent, _, sub = key.partition(".")
+        if sub:
+            if parent not in json_fields or not _SUBKEY.match(sub):
+                raise ValueError(f"Unknown field: {key}")
+        elif key not in registry:
+            raise ValueError(f"Unknown field: {key}")
+        keys.append(key)
+
+    return tuple(
+        key for key in keys if "." not in key or key.partition(".")[0] not in keys
+    )
+
+
+def field_columns(keys, registry: dict, json_fields: dict | None = None) -> list:
+    """SELECT list for keys, one labeled column per key, in order."""
+    columns = []
+    for key in keys:
+        parent, _, sub = key.partition(".")
+        if sub:
+            columns.append(json_fields[parent][sub].label(key))
+        else:
+            columns.append(registry[key].column.label(key))
+    return columns
+
+
+# (id(registry), keys) -> serializer; registries are module constants
+_serializers: dict[tuple, Callable] = {}
+
+
+def _build_serializer(keys: tuple, registry: dict) -> Callable:
+    steps = []
+    for key in keys:
+        parent, _, sub = key.partition(".")
+        steps.append((parent, sub, None if sub else registry[key].format))
+    steps = tuple(steps)
+
+    if not any(sub for _, sub, _ in steps):
+        def serialize(row) -> dict:
+            return {
+                key: formatter(value) if formatter else value
+                for (key, _, formatter), value in zip(steps, row, strict=True)
+            }
+        return serialize
+
+    def serialize(row) -> dict:
+        data = {}
+        for (key, sub, formatter), value in zip(steps, row, strict=True):
+            if sub:
+                data.setdefault(key, {})[sub] = value
+            else:
+                data[key] = formatter(value) if formatter else value
+        return data
+    return serialize
+
+
+def row_serializer(keys: tuple, registry: dict) -> Callable:
+    """
+    Function mapping a row selected with field_columns(keys, ...) to a
+    response dict. Key lookups and formatters are resolved once per
+    fieldset, not per row.
+    """
+    cache_key = (id(registry), keys)
+    serializer = _serializers.get(cache_key)
+    if serializer is None:
+        if len(_serializers) >= 256:
+            _serializers.clear()
+        serializer = _serializers[cache_key] = _build_serializer(keys, registry)
+    return serializer
@@ -1,16 +1,41 @@
+import json
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, UniqueConstraint, text
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import (
+    BigInteger, Boolean, CheckConstraint, Column, Computed, FetchedValue, Float, String, Text,
+    ForeignKey,
+    DateTime, Index, Integer, UniqueConstraint, func, select, text,
+)
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 Base = declarative_base()
 
+# Text search configuration used by generated tsvector columns and queries
+TEXT_SEARCH_CONFIG = "english"
+# Only this much plain text per note is indexed (tsvector values are capped at 1MB)
+NOTE_INDEXED_CHARS = 100000
+# Length of the plain-text preview stored with each note for list views
+NOTE_PREVIEW_CHARS = 200
+
 
 def utc_now():
     return datetime.now(timezone.utc)
 
 
+def sync_change_columns():
+    """
+    (change_seq, changed_at) maintained by the sync_change triggers
+    (migration 011) for GET /api/sync. Never written by the application.
+    """
+    return (
+        deferred(Column(BigInteger, server_default=FetchedValue(), server_onupdate=FetchedValue())),
+        deferred(Column(
+            DateTime(timezone=True), server_default=FetchedValue(), server_onupdate=FetchedValue()
+        )),
+    )
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,6 +45,11 @@ class User(Base):
     name = Column(String(255), nullable=False)
     picture_url = Column(Text, nullable=True)
     preferences = Column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
+    # Bumped with every preferences change, for conditional updates
+    preferences_version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    # Bumped by triggers (migration 017) whenever the user's bookmarks, tags,
+    # notes or tag associations change; part of every result cache key
+    data_version = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
     created_at = Column(DateTime(timezone=True), default=utc_now)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
 
@@ -35,25 +65,49 @@ class User(Base):
             "name": self.name,
             "picture": self.picture_url,
             "preferences": self.preferences or {},
+            "preferencesVersion": self.preferences_version or 0,
         }
 
 
 class Bookmark(Base):
     __tablename__ = "bookmarks"
+    __table_args__ = (
+        Index("uq_bookmarks_author_url_hash", "author_id", "url_hash", unique=True),
+        # Partial indexes for the metadata refresh job
+        Index(
+            "idx_bookmarks_metadata_pending", "metadata_requested_at",
+            postgresql_where=text("metadata_status = 'pending'"),
+        ),
+        Index(
+            "idx_bookmarks_metadata_ready_updated", "metadata_updated_at",
+            postgresql_where=text("metadata_status = 'ready'"),
+        ),
+        Index("idx_bookmarks_author_change_seq", "author_id", "change_seq"),
+        # Covering index for GET /api/bookmarks/status
+        Index(
+            "idx_bookmarks_author_id_metadata_status", "author_id", "id",
+            postgresql_include=["metadata_status", "metadata_updated_at"],
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(500), nullable=False)
     description = Column(Text, nullable=True)
     url = Column(Text, nullable=False)
+    # SHA-256 of the canonical URL (shared.utils.urls.url_hash) for duplicate detection
+    url_hash = Column(String(64), nullable=True)
     video_url = Column(Text, nullable=True)
     screenshot_url = Column(Text, nullable=True)
     metadata_json = Column("metadata", JSONB, nullable=True)
     metadata_status = Column(String(32), nullable=False, default="ready")
     metadata_error = Column(Text, nullable=True)
     metadata_updated_at = Column(DateTime(timezone=True), nullable=True)
+    # Last time a metadata fetch was enqueued (see metadata/refresh.py)
+    metadata_requested_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), default=utc_now)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    change_seq, changed_at = sync_change_columns()
 
     # Relationships
     author = relationship("User", back_populates="bookmarks")
@@ -85,6 +139,7 @@ class Tag(Base):
     __tablename__ = "tags"
     __table_args__ = (
         UniqueConstraint("author_id", "title", name="uq_tag_author_title"),
+        Index("idx_tags_author_change_seq", "author_id", "change_seq"),
     )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -92,33 +147,80 @@ class Tag(Base):
     title = Column(String(100), nullable=False)
     created_at = Column(DateTime(timezone=True), default=utc_now)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    change_seq, changed_at = sync_change_columns()
 
     # Relationships
     author = relationship("User", back_populates="tags")
     bookmarks = relationship("Bookmark", secondary="bookmark_tags", back_populates="tags")
 
-    def to_dict(self):
-        """Convert to dict matching frontend Tag interface."""
-        # Note: bookmarkID is kept for backwards compatibility with frontend
-        # It contains a JSON string of bookmark IDs
-        bookmark_ids = [str(b.id) for b in self.bookmarks]
-        return {
+    def to_dict(self, bookmark_ids=None):
+        """
+        Convert to dict matching frontend Tag interface.
+
+        bookmarkID is kept for backwards compatibility with the frontend and
+        contains a JSON string of bookmark IDs. It is only included when the
+        caller passes ``bookmark_ids`` (see ``bookmark_ids_by_tag``, which
+        loads them for many tags in one query); the model never queries.
+        """
+        data = {
             "ID": str(self.id),
             "title": self.title,
             "authorID": str(self.author_id),
-            "bookmarkID": f'{{"list": {bookmark_ids}}}',  # Legacy format
+        }
+        if bookmark_ids is not None:
+            data["bookmarkID"] = json.dumps({"list": bookmark_ids})  # Legacy format
+        return data
+
+    @staticmethod
+    def bookmark_ids_by_tag(db, author_id, tag_ids=None) -> dict:
+        """
+        Map tag ID -> list of bookmark ID strings for an author's tags.
+
+        Reads only bookmark_tags.bookmark_id, aggregated per tag in a single
+        query, so bookmark rows (metadata, descriptions) are never loaded.
+        """
+        query = (
+            select(BookmarkTag.tag_id, func.array_agg(BookmarkTag.bookmark_id))
+            .join(Tag, Tag.id == BookmarkTag.tag_id)
+            .where(Tag.author_id == author_id)
+            .group_by(BookmarkTag.tag_id)
+        )
+        if tag_ids is not None:
+            query = query.where(BookmarkTag.tag_id.in_(tag_ids))
+
+        return {
+            tag_id: [str(bookmark_id) for bookmark_id in bookmark_ids]
+            for tag_id, bookmark_ids in db.execute(query)
         }
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("idx_notes_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_notes_author_change_seq", "author_id", "change_seq"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(500), nullable=False, default="")
     content = Column(Text, nullable=False, default="")
+    # Plain-text extraction of content (HTML stripped) and its leading
+    # NOTE_PREVIEW_CHARS, both maintained by the notes handler
+    content_text = deferred(Column(Text, nullable=False, default="", server_default=""))
+    preview = Column(Text, nullable=False, default="", server_default="")
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', "
+            f"left(coalesce(content_text, ''), {NOTE_INDEXED_CHARS})), 'B')",
+            persisted=True,
+        ),
+    ))
     created_at = Column(DateTime(timezone=True), default=utc_now)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    change_seq, changed_at = sync_change_columns()
 
     # Relationships
     author = relationship("User", back_populates="notes")
@@ -134,9 +236,26 @@ class Note(Base):
         }
 
 
+# Prefix matches on lower(title) for GET /api/suggest (migration 019)
+Index(
+    "idx_bookmarks_author_title_prefix", Bookmark.author_id,
+    func.lower(Bookmark.title).label("lower_title"),
+    postgresql_ops={"lower_title": "text_pattern_ops"},
+)
+Index(
+    "idx_tags_author_title_prefix", Tag.author_id, func.lower(Tag.title).label("lower_title"),
+    postgresql_ops={"lower_title": "text_pattern_ops"},
+)
+
+
 class BookmarkTag(Base):
     """Junction table for many-to-many bookmark-tag relationship."""
     __tablename__ = "bookmark_tags"
+    __table_args__ = (
+        # Covering index for tag -> bookmarks lookups (tag filters, tag listings)
+        Index("idx_bookmark_tags_tag_bookmark", "tag_id", "bookmark_id"),
+        Index("idx_bookmark_tags_change_seq", "change_seq"),
+    )
 
     bookmark_id = Column(
         UUID(as_uuid=True),
@@ -149,3 +268,150 @@ class BookmarkTag(Base):
         primary_key=True
     )
     created_at = Column(DateTime(timezone=True), default=utc_now)
+    change_seq, changed_at = sync_change_columns()
+
+
+class MetadataHostHealth(Base):
+    """Per-host circuit breaker state shared by metadata workers."""
+    __tablename__ = "metadata_host_health"
+
+    host = Column(String(255), primary_key=True)
+    # Fetch outcomes in the current window
+    failures = Column(Integer, nullable=False, default=0, server_default="0")
+    successes = Column(Integer, nullable=False, default=0, server_default="0")
+    window_started_at = Column(DateTime(timezone=True), nullable=True)
+    # Fetches are deferred until open_until; trips doubles the next open period
+    open_until = Column(DateTime(timezone=True), nullable=True)
+    trips = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+
+
+class MetadataHostLease(Base):
+    """An in-flight fetch against a host, counted against its concurrency cap."""
+    __tablename__ = "metadata_host_leases"
+    __table_args__ = (
+        Index("idx_metadata_host_leases_host", "host", "expires_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    host = Column(String(255), nullable=False)
+    # Leases of crashed or timed-out workers stop counting after this
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class Export(Base):
+    """A full-account export job; the file is written to S3 by exports/worker.py."""
+    __tablename__ = "exports"
+    __table_args__ = (
+        Index("idx_exports_author_created", "author_id", text("created_at DESC")),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    author_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # ndjson or html
+    format = Column(String(16), nullable=False)
+    # queued, running, ready or failed
+    status = Column(String(16), nullable=False, default="queued", server_default="queued")
+    s3_key = Column(Text, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    item_count = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=utc_now)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "format": self.format,
+            "status": self.status,
+            "sizeBytes": self.size_bytes,
+            "itemCount": self.item_count,
+            "error": self.error,
+            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "completedAt": self.completed_at.isoformat() if self.completed_at else None,
+        }
+
+
+class OutboxMessage(Base):
+    """A queue message awaiting dispatch by outbox/dispatcher.py."""
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index("idx_outbox_available_at", "available_at", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # Key of dispatcher.QUEUE_URLS, e.g. "metadata"
+    queue = Column(String(32), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    """A stored response for an Idempotency-Key (shared/utils/idempotency.py)."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("idx_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    user_sub = Column(String(255), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # sha256 hex of method, path and body
+    request_hash = Column(String(64), nullable=False)
+    # in_progress or completed
+    status = Column(String(16), nullable=False, default="in_progress", server_default="in_progress")
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)
+    response_headers = Column(JSONB, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=False, default=utc_now)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class RateLimitBucket(Base):
+    """A token bucket for RATE_LIMIT_STORE=postgres (shared/utils/ratelimit.py)."""
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = (
+        Index("idx_rate_limit_buckets_updated_at", "updated_at"),
+    )
+
+    # "<route class>:<user sub or ip:address>"
+    key = Column(String(320), primary_key=True)
+    # Tokens left as of updated_at; refilled lazily on the next request
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class SyncTombstone(Base):
+    """A deleted bookmark, tag, note or tag association, written by triggers."""
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("idx_sync_tombstones_author_change_seq", "author_id", "change_seq"),
+        Index("idx_sync_tombstones_changed_at", "changed_at"),
+    )
+
+    change_seq = Column(BigInteger, primary_key=True, server_default=FetchedValue())
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=FetchedValue())
+    author_id = Column(UUID(as_uuid=True), nullable=False)
+    # bookmark, tag, note or bookmarkTag
+    entity = Column(String(32), nullable=False)
+    # For bookmarkTag: the bookmark ID and the tag ID
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    related_id = Column(UUID(as_uuid=True), nullable=True)
+
+
+class SyncWatermark(Base):
+    """
+    Single row describing purged tombstones: a sync token below
+    purged_through issued before purged_before may have missed one.
+    """
+    __tablename__ = "sync_watermark"
+    __table_args__ = (
+        CheckConstraint("id", name="sync_watermark_id_check"),
+    )
+
+    id = Column(Boolean, primary_key=True, default=True)
+    purged_through = Column(BigInteger, nullable=False, default=0, server_default="0")
+    purged_before = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,54 @@
+"""
+Transactional outbox.
+
+Queue messages are written to the outbox table in the caller's session, so
+they commit (or roll back) together with the rows they refer to and no SQS
+call happens on the request path. outbox/dispatcher.py delivers them.
+
+With OUTBOX_DISPATCHER_FUNCTION set, a session that wrote messages invokes
+the dispatcher asynchronously once it commits, so they are delivered within
+about a second; otherwise (or if the invoke fails) the dispatcher's schedule
+picks them up.
+
+Usage:
+    with get_session() as db:
+        db.add(bookmark)
+        db.flush()
+        add_outbox_message(db, "metadata", {"bookmarkId": str(bookmark.id), "url": url})
+"""
+import os
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from sqlalchemy import event
+
+from .models import OutboxMessage
+
+
+OUTBOX_DISPATCHER_FUNCTION = os.environ.get("OUTBOX_DISPATCHER_FUNCTION")
+# A nudge must not hold up the response; the schedule is the fallback
+_lambda_client = boto3.client(
+    "lambda",
+    config=Config(connect_timeout=1, read_timeout=1, retries={"max_attempts": 1}),
+) if OUTBOX_DISPATCHER_FUNCTION else None
+
+
+def add_outbox_message(db, queue: str, payload: dict) -> None:
+    db.add(OutboxMessage(queue=queue, payload=payload))
+    if _lambda_client is not None:
+        db.info["outbox_pending"] = True
+        if not event.contains(db, "after_commit", _nudge_dispatcher):
+            event.listen(db, "after_commit", _nudge_dispatcher)
+
+
+def _nudge_dispatcher(session) -> None:
+    """One async dispatcher invoke per commit that included outbox messages."""
+    if not session.info.pop("outbox_pending", False):
+        return
+    try:
+        _lambda_client.invoke(
+            FunctionName=OUTBOX_DISPATCHER_FUNCTION, InvocationType="Event", Payload=b"{}"
+        )
+    except (BotoCoreError, ClientError) as e:
+        print(f"WARNING: could not nudge the outbox dispatcher: {str(e)}")
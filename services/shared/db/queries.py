@@ -0,0 +1,318 @@
+"""
+Prebuilt statements for the hot per-request queries.
+
+Fixed-shape lookups are module-level select() constructs with named bound
+parameters: their cache key is computed once at import, so each execution
+is a compiled-cache hit instead of a fresh ORM Query compile. Bookmark
+search varies with its filters, so one such statement is built per
+combination of filters (and fieldset) and kept in an LRU cache; only the
+parameter values change between requests.
+
+See scripts/bench_statements.py for the per-request compile cost these
+remove.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, or_, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from .connection import get_session, is_replica_session
+from .fields import BOOKMARK_FIELDS, BOOKMARK_JSON_FIELDS, field_columns
+from .models import User, Bookmark, Tag, BookmarkTag, Note
+
+
+USER_BY_COGNITO_SUB = select(User).where(User.cognito_sub == bindparam("cognito_sub"))
+
+# Create-or-refresh for auth/init in one statement: inserts the user, or
+# updates email/name only when they changed, and returns the row either way
+# (the UNION arm finds it when the conflict led to no update). Every other
+# column is set in SQL: the Python-side column defaults are not applied to an
+# INSERT nested in a CTE, and would arrive as NULLs.
+_user_insert = pg_insert(User).values(
+    id=func.uuid_generate_v4(),
+    cognito_sub=bindparam("cognito_sub"),
+    email=bindparam("email"),
+    name=bindparam("name"),
+    picture_url=bindparam("picture_url"),
+    preferences=text("'{}'::jsonb"),
+    preferences_version=0,
+    data_version=0,
+    created_at=func.now(),
+    updated_at=func.now(),
+)
+_user_upserted = _user_insert.on_conflict_do_update(
+    index_elements=[User.cognito_sub],
+    set_={
+        "email": _user_insert.excluded.email,
+        "name": _user_insert.excluded.name,
+        "updated_at": func.now(),
+    },
+    where=or_(
+        User.email.is_distinct_from(_user_insert.excluded.email),
+        User.name.is_distinct_from(_user_insert.excluded.name),
+    ),
+).returning(*User.__table__.c).cte("upserted")
+
+USER_UPSERT = select(User).from_statement(
+    select(_user_upserted).union_all(
+        select(User.__table__).where(
+            User.cognito_sub == bindparam("cognito_sub"),
+            ~select(_user_upserted.c.id).exists(),
+        )
+    )
+)
+
+BOOKMARK_FOR_AUTHOR = select(Bookmark).where(
+    Bookmark.id == bindparam("id"), Bookmark.author_id == bindparam("author_id")
+)
+
+TAG_FOR_AUTHOR = select(Tag).where(
+    Tag.id == bindparam("id"), Tag.author_id == bindparam("author_id")
+)
+
+NOTE_FOR_AUTHOR = select(Note).where(
+    Note.id == bindparam("id"), Note.author_id == bindparam("author_id")
+)
+
+TAG_BOOKMARK_COUNTS = (
+    select(BookmarkTag.tag_id, func.count())
+    .join(Tag, Tag.id == BookmarkTag.tag_id)
+    .where(Tag.author_id == bindparam("author_id"))
+    .group_by(BookmarkTag.tag_id)
+)
+
+NOTE_COUNT = select(func.count()).select_from(Note).where(Note.author_id == bindparam("author_id"))
+
+# Served by the covering (author_id, id) INCLUDE (metadata_status,
+# metadata_updated_at) index
+BOOKMARK_STATUSES = select(
+    Bookmark.id, Bookmark.metadata_status, Bookmark.metadata_updated_at
+).where(
+    Bookmark.author_id == bindparam("author_id"),
+    Bookmark.id.in_(bindparam("ids", expanding=True)),
+)
+
+BOOKMARK_PREVIEWS = select(
+    Bookmark.id, Bookmark.title, Bookmark.metadata_json["image"].astext.label("image")
+).where(
+    Bookmark.author_id == bindparam("author_id"),
+    Bookmark.id.in_(bindparam("ids", expanding=True)),
+)
+
+
+def get_user_by_cognito_sub(db, cognito_sub: str) -> User | None:
+    """
+    Get user by Cognito sub, returns None if not found.
+
+    On a read replica session a miss is retried on the primary, since users
+    created moments ago by auth/init may not have replicated yet.
+    """
+    user = db.execute(USER_BY_COGNITO_SUB, {"cognito_sub": cognito_sub}).scalar_one_or_none()
+    if user is None and is_replica_session(db):
+        with get_session() as primary:
+            user = primary.execute(
+                USER_BY_COGNITO_SUB, {"cognito_sub": cognito_sub}
+            ).scalar_one_or_none()
+            if user is not None:
+                primary.expunge(user)
+    return user
+
+
+def upsert_user(db, cognito_sub: str, email: str, name: str, picture_url=None) -> User:
+    """
+    Create the user for cognito_sub, or update their email and name if they
+    changed. Must run on a primary session.
+    """
+    user = db.execute(USER_UPSERT, {
+        "cognito_sub": cognito_sub, "email": email, "name": name, "picture_url": picture_url,
+    }).scalar_one_or_none()
+    if user is None:
+        # Inserted by a concurrent transaction after this statement's
+        # snapshot was taken: the conflict was seen, but not the row
+        user = get_user_by_cognito_sub(db, cognito_sub)
+    return user
+
+
+def get_bookmark_for_author(db, bookmark_id, author_id) -> Bookmark | None:
+    """Get a bookmark owned by author_id, returns None if not found."""
+    return db.execute(
+        BOOKMARK_FOR_AUTHOR, {"id": bookmark_id, "author_id": author_id}
+    ).scalar_one_or_none()
+
+
+def get_tag_for_author(db, tag_id, author_id) -> Tag | None:
+    """Get a tag owned by author_id, returns None if not found."""
+    return db.execute(
+        TAG_FOR_AUTHOR, {"id": tag_id, "author_id": author_id}
+    ).scalar_one_or_none()
+
+
+def get_note_for_author(db, note_id, author_id) -> Note | None:
+    """Get a note owned by author_id, returns None if not found."""
+    return db.execute(
+        NOTE_FOR_AUTHOR, {"id": note_id, "author_id": author_id}
+    ).scalar_one_or_none()
+
+
+class BookmarkSearch(NamedTuple):
+    """Parsed bookmark search params (see parse_bookmark_search)."""
+    ids: list[UUID]
+    tag_ids: list[UUID]
+    tag_match: str
+    title: str
+    description: str
+
+
+def parse_uuid_list(raw: str, label: str) -> list[UUID]:
+    """Parse a comma-separated list of UUIDs, raising ValueError on bad input."""
+    try:
+        return [UUID(id.strip()) for id in raw.split(",") if id.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid {label} ID format") from None
+
+
+def parse_bookmark_search(params: dict) -> BookmarkSearch:
+    """
+    Parse the ids, tags, tagMatch, title and description search params.
+
+    Raises:
+        ValueError with a client-facing message on invalid input
+    """
+    ids = parse_uuid_list(params.get("ids", ""), "bookmark")
+
+    # Deduplicated so that tagMatch=all can compare counts
+    tag_ids = list(dict.fromkeys(parse_uuid_list(params.get("tags", ""), "tag")))
+    tag_match = params.get("tagMatch", "any")
+    if tag_ids and tag_match not in ("any", "all"):
+        raise ValueError("tagMatch must be 'any' or 'all'")
+
+    return BookmarkSearch(
+        ids=ids,
+        tag_ids=tag_ids,
+        tag_match=tag_match,
+        title=params.get("title", ""),
+        description=params.get("description", ""),
+    )
+
+
+def tagged_bookmark_ids(tag_ids, match: str):
+    """
+    Subquery of bookmark IDs tagged with any/all of tag_ids.
+
+    Served from the (tag_id, bookmark_id) index on bookmark_tags without
+    touching the bookmarks table.
+    """
+    query = select(BookmarkTag.bookmark_id).where(BookmarkTag.tag_id.in_(tag_ids))
+    if match == "all":
+        query = query.group_by(BookmarkTag.bookmark_id).having(
+            func.count(BookmarkTag.tag_id) == len(tag_ids)
+        )
+    return query
+
+
+def bookmark_search_filters(search: BookmarkSearch) -> list:
+    """
+    Filter clauses for search, for one-off statements such as batch updates.
+
+    The author filter is not included - callers must always add it.
+    """
+    filters = []
+    if search.ids:
+        filters.append(Bookmark.id.in_(search.ids))
+    if search.tag_ids:
+        filters.append(Bookmark.id.in_(tagged_bookmark_ids(search.tag_ids, search.tag_match)))
+    if search.title:
+        filters.append(Bookmark.title.ilike(f"%{search.title}%"))
+    if search.description:
+        filters.append(Bookmark.description.ilike(f"%{search.description}%"))
+    return filters
+
+
+@lru_cache(maxsize=256)
+def _search_statement(
+    fields: tuple | None, has_ids: bool, tag_match: str | None, has_title: bool,
+    has_description: bool, count: bool = False,
+):
+    """
+    Search statement for one combination of filters, with bound parameters
+    for their values. Built once per combination (and fieldset) and reused.
+    """
+    if count:
+        stmt = select(func.count()).select_from(Bookmark)
+    elif fields:
+        stmt = select(*field_columns(fields, BOOKMARK_FIELDS, BOOKMARK_JSON_FIELDS))
+    else:
+        stmt = select(Bookmark)
+
+    stmt = stmt.where(Bookmark.author_id == bindparam("author_id"))
+    if has_ids:
+        stmt = stmt.where(Bookmark.id.in_(bindparam("ids", expanding=True)))
+    if tag_match:
+        tagged = select(BookmarkTag.bookmark_id).where(
+            BookmarkTag.tag_id.in_(bindparam("tag_ids", expanding=True))
+        )
+        if tag_match == "all":
+            tagged = tagged.group_by(BookmarkTag.bookmark_id).having(
+                func.count(BookmarkTag.tag_id) == bindparam("tag_count")
+            )
+        stmt = stmt.where(Bookmark.id.in_(tagged))
+    if has_title:
+        stmt = stmt.where(Bookmark.title.ilike(bindparam("title_pattern")))
+    if has_description:
+        stmt = stmt.where(Bookmark.description.ilike(bindparam("description_pattern")))
+
+    if not count:
+        stmt = (
+            stmt.order_by(Bookmark.created_at.desc())
+            .offset(bindparam("offset"))
+            .limit(bindparam("limit"))
+        )
+    return stmt
+
+
+def _search_key(search: BookmarkSearch) -> tuple:
+    return (
+        bool(search.ids),
+        search.tag_match if search.tag_ids else None,
+        bool(search.title),
+        bool(search.description),
+    )
+
+
+def _search_params(author_id, search: BookmarkSearch) -> dict:
+    return {
+        "author_id": author_id,
+        "ids": search.ids,
+        "tag_ids": search.tag_ids,
+        "tag_count": len(search.tag_ids),
+        "title_pattern": f"%{search.title}%",
+        "description_pattern": f"%{search.description}%",
+    }
+
+
+def bookmark_search_count(author_id, search: BookmarkSearch) -> tuple:
+    """
+    (statement, params) counting author_id's bookmarks matching search.
+
+    Usage:
+        total = db.execute(*bookmark_search_count(user.id, search)).scalar()
+    """
+    stmt = _search_statement(None, *_search_key(search), count=True)
+    return stmt, _search_params(author_id, search)
+
+
+def bookmark_search_page(
+    author_id, search: BookmarkSearch, offset: int, limit: int, fields: tuple | None = None,
+) -> tuple:
+    """
+    (statement, params) for one page of search results, newest first.
+
+    Selects Bookmark entities, or only the columns for a fields.parse_fields()
+    fieldset when given.
+    """
+    stmt = _search_statement(fields, *_search_key(search))
+    params = _search_params(author_id, search)
+    params.update(offset=offset, limit=limit)
+    return stmt, params
@@ -8,6 +8,12 @@ from jose import jwt, JWTError
 COGNITO_REGION = os.environ.get("COGNITO_REGION", "eu-west-2")
 COGNITO_USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID")
 COGNITO_CLIENT_ID = os.environ.get("COGNITO_CLIENT_ID")
+# Overrides for a non-Cognito issuer, e.g. the stub issuer of the local
+# server (services/local); default to the user pool's
+COGNITO_ISSUER = os.environ.get("COGNITO_ISSUER")
+COGNITO_JWKS_URL = os.environ.get("COGNITO_JWKS_URL")
+# requestContext key holding the outcome of the event's first validation
+CLAIMS_KEY = "poucherAuth"
 
 
 class AuthError(Exception):
@@ -15,16 +21,19 @@ class AuthError(Exception):
     pass
 
 
-@lru_cache(maxsize=1)
-def get_jwks():
-    """Fetch and cache JWKS from Cognito."""
+def get_issuer() -> str:
+    """Expected token issuer."""
+    if COGNITO_ISSUER:
+        return COGNITO_ISSUER
     if not COGNITO_USER_POOL_ID:
         raise AuthError("COGNITO_USER_POOL_ID not configured")
+    return f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
 
-    jwks_url = (
-        f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/"
-        f"{COGNITO_USER_POOL_ID}/.well-known/jwks.json"
-    )
+
+@lru_cache(maxsize=1)
+def get_jwks():
+    """Fetch and cache JWKS from Cognito."""
+    jwks_url = COGNITO_JWKS_URL or f"{get_issuer()}/.well-known/jwks.json"
 
     with urllib.request.urlopen(jwks_url) as response:
         return json.loads(response.read().decode())
@@ -57,14 +66,12 @@ def get_user_from_token(token: str) -> dict:
             raise AuthError("Unable to find matching key")
 
         # Verify and decode the token
-        issuer = f"https://cognito-idp.{COGNITO_REGION}.amazonaws.com/{COGNITO_USER_POOL_ID}"
-
         payload = jwt.decode(
             token,
             key,
             algorithms=["RS256"],
             audience=COGNITO_CLIENT_ID,
-            issuer=issuer,
+            issuer=get_issuer(),
         )
 
         # Check expiration
@@ -86,6 +93,10 @@ def validate_token(event: dict) -> dict:
     """
     Extract and validate the Bearer token from Lambda event headers.
 
+    The token is verified once per event: the outcome (claims or the
+    AuthError) is kept in event["requestContext"], so the decorators and the
+    handler body share it instead of each checking the signature again.
+
     Args:
         event: Lambda event dict
 
@@ -95,6 +106,22 @@ def validate_token(event: dict) -> dict:
     Raises:
         AuthError if no token or invalid token
     """
+    request_context = event.get("requestContext")
+    if request_context is None:
+        request_context = event["requestContext"] = {}
+    outcome = request_context.get(CLAIMS_KEY)
+    if outcome is None:
+        try:
+            outcome = _validate_header(event)
+        except AuthError as e:
+            outcome = e
+        request_context[CLAIMS_KEY] = outcome
+    if isinstance(outcome, AuthError):
+        raise outcome
+    return outcome
+
+
+def _validate_header(event: dict) -> dict:
     headers = event.get("headers", {}) or {}
 
     # Headers can be lowercase or mixed case depending on API Gateway config
@@ -0,0 +1,145 @@
+"""
+Per-user result cache for read endpoints.
+
+Keys combine the user, the endpoint, the normalized query params and the
+user's data_version (users.data_version, bumped by triggers in the same
+transaction as any change to their bookmarks, tags or notes). A write
+therefore invalidates every cached result of that user at once without
+touching the cache, and a cached result is never served for data that
+changed since it was built; old versions simply age out.
+
+Backends:
+    - In-process LRU (default): shared by requests in a warm Lambda container
+    - Redis-compatible (CACHE_REDIS_URL, needs the optional "redis" package):
+      shared by all containers
+
+Usage:
+    key = cache_key(user.id, "bookmarks.search", params, user.data_version)
+    data = get_cache().get(key)
+    if data is None:
+        data = ...
+        get_cache().set(key, data)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")  # memory, redis or off
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "512"))
+KEY_PREFIX = "poucher:v1"
+
+
+class NullCache:
+    """Cache that stores nothing (CACHE_BACKEND=off)."""
+
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value) -> None:
+        pass
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCache:
+    """
+    Redis (or compatible, e.g. Valkey/ElastiCache) backend. Values are stored
+    as JSON with a TTL; any Redis error is treated as a miss, so an
+    unavailable cache only costs the database query.
+    """
+
+    def __init__(self, url: str, ttl: int = CACHE_TTL_SECONDS):
+        import redis
+
+        self._errors = (redis.RedisError,)
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+        self._ttl = ttl
+
+    def get(self, key: str):
+        try:
+            raw = self._client.get(key)
+        except self._errors:
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value) -> None:
+        try:
+            self._client.set(key, json.dumps(value, default=str), ex=self._ttl)
+        except self._errors:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The configured cache backend, created on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _create_cache()
+    return _cache
+
+
+def _create_cache():
+    if CACHE_BACKEND == "off":
+        return NullCache()
+    if CACHE_BACKEND == "redis":
+        if not CACHE_REDIS_URL:
+            print("WARNING: CACHE_BACKEND=redis without CACHE_REDIS_URL; using memory cache")
+        else:
+            try:
+                return RedisCache(CACHE_REDIS_URL)
+            except ImportError:
+                print("WARNING: redis package not installed; using memory cache")
+    return LRUCache()
+
+
+def cache_key(user_id, endpoint: str, params: dict | None, version: int) -> str:
+    """
+    Key for one user's result of endpoint with params at data version.
+    Params are normalized: order and empty values don't matter.
+    """
+    normalized = json.dumps(
+        sorted((k, str(v)) for k, v in (params or {}).items() if v not in (None, "")),
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+    return f"{KEY_PREFIX}:{user_id}:{endpoint}:{version}:{digest}"
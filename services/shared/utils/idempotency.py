@@ -0,0 +1,226 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+A POST/PUT/PATCH/DELETE request carrying an Idempotency-Key header claims
+the key (per user) before the handler runs, and the handler's response is
+stored under it. A retry with the same key and request gets the stored
+response back (with Idempotent-Replayed: true) instead of repeating the
+write; a retry while the first request is still running gets 409 with
+Retry-After, and reusing a key for a different request gets 422.
+
+Server errors (5xx) and 429s are not stored, so those requests can be
+retried with the same key.
+
+Usage (below @rate_limited, so a request that is limited or shed is
+answered before any key is claimed):
+    @rate_limited("write")
+    @idempotent
+    def create(event, context):
+        ...
+"""
+import hashlib
+import os
+from datetime import timedelta
+from functools import wraps
+
+from sqlalchemy import and_, delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from shared.db import get_session, IdempotencyKey
+from .auth import validate_token, AuthError
+from .response import CORS_HEADERS, bad_request, error
+
+
+HEADER = "idempotency-key"
+METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+TTL = timedelta(hours=float(os.environ.get("IDEMPOTENCY_TTL_HOURS", "24")))
+# An in_progress key older than this is assumed abandoned (the Lambda timed
+# out or crashed) and can be claimed by a retry
+LOCK_TIMEOUT = timedelta(seconds=float(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "60")))
+RETRY_AFTER_SECONDS = 1
+PURGE_BATCH_SIZE = 5000
+
+
+def idempotent(handler):
+    """Decorate an endpoint function (event, context, ...) to honour Idempotency-Key headers."""
+
+    @wraps(handler)
+    def wrapper(event, context, *args, **kwargs):
+        method, path = _method_and_path(event)
+        key = _header(event, HEADER)
+        if method not in METHODS or key is None:
+            return handler(event, context, *args, **kwargs)
+
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            return bad_request(f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        try:
+            user_sub = validate_token(event)["sub"]
+        except AuthError:
+            # Keys are scoped per user; the handler answers 401
+            return handler(event, context, *args, **kwargs)
+
+        request_hash = _request_hash(method, path, event)
+        try:
+            claimed, existing = _claim(user_sub, key, request_hash)
+        except Exception as e:
+            return error(f"Database error: {str(e)}")
+
+        if not claimed:
+            return _existing_response(existing, request_hash)
+
+        try:
+            response = handler(event, context, *args, **kwargs)
+        except Exception:
+            _release(user_sub, key)
+            raise
+
+        status = response.get("statusCode", 200)
+        if status >= 500 or status == 429:
+            _release(user_sub, key)
+        else:
+            _store(user_sub, key, response)
+        return response
+
+    return wrapper
+
+
+def _method_and_path(event) -> tuple[str, str]:
+    if "httpMethod" in event:
+        return event.get("httpMethod", ""), event.get("path", "")
+    http_info = event.get("requestContext", {}).get("http", {})
+    return http_info.get("method", ""), event.get("rawPath", "")
+
+
+def _header(event, name: str) -> str | None:
+    for header, value in (event.get("headers") or {}).items():
+        if header.lower() == name:
+            return value
+    return None
+
+
+def _request_hash(method: str, path: str, event) -> str:
+    digest = hashlib.sha256(f"{method} {path}?{event.get('rawQueryString', '')}\n".encode())
+    digest.update((event.get("body") or "").encode())
+    return digest.hexdigest()
+
+
+def _claim(user_sub: str, key: str, request_hash: str):
+    """
+    Claim the key for this request. Returns (claimed, existing row), where
+    the row is None when claimed (or when the key was released meanwhile).
+    """
+    with get_session() as db:
+        insert = pg_insert(IdempotencyKey).values(
+            user_sub=user_sub,
+            key=key,
+            request_hash=request_hash,
+            status="in_progress",
+            locked_at=func.now(),
+            expires_at=func.now() + TTL,
+        )
+        claimed = db.execute(
+            insert.on_conflict_do_update(
+                index_elements=[IdempotencyKey.user_sub, IdempotencyKey.key],
+                set_={
+                    "request_hash": insert.excluded.request_hash,
+                    "status": "in_progress",
+                    "response_status": None,
+                    "response_body": None,
+                    "response_headers": None,
+                    "locked_at": insert.excluded.locked_at,
+                    "expires_at": insert.excluded.expires_at,
+                },
+                # Take over expired keys, and abandoned claims of the same request
+                where=or_(
+                    IdempotencyKey.expires_at < func.now(),
+                    and_(
+                        IdempotencyKey.status == "in_progress",
+                        IdempotencyKey.locked_at < func.now() - LOCK_TIMEOUT,
+                        IdempotencyKey.request_hash == insert.excluded.request_hash,
+                    ),
+                ),
+            ).returning(IdempotencyKey.key)
+        ).first()
+        if claimed:
+            return True, None
+
+        return False, db.execute(
+            select(
+                IdempotencyKey.request_hash,
+                IdempotencyKey.status,
+                IdempotencyKey.response_status,
+                IdempotencyKey.response_body,
+                IdempotencyKey.response_headers,
+            ).where(IdempotencyKey.user_sub == user_sub, IdempotencyKey.key == key)
+        ).first()
+
+
+def _existing_response(existing, request_hash: str) -> dict:
+    if existing is not None and existing.request_hash != request_hash:
+        return error("Idempotency-Key was already used for a different request", status=422)
+
+    if existing is None or existing.status != "completed":
+        return error(
+            "A request with this Idempotency-Key is in progress",
+            status=409,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    return {
+        "statusCode": existing.response_status,
+        "headers": {**(existing.response_headers or CORS_HEADERS), "Idempotent-Replayed": "true"},
+        "body": existing.response_body,
+    }
+
+
+def _store(user_sub: str, key: str, response: dict) -> None:
+    try:
+        with get_session() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.user_sub == user_sub, IdempotencyKey.key == key)
+                .values(
+                    status="completed",
+                    response_status=response.get("statusCode", 200),
+                    response_body=response.get("body", ""),
+                    response_headers=response.get("headers"),
+                )
+            )
+    except Exception as e:
+        # The write itself succeeded; retries get 409 until LOCK_TIMEOUT,
+        # after which one of them runs the request again
+        print(f"ERROR: could not store idempotent response: {str(e)}")
+
+
+def _release(user_sub: str, key: str) -> None:
+    """Drop the claim so the request can be retried with the same key."""
+    try:
+        with get_session() as db:
+            db.execute(
+                delete(IdempotencyKey)
+                .where(IdempotencyKey.user_sub == user_sub, IdempotencyKey.key == key)
+            )
+    except Exception as e:
+        print(f"ERROR: could not release idempotency key: {str(e)}")
+
+
+def purge_expired_keys() -> int:
+    """Delete expired keys in batches; returns how many were deleted."""
+    purged = 0
+    while True:
+        with get_session() as db:
+            batch = (
+                select(IdempotencyKey.user_sub, IdempotencyKey.key)
+                .where(IdempotencyKey.expires_at < func.now())
+                .limit(PURGE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            deleted = db.execute(
+                delete(IdempotencyKey)
+                .where(tuple_(IdempotencyKey.user_sub, IdempotencyKey.key).in_(batch))
+            ).rowcount
+        purged += deleted
+        if deleted < PURGE_BATCH_SIZE:
+            return purged
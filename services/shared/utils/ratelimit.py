@@ -0,0 +1,324 @@
+"""
+Per-user rate limiting and load shedding for API endpoints.
+
+Every endpoint belongs to a route class. Each user (or client IP, without a
+valid token) has one token bucket per class: a request takes a token, and
+tokens refill at `rate` per second up to `burst`. A request finding its
+bucket empty gets 429 with Retry-After set to when a token will be back.
+
+Classes also set a shedding threshold: while more than that fraction of
+this process's database pool is checked out, requests of the class get 503
+with Retry-After before touching the database. Search goes first, then
+reads and bulk operations; writes are never shed, so a burst of searches
+cannot queue writes behind it for the whole pool_timeout.
+
+    class    rate/s  burst  shed at
+    search        5     20      60%
+    read         20     60      80%
+    bulk          1      5      90%
+    write        10     30        -
+
+RATE_LIMIT_RULES (JSON) overrides these per class, or per user with a
+"<class>:<cognito sub>" key, e.g.
+    {"search": {"rate": 2, "burst": 10}, "write:abc-123": {"rate": 50, "burst": 100}}
+A "shedAt" of null disables shedding for that class.
+
+Buckets are kept by RATE_LIMIT_STORE:
+    - memory (default): per Lambda container
+    - postgres: shared by all containers, in rate_limit_buckets (migration 018)
+    - redis: shared by all containers (RATE_LIMIT_REDIS_URL, needs the
+      optional "redis" package)
+    - off: no rate limiting (shedding still applies)
+A store that fails lets the request through.
+
+Usage:
+    @rate_limited("search")
+    def search(event, context):
+        ...
+"""
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from functools import wraps
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from shared.db import get_session, pool_usage, RateLimitBucket
+from .auth import validate_token, AuthError
+from .response import error
+
+
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE", "memory")  # memory, postgres, redis or off
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL") or os.environ.get("CACHE_REDIS_URL")
+SHED_RETRY_AFTER_SECONDS = 1
+# Buckets kept by the memory store before full (idle) ones are dropped
+MAX_MEMORY_BUCKETS = 10000
+# Postgres buckets idle this long are deleted by the purge job
+BUCKET_IDLE_TTL = timedelta(days=1)
+PURGE_BATCH_SIZE = 5000
+REDIS_KEY_PREFIX = "poucher:rl"
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float  # tokens per second
+    burst: int  # bucket size
+    shed_at: float | None = None  # pool usage above which the class is shed
+
+
+DEFAULT_LIMITS = {
+    "search": Limit(rate=5, burst=20, shed_at=0.6),
+    "read": Limit(rate=20, burst=60, shed_at=0.8),
+    "bulk": Limit(rate=1, burst=5, shed_at=0.9),
+    "write": Limit(rate=10, burst=30),
+}
+
+
+def _load_rules() -> dict[str, Limit]:
+    rules = dict(DEFAULT_LIMITS)
+    raw = os.environ.get("RATE_LIMIT_RULES")
+    if not raw:
+        return rules
+    try:
+        overrides = json.loads(raw)
+        for name, rule in overrides.items():
+            base = rules.get(name) or rules[name.split(":", 1)[0]]
+            rules[name] = replace(
+                base,
+                rate=float(rule.get("rate", base.rate)),
+                burst=int(rule.get("burst", base.burst)),
+                shed_at=rule.get("shedAt", base.shed_at),
+            )
+            # A zero rate would never refill (and divides by zero in take)
+            if not (math.isfinite(rules[name].rate) and rules[name].rate > 0):
+                raise ValueError(f"{name}: rate must be a positive number")
+            if rules[name].burst < 1:
+                raise ValueError(f"{name}: burst must be at least 1")
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"ERROR: ignoring invalid RATE_LIMIT_RULES: {str(e)}")
+        return dict(DEFAULT_LIMITS)
+    return rules
+
+
+RULES = _load_rules()
+
+
+class NullStore:
+    """Never limits (RATE_LIMIT_STORE=off)."""
+
+    def take(self, key: str, limit: Limit) -> float:
+        return 0.0
+
+
+class MemoryStore:
+    """Thread-safe in-process buckets."""
+
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS):
+        self._max_buckets = max_buckets
+        # key -> (tokens, monotonic time of tokens)
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens - 1 if tokens >= 1 else tokens, now)
+            if len(self._buckets) > self._max_buckets:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        # A bucket idle long enough to be full again is the same as none;
+        # this assumes no class refills slower than one token per minute
+        idle = [k for k, (_, updated) in self._buckets.items() if now - updated > 60]
+        for key in idle or list(self._buckets)[: len(self._buckets) // 2]:
+            del self._buckets[key]
+
+
+class PostgresStore:
+    """
+    Buckets in rate_limit_buckets. The refill and take happen in one upsert
+    that only updates the row when a token is available, so concurrent
+    requests cannot overdraw a bucket.
+    """
+
+    def take(self, key: str, limit: Limit) -> float:
+        refilled = func.least(
+            limit.burst,
+            RateLimitBucket.tokens
+            + func.extract("epoch", func.now() - RateLimitBucket.updated_at) * limit.rate,
+        )
+        insert = pg_insert(RateLimitBucket).values(
+            key=key, tokens=limit.burst - 1, updated_at=func.now()
+        )
+        with get_session() as db:
+            taken = db.execute(
+                insert.on_conflict_do_update(
+                    index_elements=[RateLimitBucket.key],
+                    set_={"tokens": refilled - 1, "updated_at": func.now()},
+                    where=refilled >= 1,
+                ).returning(RateLimitBucket.key)
+            ).first()
+            if taken:
+                return 0.0
+            tokens = db.execute(
+                select(refilled).where(RateLimitBucket.key == key)
+            ).scalar()
+        return (1 - float(tokens or 0)) / limit.rate
+
+
+# KEYS[1] = bucket; ARGV = rate, burst. Returns the wait in seconds as a
+# string (Lua numbers come back from EVAL truncated to integers).
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisStore:
+    """Redis (or compatible) buckets, refilled and taken by one Lua script."""
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=0.2, socket_connect_timeout=0.2
+        )
+        self._take = self._client.register_script(_REDIS_TAKE)
+
+    def take(self, key: str, limit: Limit) -> float:
+        return float(self._take(
+            keys=[f"{REDIS_KEY_PREFIX}:{key}"], args=[limit.rate, limit.burst]
+        ))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The configured bucket store, created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+def _create_store():
+    if RATE_LIMIT_STORE == "off":
+        return NullStore()
+    if RATE_LIMIT_STORE == "postgres":
+        return PostgresStore()
+    if RATE_LIMIT_STORE == "redis":
+        if not RATE_LIMIT_REDIS_URL:
+            print("WARNING: RATE_LIMIT_STORE=redis without RATE_LIMIT_REDIS_URL; using memory")
+        else:
+            try:
+                return RedisStore(RATE_LIMIT_REDIS_URL)
+            except ImportError:
+                print("WARNING: redis package not installed; using memory rate limits")
+    return MemoryStore()
+
+
+def rate_limited(route_class: str):
+    """Decorate an endpoint function (event, context, ...) with route_class's limits."""
+    if route_class not in DEFAULT_LIMITS:
+        raise ValueError(f"Unknown route class: {route_class}")
+
+    def decorate(endpoint):
+        @wraps(endpoint)
+        def wrapper(event, context, *args, **kwargs):
+            rejected = check(event, route_class)
+            if rejected is not None:
+                return rejected
+            return endpoint(event, context, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def check(event, route_class: str) -> dict | None:
+    """The 503 or 429 response for a request that must not run, else None."""
+    limit = RULES[route_class]
+    if limit.shed_at is not None and pool_usage() >= limit.shed_at:
+        return error(
+            "Server busy, try again shortly",
+            status=503,
+            headers={"Retry-After": str(SHED_RETRY_AFTER_SECONDS)},
+        )
+
+    client = _client_id(event)
+    limit = RULES.get(f"{route_class}:{client}", limit)
+    try:
+        wait = get_store().take(f"{route_class}:{client}", limit)
+    except Exception as e:
+        print(f"ERROR: rate limit check failed, allowing request: {str(e)}")
+        return None
+
+    if wait <= 0:
+        return None
+    return error(
+        "Too many requests",
+        status=429,
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
+
+def _client_id(event) -> str:
+    """
+    The token's sub, or the caller's IP for requests without a valid token.
+    As the outermost decorator, this is where the token is verified; the
+    outcome is kept on the event for @idempotent and the handler.
+    """
+    try:
+        return validate_token(event)["sub"]
+    except AuthError:
+        pass
+    request_context = event.get("requestContext") or {}
+    source_ip = (
+        request_context.get("http", {}).get("sourceIp")
+        or request_context.get("identity", {}).get("sourceIp")
+        or "unknown"
+    )
+    return f"ip:{source_ip}"
+
+
+def purge_idle_buckets() -> int:
+    """Delete buckets idle for BUCKET_IDLE_TTL in batches; returns how many were deleted."""
+    purged = 0
+    while True:
+        with get_session() as db:
+            batch = (
+                select(RateLimitBucket.key)
+                .where(RateLimitBucket.updated_at < func.now() - BUCKET_IDLE_TTL)
+                .limit(PURGE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            deleted = db.execute(
+                delete(RateLimitBucket).where(RateLimitBucket.key.in_(batch))
+            ).rowcount
+        purged += deleted
+        if deleted < PURGE_BATCH_SIZE:
+            return purged
@@ -4,29 +4,31 @@ from typing import Any
 # CORS headers for API Gateway
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
-    "Access-Control-Allow-Headers": "Content-Type,Authorization",
-    "Access-Control-Allow-Methods": "GET,POST,PUT,DELETE,OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type,Authorization,Idempotency-Key,If-None-Match",
+    "Access-Control-Allow-Methods": "GET,POST,PUT,PATCH,DELETE,OPTIONS",
     "Content-Type": "application/json",
 }
 
 
-def _response(status_code: int, body: Any) -> dict:
-    """Build a Lambda response object."""
+def _response(status_code: int, body: Any, headers: dict | None = None) -> dict:
+    """Build a Lambda response object; headers are added to CORS_HEADERS."""
     return {
         "statusCode": status_code,
-        "headers": CORS_HEADERS,
+        "headers": {**CORS_HEADERS, **headers} if headers else CORS_HEADERS,
         "body": json.dumps(body, default=str),
     }
 
 
-def success(data: dict, status: int = 200) -> dict:
+def success(data: dict, status: int = 200, headers: dict | None = None) -> dict:
     """Return a successful response."""
-    return _response(status, data)
+    return _response(status, data, headers)
 
 
-def error(message: str, status: int = 500) -> dict:
-    """Return an error response."""
-    return _response(status, {"error": message})
+def error(
+    message: str, status: int = 500, headers: dict | None = None, data: dict | None = None,
+) -> dict:
+    """Return an error response; data adds keys next to "error" (e.g. the current state)."""
+    return _response(status, {"error": message, **(data or {})}, headers)
 
 
 def bad_request(message: str = "Bad request") -> dict:
@@ -44,6 +46,15 @@ def not_found(message: str = "Not found") -> dict:
     return _response(404, {"error": message})
 
 
+def not_modified(headers: dict | None = None) -> dict:
+    """Return a 304 response (no body) for a matching If-None-Match."""
+    return {
+        "statusCode": 304,
+        "headers": {**CORS_HEADERS, **headers} if headers else CORS_HEADERS,
+        "body": "",
+    }
+
+
 def options_response() -> dict:
     """Return CORS preflight response."""
     return {
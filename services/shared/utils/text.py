@@ -0,0 +1,71 @@
+import html
+import re
+from html.parser import HTMLParser
+
+# Tags whose boundaries separate words in rendered Tiptap HTML
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+    "blockquote", "pre", "hr", "tr", "td", "th", "table",
+}
+SKIP_TAGS = {"script", "style"}
+# Private-use characters marking ts_headline matches until the text is escaped
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data: str) -> None:
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Strip HTML (e.g. Tiptap note content) down to plain, single-spaced text.
+
+    Block-level tags become word breaks so "<p>a</p><p>b</p>" yields "a b".
+    """
+    if not html:
+        return ""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return _WHITESPACE.sub(" ", "".join(parser.parts)).strip()
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Truncate plain text to at most max_chars, preferring a word boundary."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + "…"
+
+
+def highlight_html(headline: str) -> str:
+    """
+    HTML for a ts_headline result delimited by HIGHLIGHT_START/STOP: the
+    text is escaped, and only the matches are wrapped in <mark>.
+    """
+    escaped = html.escape(headline or "", quote=False)
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
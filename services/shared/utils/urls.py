@@ -0,0 +1,70 @@
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {80, 443}
+
+_REPEATED_SLASHES = re.compile(r"/{2,}")
+# "mailto:", "tel:" etc. - a scheme without "//" (a dotted prefix is a host:port)
+_OPAQUE_SCHEME = re.compile(r"^[a-z][a-z0-9+\-]*:", re.IGNORECASE)
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL, used to detect duplicate bookmarks.
+
+    http and https are treated as the same, as are "www." and bare hosts,
+    default ports, trailing slashes, tracking parameters and parameter
+    order. Fragments are dropped unless they look like client-side routes
+    ("#/..." or "#!...").
+    """
+    url = url.strip()
+    if "://" not in url:
+        if _OPAQUE_SCHEME.match(url):
+            return url.lower()
+        url = f"https://{url}"
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return url.lower()
+
+    host = (parts.hostname or "").rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in DEFAULT_PORTS:
+        host = f"{host}:{port}"
+
+    path = _REPEATED_SLASHES.sub("/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ))
+
+    fragment = parts.fragment if parts.fragment.startswith(("/", "!")) else ""
+
+    return urlunsplit(("https", host, path, query, fragment))
+
+
+def url_hash(url: str) -> str:
+    """Hex SHA-256 of the canonical form of url (see normalize_url)."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
@@ -0,0 +1,222 @@
+"""
+Suggest Lambda Handler
+
+Endpoints:
+    GET /api/suggest - Tags and bookmark titles starting with a prefix, for
+                       tag pickers and search-as-you-type
+
+Matches come from the (author_id, lower(title) text_pattern_ops) indexes
+(migration 019). Up to CANDIDATE_FACTOR x limit matches per type are read
+from the index, in title order, and ranked: tags by how many bookmarks use
+them, bookmarks by recency. Responses carry an ETag derived from the user's
+data_version, so clients can revalidate with If-None-Match and get an empty
+304 until the user's bookmarks or tags change.
+"""
+import hashlib
+import os
+import sys
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select
+
+from shared.db import get_read_session, Bookmark, BookmarkTag, Tag
+from shared.db.queries import get_user_by_cognito_sub
+from shared.utils import validate_token, success, error, bad_request, unauthorized
+from shared.utils.auth import AuthError
+from shared.utils.cache import cache_key, get_cache
+from shared.utils.ratelimit import rate_limited
+from shared.utils.response import not_modified, options_response
+
+
+SUGGEST_TYPES = ("tags", "bookmarks")
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 25
+MAX_PREFIX_LENGTH = 100
+# Matches read from the index per suggestion returned, before ranking. Bounds
+# the work for one-letter prefixes on large libraries; beyond it, ranking
+# only sees the first matches in index (title) order, and a longer prefix
+# narrows them. No ORDER BY: sorting by lower(title) in the database
+# collation is not what the text_pattern_ops index provides, and would sort
+# every match.
+CANDIDATE_FACTOR = 25
+# Clients reuse a response this long without asking, then revalidate
+MAX_AGE_SECONDS = int(os.environ.get("SUGGEST_MAX_AGE_SECONDS", "30"))
+
+
+def handler(event, context):
+    """Main Lambda handler - routes to appropriate function."""
+    if "httpMethod" in event:
+        http_method = event.get("httpMethod", "")
+        path = event.get("path", "")
+    else:
+        request_context = event.get("requestContext", {})
+        http_info = request_context.get("http", {})
+        http_method = http_info.get("method", "")
+        path = event.get("rawPath", "")
+
+    # Handle CORS preflight
+    if http_method == "OPTIONS":
+        return options_response()
+
+    if path == "/api/suggest" and http_method == "GET":
+        return suggest(event, context)
+
+    return error("Not found", status=404)
+
+
+@rate_limited("read")
+def suggest(event, context):
+    """
+    GET /api/suggest
+
+    Query params:
+        prefix - Start of the title, case-insensitive (required, 1-100 characters)
+        types  - Comma-separated "tags" and/or "bookmarks" (default: both)
+        limit  - Suggestions per type (default: 8, max: 25)
+
+    Response:
+        {
+            "prefix": "py",
+            "tags": [{"ID": "uuid", "title": "python", "bookmarkCount": 42}],
+            "bookmarks": [{"id": "uuid", "title": "PyCon talks", "url": "https://..."}]
+        }
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    params = event.get("queryStringParameters", {}) or {}
+
+    prefix = params.get("prefix", "").strip()
+    if not prefix:
+        return bad_request("prefix is required")
+    if len(prefix) > MAX_PREFIX_LENGTH:
+        return bad_request(f"prefix must be at most {MAX_PREFIX_LENGTH} characters")
+
+    types = [t.strip() for t in params.get("types", ",".join(SUGGEST_TYPES)).split(",")]
+    if not types or any(t not in SUGGEST_TYPES for t in types):
+        return bad_request(f"types must be a comma-separated subset of {', '.join(SUGGEST_TYPES)}")
+
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return bad_request("limit must be an integer")
+
+    try:
+        with get_read_session(token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            normalized = {"prefix": prefix.lower(), "types": ",".join(types), "limit": limit}
+            etag = _etag(user.id, user.data_version, normalized)
+            headers = {
+                "Cache-Control": f"private, max-age={MAX_AGE_SECONDS}",
+                "ETag": etag,
+                "Vary": "Authorization",
+            }
+            if _etag_matches(_header(event, "if-none-match"), etag):
+                return not_modified(headers)
+
+            # Keyed by the user's data version, so any write invalidates it
+            key = cache_key(user.id, "suggest", normalized, user.data_version)
+            data = get_cache().get(key)
+            if data is None:
+                data = {}
+                if "tags" in types:
+                    data["tags"] = _tag_suggestions(db, user.id, prefix, limit)
+                if "bookmarks" in types:
+                    data["bookmarks"] = _bookmark_suggestions(db, user.id, prefix, limit)
+                get_cache().set(key, data)
+
+            return success({"prefix": prefix, **data}, headers=headers)
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
+
+
+def _prefix_filters(column, prefix: str) -> list:
+    """
+    lower(column) starts with prefix. The explicit ~>=~ / ~<~ range is what
+    the text_pattern_ops index serves even when the statement is prepared
+    (the planner only derives it from LIKE for a literal pattern); the LIKE
+    keeps the match exact.
+    """
+    lowered = prefix.lower()
+    escaped = lowered.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    filters = [
+        func.lower(column).op("~>=~")(lowered),
+        func.lower(column).like(f"{escaped}%", escape="\\"),
+    ]
+    if ord(lowered[-1]) < sys.maxunicode:
+        upper = lowered[:-1] + chr(ord(lowered[-1]) + 1)
+        filters.append(func.lower(column).op("~<~")(upper))
+    return filters
+
+
+def _tag_suggestions(db, author_id, prefix: str, limit: int) -> list:
+    """Matching tags among the first candidates, most used first."""
+    candidates = (
+        select(Tag.id, Tag.title)
+        .where(Tag.author_id == author_id, *_prefix_filters(Tag.title, prefix))
+        .limit(limit * CANDIDATE_FACTOR)
+        .subquery()
+    )
+    # Index-only count on bookmark_tags (tag_id, bookmark_id) per candidate
+    usage = (
+        select(func.count())
+        .select_from(BookmarkTag)
+        .where(BookmarkTag.tag_id == candidates.c.id)
+        .scalar_subquery()
+        .label("bookmark_count")
+    )
+    rows = db.execute(
+        select(candidates.c.id, candidates.c.title, usage)
+        .order_by(usage.desc(), func.lower(candidates.c.title))
+        .limit(limit)
+    )
+    return [
+        {"ID": str(row.id), "title": row.title, "bookmarkCount": row.bookmark_count}
+        for row in rows
+    ]
+
+
+def _bookmark_suggestions(db, author_id, prefix: str, limit: int) -> list:
+    """Matching bookmarks among the first candidates, most recently created first."""
+    candidates = (
+        select(Bookmark.id, Bookmark.title, Bookmark.url, Bookmark.created_at)
+        .where(Bookmark.author_id == author_id, *_prefix_filters(Bookmark.title, prefix))
+        .limit(limit * CANDIDATE_FACTOR)
+        .subquery()
+    )
+    rows = db.execute(
+        select(candidates.c.id, candidates.c.title, candidates.c.url)
+        .order_by(candidates.c.created_at.desc().nulls_last(), candidates.c.id)
+        .limit(limit)
+    )
+    return [{"id": str(row.id), "title": row.title, "url": row.url} for row in rows]
+
+
+def _etag(user_id, data_version: int, params: dict) -> str:
+    digest = hashlib.sha256(
+        f"{user_id}:{data_version}:{params['prefix']}:{params['types']}:{params['limit']}".encode()
+    ).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _header(event, name: str) -> str | None:
+    for header, value in (event.get("headers") or {}).items():
+        if header.lower() == name:
+            return value
+    return None
@@ -0,0 +1,253 @@
+"""
+Sync Lambda Handler
+
+Endpoints:
+    GET /api/sync - Changes to bookmarks, tags, notes and tag associations
+                    since a sync token
+
+Every insert, update and delete of those rows is stamped with the next value
+of a global change sequence (triggers from migration 011; deletes leave a
+row in sync_tombstones). A sync token is the last sequence value a client
+has applied plus the time it reflects, so a sync reads only rows past it
+through the (author_id, change_seq) indexes.
+"""
+import base64
+import binascii
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func, select
+
+from shared.db import (
+    get_session, Bookmark, BookmarkTag, Note, SyncTombstone, SyncWatermark, Tag
+)
+from shared.db.fields import (
+    BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS, NOTE_DEFAULT_KEYS, NOTE_FIELDS, TAG_DEFAULT_KEYS,
+    TAG_FIELDS, field_columns, row_serializer
+)
+from shared.db.queries import get_user_by_cognito_sub
+from shared.utils import validate_token, success, error, bad_request, unauthorized
+from shared.utils.auth import AuthError
+from shared.utils.ratelimit import rate_limited
+from shared.utils.response import options_response
+
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+# Changes younger than this are left for the next sync. Sequence values are
+# taken in statement order but become visible in commit order, so a
+# transaction still in flight may hold a lower value than rows already
+# visible; returning those rows would move the token past it.
+SETTLE_SECONDS = float(os.environ.get("SYNC_SETTLE_SECONDS", "5"))
+TOKEN_PREFIX = "v1:"
+
+
+def handler(event, context):
+    """Main Lambda handler - routes to appropriate function."""
+    if "httpMethod" in event:
+        http_method = event.get("httpMethod", "")
+        path = event.get("path", "")
+    else:
+        request_context = event.get("requestContext", {})
+        http_info = request_context.get("http", {})
+        http_method = http_info.get("method", "")
+        path = event.get("rawPath", "")
+
+    # Handle CORS preflight
+    if http_method == "OPTIONS":
+        return options_response()
+
+    if path == "/api/sync" and http_method == "GET":
+        return sync(event, context)
+
+    return error("Not found", status=404)
+
+
+def encode_token(seq: int, issued_at: datetime) -> str:
+    raw = f"{TOKEN_PREFIX}{seq}:{int(issued_at.timestamp())}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> tuple[int, datetime]:
+    """
+    (change_seq, issued_at) of a sync token.
+
+    Raises:
+        ValueError for a malformed token
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError("Invalid sync token") from None
+    seq, _, issued = raw[len(TOKEN_PREFIX):].partition(":")
+    if not raw.startswith(TOKEN_PREFIX) or not seq.isdigit() or not issued.isdigit():
+        raise ValueError("Invalid sync token")
+    return int(seq), datetime.fromtimestamp(int(issued), timezone.utc)
+
+
+def is_expired(since: int, issued_at: datetime, watermark) -> bool:
+    """
+    Whether a token may have missed a purged tombstone.
+
+    Purged tombstones all have change_seq <= purged_through and changed_at
+    < purged_before, and every delete the client has not been sent yet was
+    made after issued_at. So a token can only have missed one if it is below
+    purged_through and was issued before purged_before. Checking the time as
+    well keeps a full sync of old rows (low change_seq, fresh token) valid.
+    """
+    if watermark is None or watermark.purged_before is None:
+        return False
+    return since < watermark.purged_through and issued_at < watermark.purged_before
+
+
+def _tombstone_data(row) -> dict:
+    if row.entity == "bookmarkTag":
+        return {"bookmarkID": str(row.entity_id), "tagID": str(row.related_id)}
+    return {"id": str(row.entity_id)}
+
+
+@rate_limited("read")
+def sync(event, context):
+    """
+    GET /api/sync
+
+    Query params:
+        since - Sync token from a previous response (omit for a full sync)
+        limit - Maximum changes per page (default: 500, max: 1000)
+
+    Response:
+        {
+            "changes": [
+                {"type": "bookmark", "op": "upsert", "data": {...}},
+                {"type": "bookmarkTag", "op": "upsert", "data": {"bookmarkID": ..., "tagID": ...}},
+                {"type": "note", "op": "delete", "data": {"id": ...}},
+                ...
+            ],
+            "nextToken": "...",
+            "hasMore": false
+        }
+
+    Changes are in the order they were made and must be applied in that
+    order; a row changed several times appears once, at its latest change.
+    Bookmark, tag and note data match the list endpoints (tags without
+    bookmarkID). Deleting a bookmark or tag also removes its associations;
+    no separate bookmarkTag deletes are sent for them.
+
+    Page with nextToken while hasMore is true, then store it for the next
+    sync. 410 means the token is older than tombstone retention and the
+    client must discard its copy and sync from scratch.
+    """
+    try:
+        token_user = validate_token(event)
+    except AuthError as e:
+        return unauthorized(str(e))
+
+    params = event.get("queryStringParameters", {}) or {}
+
+    try:
+        since, issued_at = decode_token(params["since"]) if params.get("since") else (0, None)
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except ValueError as e:
+        return bad_request(str(e))
+    if limit < 1:
+        return bad_request("limit must be positive")
+    limit = min(limit, MAX_LIMIT)
+
+    serialize_bookmark = row_serializer(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS)
+    serialize_tag = row_serializer(TAG_DEFAULT_KEYS, TAG_FIELDS)
+    serialize_note = row_serializer(NOTE_DEFAULT_KEYS, NOTE_FIELDS)
+
+    try:
+        # Always the primary: on a lagging replica, rows committed before
+        # settled_before may not be visible yet, and the token would move
+        # past them for good
+        with get_session() as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
+            if not user:
+                return unauthorized("User not found")
+
+            watermark = db.execute(select(
+                func.now().label("now"), SyncWatermark.purged_through, SyncWatermark.purged_before
+            )).one_or_none()
+            if since and is_expired(since, issued_at, watermark):
+                return error("Sync token has expired; sync again without a token", status=410)
+
+            # Only changes made before this are read; it is also the time the
+            # returned token reflects
+            now = watermark.now if watermark else datetime.now(timezone.utc)
+            settled_before = now - timedelta(seconds=SETTLE_SECONDS)
+
+            def changed(model, *columns):
+                return (
+                    select(*columns, model.change_seq)
+                    .where(model.author_id == user.id, model.change_seq > since)
+                    .where(model.changed_at < settled_before)
+                    .order_by(model.change_seq)
+                    .limit(limit + 1)
+                )
+
+            sources = [
+                (
+                    changed(Bookmark, *field_columns(BOOKMARK_DEFAULT_KEYS, BOOKMARK_FIELDS)),
+                    lambda row: ("bookmark", "upsert", serialize_bookmark(row)),
+                ),
+                (
+                    changed(Tag, *field_columns(TAG_DEFAULT_KEYS, TAG_FIELDS)),
+                    lambda row: ("tag", "upsert", serialize_tag(row)),
+                ),
+                (
+                    changed(Note, *field_columns(NOTE_DEFAULT_KEYS, NOTE_FIELDS)),
+                    lambda row: ("note", "upsert", serialize_note(row)),
+                ),
+                (
+                    select(BookmarkTag.bookmark_id, BookmarkTag.tag_id, BookmarkTag.change_seq)
+                    .join(Bookmark, Bookmark.id == BookmarkTag.bookmark_id)
+                    .where(Bookmark.author_id == user.id, BookmarkTag.change_seq > since)
+                    .where(BookmarkTag.changed_at < settled_before)
+                    .order_by(BookmarkTag.change_seq)
+                    .limit(limit + 1),
+                    lambda row: ("bookmarkTag", "upsert", {
+                        "bookmarkID": str(row.bookmark_id), "tagID": str(row.tag_id),
+                    }),
+                ),
+                (
+                    changed(
+                        SyncTombstone, SyncTombstone.entity, SyncTombstone.entity_id,
+                        SyncTombstone.related_id,
+                    ),
+                    lambda row: (row.entity, "delete", _tombstone_data(row)),
+                ),
+            ]
+
+            # Each source returns its first limit + 1 changes past the token,
+            # so the first limit of the merged list are the first limit overall
+            changes = []
+            for stmt, convert in sources:
+                changes.extend((row.change_seq, convert(row)) for row in db.execute(stmt))
+            changes.sort(key=lambda change: change[0])
+            page = changes[:limit]
+            has_more = len(changes) > limit
+
+            # A token's time must precede every unsent delete of a row the
+            # client holds. Once caught up that is the settle cutoff; a
+            # partial page keeps the previous token's time, unless the client
+            # started from nothing and only holds rows read now.
+            if has_more and since:
+                next_issued_at = issued_at
+            else:
+                next_issued_at = settled_before
+
+            return success({
+                "changes": [
+                    {"type": entity, "op": op, "data": data} for _, (entity, op, data) in page
+                ],
+                "nextToken": encode_token(page[-1][0] if page else since, next_issued_at),
+                "hasMore": has_more,
+            })
+
+    except Exception as e:
+        return error(f"Database error: {str(e)}")
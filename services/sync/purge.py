@@ -0,0 +1,69 @@
+"""
+Sync Tombstone Purge Job
+
+Triggered on a schedule (EventBridge). Deletes sync tombstones older than
+SYNC_TOMBSTONE_RETENTION_DAYS in batches and advances sync_watermark so
+GET /api/sync answers 410 to tokens that may have missed one of them.
+
+Also deletes expired Idempotency-Key responses (shared/utils/idempotency.py)
+and idle rate limit buckets (shared/utils/ratelimit.py).
+"""
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add shared module to path for Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete, func, select, update
+
+from shared.db import get_session, SyncTombstone, SyncWatermark
+from shared.utils.idempotency import purge_expired_keys
+from shared.utils.ratelimit import purge_idle_buckets
+
+
+RETENTION_DAYS = int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+BATCH_SIZE = 5000
+
+
+def handler(event, context):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)
+    purged = 0
+
+    while True:
+        # One transaction per batch: the watermark moves with the deletes,
+        # so a token is never checked against tombstones already gone
+        with get_session() as db:
+            batch = (
+                select(SyncTombstone.change_seq)
+                .where(SyncTombstone.changed_at < cutoff)
+                .limit(BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            seqs = db.execute(
+                delete(SyncTombstone)
+                .where(SyncTombstone.change_seq.in_(batch))
+                .returning(SyncTombstone.change_seq)
+            ).scalars().all()
+            if not seqs:
+                break
+
+            db.execute(
+                update(SyncWatermark)
+                .values(
+                    purged_through=func.greatest(SyncWatermark.purged_through, max(seqs)),
+                    purged_before=func.greatest(SyncWatermark.purged_before, cutoff),
+                )
+            )
+            purged += len(seqs)
+
+        if len(seqs) < BATCH_SIZE:
+            break
+
+    return {
+        "purged": purged,
+        "cutoff": cutoff.isoformat(),
+        "idempotencyKeysPurged": purge_expired_keys(),
+        "rateLimitBucketsPurged": purge_idle_buckets(),
+    }
@@ -15,9 +15,12 @@ from uuid import UUID
 # Add shared module to path for Lambda
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from shared.db import get_session, User, Tag, Bookmark, BookmarkTag
+from shared.db import get_session, Tag, BookmarkTag
+from shared.db.queries import get_bookmark_for_author, get_tag_for_author, get_user_by_cognito_sub
 from shared.utils import validate_token, success, error, bad_request, unauthorized, not_found
 from shared.utils.auth import AuthError
+from shared.utils.idempotency import idempotent
+from shared.utils.ratelimit import rate_limited
 from shared.utils.response import options_response
 
 
@@ -53,11 +56,8 @@ def handler(event, context):
     return error("Not found", status=404)
 
 
-def _get_user_by_cognito_sub(db, cognito_sub: str) -> User:
-    """Get user by Cognito sub, returns None if not found."""
-    return db.query(User).filter(User.cognito_sub == cognito_sub).first()
-
-
+@rate_limited("write")
+@idempotent
 def create(event, context):
     """
     POST /api/tags
@@ -100,8 +100,8 @@ def create(event, context):
             pass  # Invalid format, ignore
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
@@ -123,10 +123,7 @@ def create(event, context):
             # Associate bookmarks
             for bid in bookmark_ids:
                 try:
-                    bookmark = db.query(Bookmark).filter(
-                        Bookmark.id == UUID(bid),
-                        Bookmark.author_id == user.id
-                    ).first()
+                    bookmark = get_bookmark_for_author(db, UUID(bid), user.id)
                     if bookmark:
                         bookmark_tag = BookmarkTag(
                             bookmark_id=bookmark.id,
@@ -136,12 +133,15 @@ def create(event, context):
                 except ValueError:
                     pass  # Invalid UUID
 
-            return success({"tag": tag.to_dict()}, status=201)
+            db.flush()  # Persist associations so _bookmark_ids() sees them
+            return success({"tag": tag.to_dict(bookmark_ids=_bookmark_ids(db, tag))}, status=201)
 
     except Exception as e:
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def update(event, context, tag_id: str):
     """
     PUT /api/tags/:id
@@ -171,15 +171,12 @@ def update(event, context, tag_id: str):
         return bad_request("Invalid tag ID")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            tag = db.query(Tag).filter(
-                Tag.id == tag_uuid,
-                Tag.author_id == user.id
-            ).first()
+            tag = get_tag_for_author(db, tag_uuid, user.id)
 
             if not tag:
                 return not_found("Tag not found")
@@ -218,10 +215,7 @@ def update(event, context, tag_id: str):
                 # Add new associations
                 for bid in bookmark_ids:
                     try:
-                        bookmark = db.query(Bookmark).filter(
-                            Bookmark.id == UUID(bid),
-                            Bookmark.author_id == user.id
-                        ).first()
+                        bookmark = get_bookmark_for_author(db, UUID(bid), user.id)
                         if bookmark:
                             bookmark_tag = BookmarkTag(
                                 bookmark_id=bookmark.id,
@@ -231,12 +225,15 @@ def update(event, context, tag_id: str):
                     except ValueError:
                         pass
 
-            return success({"tag": tag.to_dict()})
+            db.flush()  # Persist associations so _bookmark_ids() sees them
+            return success({"tag": tag.to_dict(bookmark_ids=_bookmark_ids(db, tag))})
 
     except Exception as e:
         return error(f"Database error: {str(e)}")
 
 
+@rate_limited("write")
+@idempotent
 def delete(event, context, tag_id: str):
     """
     DELETE /api/tags/:id
@@ -255,23 +252,25 @@ def delete(event, context, tag_id: str):
         return bad_request("Invalid tag ID")
 
     try:
-        with get_session() as db:
-            user = _get_user_by_cognito_sub(db, token_user["sub"])
+        with get_session(sticky_key=token_user["sub"]) as db:
+            user = get_user_by_cognito_sub(db, token_user["sub"])
             if not user:
                 return unauthorized("User not found")
 
-            tag = db.query(Tag).filter(
-                Tag.id == tag_uuid,
-                Tag.author_id == user.id
-            ).first()
+            tag = get_tag_for_author(db, tag_uuid, user.id)
 
             if not tag:
                 return not_found("Tag not found")
 
-            tag_data = tag.to_dict()
+            tag_data = tag.to_dict(bookmark_ids=_bookmark_ids(db, tag))
             db.delete(tag)  # Cascade deletes bookmark_tags entries
 
             return success({"tag": tag_data})
 
     except Exception as e:
         return error(f"Database error: {str(e)}")
+
+
+def _bookmark_ids(db, tag: Tag) -> list[str]:
+    """The tag's bookmark ID strings, for its legacy bookmarkID field."""
+    return Tag.bookmark_ids_by_tag(db, tag.author_id, tag_ids=[tag.id]).get(tag.id, [])
@@ -2,7 +2,8 @@
 Users Lambda Handler
 
 Endpoints:
-    PUT /api/users/:id - Update user profile
+    PUT   /api/users/:id - Update user profile
+    PATCH /api/users/:id - Update user profile, merge-patching preferences
 """
 import json
 import re
@@ -13,9 +14,15 @@ from uuid import UUID
 # Add shared module to path for Lambda
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from sqlalchemy import cast, func, update as sql_update
+from sqlalchemy.dialects.postgresql import JSONB
+
 from shared.db import get_session, User
+from shared.db.queries import get_user_by_cognito_sub
 from shared.utils import validate_token, success, error, bad_request, unauthorized, not_found
 from shared.utils.auth import AuthError
+from shared.utils.idempotency import idempotent
+from shared.utils.ratelimit import rate_limited
 from shared.utils.response import options_response
 
 
@@ -41,9 +48,14 @@ def handler(event, context):
     if user_id and http_method == "PUT":
         return update(event, context, user_id)
 
+    if user_id and http_method == "PATCH":
+        return patch(event, context, user_id)
+
     return error("Not found", status=404)
 
 
+@rate_limited("write")
+@idempotent
 def update(event, context, user_id: str):
     """
     PUT /api/users/:id
@@ -51,33 +63,113 @@ def update(event, context, user_id: str):
     Request body:
         {
             "name": "New Name",
-            "picture": "https://example.com/avatar.jpg"
+            "picture": "https://example.com/avatar.jpg",
+            "preferences": {"theme": "dark"},  // Merged into the top level
+            "preferencesVersion": 3            // Optional, see PATCH
         }
 
     Response:
         { "user": {...} }
     """
+    return _apply_update(event, user_id, merge_patch=False)
+
+
+@rate_limited("write")
+@idempotent
+def patch(event, context, user_id: str):
+    """
+    PATCH /api/users/:id
+
+    Request body:
+        {
+            "name": "New Name",                // Optional
+            "picture": "https://...",          // Optional
+            "preferences": {                   // JSON Merge Patch (RFC 7396)
+                "theme": "dark",               // Set
+                "layout": {"columns": 3},      // Merged into nested objects
+                "legacyFlag": null             // Removed
+            },
+            "preferencesVersion": 3            // Optional
+        }
+
+    The patch is applied in the database in a single UPDATE, so concurrent
+    patches to different keys never overwrite each other. With
+    preferencesVersion, the update only happens if the stored version
+    still matches; otherwise 409 with the current user.
+
+    Response:
+        { "user": {..., "preferencesVersion": 4} }
+    """
+    return _apply_update(event, user_id, merge_patch=True)
+
+
+def _apply_update(event, user_id: str, merge_patch: bool):
     try:
         token_user = validate_token(event)
     except AuthError as e:
         return unauthorized(str(e))
 
     try:
-        body = json.loads(event.get("body", "{}"))
+        body = json.loads(event.get("body") or "{}")
     except json.JSONDecodeError:
         return bad_request("Invalid JSON body")
+    if not isinstance(body, dict):
+        return bad_request("Request body must be a JSON object")
 
     try:
         user_uuid = UUID(user_id)
     except ValueError:
         return bad_request("Invalid user ID")
 
+    values = {}
+    if "name" in body:
+        if not isinstance(body["name"], str) or not body["name"].strip():
+            return bad_request("name must be a non-empty string")
+        values["name"] = body["name"].strip()
+
+    if "picture" in body:
+        values["picture_url"] = body["picture"]
+
+    preferences = body.get("preferences")
+    if preferences is not None:
+        if not isinstance(preferences, dict):
+            return bad_request("preferences must be an object")
+        if merge_patch:
+            merged = func.jsonb_merge_patch(User.preferences, cast(preferences, JSONB), type_=JSONB)
+        else:
+            merged = User.preferences.concat(cast(preferences, JSONB))
+        values["preferences"] = merged
+        values["preferences_version"] = User.preferences_version + 1
+
+    expected_version = body.get("preferencesVersion")
+    if expected_version is not None and (
+        not isinstance(expected_version, int) or isinstance(expected_version, bool)
+    ):
+        return bad_request("preferencesVersion must be an integer")
+
     try:
-        with get_session() as db:
-            # Get authenticated user
-            auth_user = db.query(User).filter(
-                User.cognito_sub == token_user["sub"]
-            ).first()
+        with get_session(sticky_key=token_user["sub"]) as db:
+            # Ownership, version check and the update in one statement
+            conditions = [User.id == user_uuid, User.cognito_sub == token_user["sub"]]
+            if expected_version is not None:
+                conditions.append(User.preferences_version == expected_version)
+
+            if values:
+                user = db.execute(
+                    sql_update(User)
+                    .where(*conditions)
+                    .values(**values)
+                    .returning(User)
+                    .execution_options(synchronize_session=False)
+                ).scalar_one_or_none()
+            else:
+                user = db.query(User).filter(*conditions).one_or_none()
+
+            if user:
+                return success({"user": user.to_dict()})
+
+            # Nothing matched: work out why
+            auth_user = get_user_by_cognito_sub(db, token_user["sub"])
 
             if not auth_user:
                 return unauthorized("User not found")
@@ -86,20 +178,11 @@ def update(event, context, user_id: str):
             if auth_user.id != user_uuid:
                 return unauthorized("Cannot update another user's profile")
 
-            # Update allowed fields
-            if "name" in body:
-                auth_user.name = body["name"].strip()
-
-            if "picture" in body:
-                auth_user.picture_url = body["picture"]
-
-            if "preferences" in body and isinstance(body["preferences"], dict):
-                # Merge new preferences into existing ones
-                current_prefs = auth_user.preferences or {}
-                current_prefs.update(body["preferences"])
-                auth_user.preferences = current_prefs
-
-            return success({"user": auth_user.to_dict()})
+            return error(
+                "Preferences have been changed since preferencesVersion",
+                status=409,
+                data={"user": auth_user.to_dict()},
+            )
 
     except Exception as e:
         return error(f"Database error: {str(e)}")
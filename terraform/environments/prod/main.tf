@@ -104,6 +104,8 @@ module "lambda" {
   cognito_client_id       = module.cognito.client_id
   screenshots_bucket_name = module.s3.bucket_id
   screenshots_bucket_arn  = module.s3.bucket_arn
+  exports_bucket_name     = module.s3.exports_bucket_id
+  exports_bucket_arn      = module.s3.exports_bucket_arn
   lambda_package_path     = var.lambda_package_path
   log_retention_days      = 14
 }
@@ -16,8 +16,8 @@ resource "aws_apigatewayv2_api" "main" {
 
   cors_configuration {
     allow_origins     = var.cors_allow_origins
-    allow_methods     = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-    allow_headers     = ["Content-Type", "Authorization"]
+    allow_methods     = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+    allow_headers     = ["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match"]
     expose_headers    = ["*"]
     max_age           = 3600
     allow_credentials = false
@@ -107,6 +107,30 @@ resource "aws_apigatewayv2_integration" "screenshot" {
   payload_format_version = "2.0"
 }
 
+resource "aws_apigatewayv2_integration" "sync" {
+  api_id                 = aws_apigatewayv2_api.main.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = var.lambda_invoke_arns["sync"]
+  integration_method     = "POST"
+  payload_format_version = "2.0"
+}
+
+resource "aws_apigatewayv2_integration" "suggest" {
+  api_id                 = aws_apigatewayv2_api.main.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = var.lambda_invoke_arns["suggest"]
+  integration_method     = "POST"
+  payload_format_version = "2.0"
+}
+
+resource "aws_apigatewayv2_integration" "exports" {
+  api_id                 = aws_apigatewayv2_api.main.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = var.lambda_invoke_arns["exports"]
+  integration_method     = "POST"
+  payload_format_version = "2.0"
+}
+
 # Routes - Auth
 resource "aws_apigatewayv2_route" "auth_init" {
   api_id    = aws_apigatewayv2_api.main.id
@@ -139,6 +163,24 @@ resource "aws_apigatewayv2_route" "bookmarks_delete" {
   target    = "integrations/${aws_apigatewayv2_integration.bookmarks.id}"
 }
 
+resource "aws_apigatewayv2_route" "bookmarks_batch" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "POST /api/bookmarks/batch"
+  target    = "integrations/${aws_apigatewayv2_integration.bookmarks.id}"
+}
+
+resource "aws_apigatewayv2_route" "bookmarks_lookup" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "POST /api/bookmarks/lookup"
+  target    = "integrations/${aws_apigatewayv2_integration.bookmarks.id}"
+}
+
+resource "aws_apigatewayv2_route" "bookmarks_status" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "GET /api/bookmarks/status"
+  target    = "integrations/${aws_apigatewayv2_integration.bookmarks.id}"
+}
+
 # Routes - Tags
 resource "aws_apigatewayv2_route" "tags_create" {
   api_id    = aws_apigatewayv2_api.main.id
@@ -165,6 +207,12 @@ resource "aws_apigatewayv2_route" "users_update" {
   target    = "integrations/${aws_apigatewayv2_integration.users.id}"
 }
 
+resource "aws_apigatewayv2_route" "users_patch" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "PATCH /api/users/{id}"
+  target    = "integrations/${aws_apigatewayv2_integration.users.id}"
+}
+
 # Routes - Screenshot
 resource "aws_apigatewayv2_route" "screenshot_create" {
   api_id    = aws_apigatewayv2_api.main.id
@@ -172,6 +220,33 @@ resource "aws_apigatewayv2_route" "screenshot_create" {
   target    = "integrations/${aws_apigatewayv2_integration.screenshot.id}"
 }
 
+# Routes - Sync
+resource "aws_apigatewayv2_route" "sync" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "GET /api/sync"
+  target    = "integrations/${aws_apigatewayv2_integration.sync.id}"
+}
+
+# Routes - Suggest
+resource "aws_apigatewayv2_route" "suggest" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "GET /api/suggest"
+  target    = "integrations/${aws_apigatewayv2_integration.suggest.id}"
+}
+
+# Routes - Exports
+resource "aws_apigatewayv2_route" "exports_create" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "POST /api/exports"
+  target    = "integrations/${aws_apigatewayv2_integration.exports.id}"
+}
+
+resource "aws_apigatewayv2_route" "exports_get" {
+  api_id    = aws_apigatewayv2_api.main.id
+  route_key = "GET /api/exports/{id}"
+  target    = "integrations/${aws_apigatewayv2_integration.exports.id}"
+}
+
 # Lambda permissions for API Gateway
 resource "aws_lambda_permission" "api_gateway" {
   for_each = var.lambda_function_names
@@ -50,6 +50,16 @@ resource "aws_iam_role_policy" "lambda_custom" {
         ]
         Resource = "${var.screenshots_bucket_arn}/*"
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:GetObject",
+          "s3:AbortMultipartUpload",
+          "s3:ListMultipartUploadParts"
+        ]
+        Resource = "${var.exports_bucket_arn}/*"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -67,8 +77,16 @@ resource "aws_iam_role_policy" "lambda_custom" {
         ]
         Resource = [
           aws_sqs_queue.screenshot.arn,
-          aws_sqs_queue.bookmark_metadata.arn
+          aws_sqs_queue.bookmark_metadata.arn,
+          aws_sqs_queue.exports.arn
         ]
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = aws_lambda_function.functions["outbox_dispatcher"].arn
       }
     ]
   })
@@ -131,6 +149,32 @@ resource "aws_sqs_queue" "bookmark_metadata" {
   }
 }
 
+# SQS Queue for account exports (visibility above the worker's timeout)
+resource "aws_sqs_queue" "exports_dlq" {
+  name                      = "${var.project_name}-exports-dlq"
+  message_retention_seconds = 1209600
+
+  tags = {
+    Name = "${var.project_name}-exports-dlq"
+  }
+}
+
+resource "aws_sqs_queue" "exports" {
+  name                       = "${var.project_name}-exports-queue"
+  visibility_timeout_seconds = 960
+  message_retention_seconds  = 86400
+  receive_wait_time_seconds  = 10
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.exports_dlq.arn
+    maxReceiveCount     = 2
+  })
+
+  tags = {
+    Name = "${var.project_name}-exports-queue"
+  }
+}
+
 # Common environment variables
 locals {
   common_environment = {
@@ -140,7 +184,12 @@ locals {
     COGNITO_CLIENT_ID    = var.cognito_client_id
     SCREENSHOT_BUCKET    = var.screenshots_bucket_name
     METADATA_QUEUE_URL   = aws_sqs_queue.bookmark_metadata.url
+    EXPORT_BUCKET        = var.exports_bucket_name
+    EXPORT_QUEUE_URL     = aws_sqs_queue.exports.url
     AWS_REGION_NAME      = data.aws_region.current.name
+    # Invoked after commits that wrote outbox messages (a name, not the
+    # resource, to avoid a dependency cycle)
+    OUTBOX_DISPATCHER_FUNCTION = "${var.project_name}-outbox_dispatcher"
   }
 
   lambda_functions = {
@@ -177,9 +226,51 @@ locals {
     metadata = {
       handler     = "metadata.handler.handler"
       description = "Bookmark metadata fetch worker"
-      timeout     = 15
+      timeout     = 30
+      memory      = 512
+    }
+    metadata_refresh = {
+      handler     = "metadata.refresh.handler"
+      description = "Re-enqueues stuck and stale bookmark metadata"
+      timeout     = 60
+      memory      = 256
+    }
+    sync = {
+      handler     = "sync.handler.handler"
+      description = "Delta sync of bookmarks, tags and notes"
+      timeout     = 30
       memory      = 256
     }
+    suggest = {
+      handler     = "suggest.handler.handler"
+      description = "Tag and bookmark title autocomplete"
+      timeout     = 10
+      memory      = 256
+    }
+    sync_purge = {
+      handler     = "sync.purge.handler"
+      description = "Purges expired sync tombstones"
+      timeout     = 300
+      memory      = 256
+    }
+    outbox_dispatcher = {
+      handler     = "outbox.dispatcher.handler"
+      description = "Delivers outbox messages to SQS"
+      timeout     = 60
+      memory      = 256
+    }
+    exports = {
+      handler     = "exports.handler.handler"
+      description = "Account export requests and downloads"
+      timeout     = 30
+      memory      = 256
+    }
+    exports_worker = {
+      handler     = "exports.worker.handler"
+      description = "Streams account exports to S3"
+      timeout     = 900
+      memory      = 512
+    }
   }
 }
 
@@ -236,3 +327,71 @@ resource "aws_lambda_event_source_mapping" "bookmark_metadata_sqs" {
   batch_size       = 1
   enabled          = true
 }
+
+# SQS trigger for export worker
+resource "aws_lambda_event_source_mapping" "exports_sqs" {
+  event_source_arn = aws_sqs_queue.exports.arn
+  function_name    = aws_lambda_function.functions["exports_worker"].arn
+  batch_size       = 1
+  enabled          = true
+}
+
+# Scheduled metadata refresh / stuck-pending reaper
+resource "aws_cloudwatch_event_rule" "metadata_refresh" {
+  name                = "${var.project_name}-metadata-refresh"
+  description         = "Re-enqueue stuck and stale bookmark metadata"
+  schedule_expression = var.metadata_refresh_schedule
+}
+
+resource "aws_cloudwatch_event_target" "metadata_refresh" {
+  rule = aws_cloudwatch_event_rule.metadata_refresh.name
+  arn  = aws_lambda_function.functions["metadata_refresh"].arn
+}
+
+resource "aws_lambda_permission" "metadata_refresh_schedule" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.functions["metadata_refresh"].function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.metadata_refresh.arn
+}
+
+# Scheduled sync tombstone purge
+resource "aws_cloudwatch_event_rule" "sync_purge" {
+  name                = "${var.project_name}-sync-purge"
+  description         = "Purge sync tombstones past retention"
+  schedule_expression = var.sync_purge_schedule
+}
+
+resource "aws_cloudwatch_event_target" "sync_purge" {
+  rule = aws_cloudwatch_event_rule.sync_purge.name
+  arn  = aws_lambda_function.functions["sync_purge"].arn
+}
+
+resource "aws_lambda_permission" "sync_purge_schedule" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.functions["sync_purge"].function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.sync_purge.arn
+}
+
+# Scheduled outbox dispatch (a backstop; writers nudge the dispatcher after commit)
+resource "aws_cloudwatch_event_rule" "outbox_dispatcher" {
+  name                = "${var.project_name}-outbox-dispatcher"
+  description         = "Deliver outbox messages to SQS"
+  schedule_expression = var.outbox_dispatch_schedule
+}
+
+resource "aws_cloudwatch_event_target" "outbox_dispatcher" {
+  rule = aws_cloudwatch_event_rule.outbox_dispatcher.name
+  arn  = aws_lambda_function.functions["outbox_dispatcher"].arn
+}
+
+resource "aws_lambda_permission" "outbox_dispatcher_schedule" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.functions["outbox_dispatcher"].function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.outbox_dispatcher.arn
+}
@@ -58,3 +58,8 @@ output "bookmark_metadata_dlq_arn" {
   description = "ARN of the bookmark metadata DLQ"
   value       = aws_sqs_queue.bookmark_metadata_dlq.arn
 }
+
+output "bookmark_metadata_dlq_url" {
+  description = "URL of the bookmark metadata DLQ (see services/scripts/replay_metadata_dlq.py)"
+  value       = aws_sqs_queue.bookmark_metadata_dlq.url
+}
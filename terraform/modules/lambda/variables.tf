@@ -44,6 +44,16 @@ variable "screenshots_bucket_arn" {
   type        = string
 }
 
+variable "exports_bucket_name" {
+  description = "Name of the S3 bucket for account exports"
+  type        = string
+}
+
+variable "exports_bucket_arn" {
+  description = "ARN of the S3 bucket for account exports"
+  type        = string
+}
+
 variable "lambda_package_path" {
   description = "Path to the Lambda deployment package (zip file)"
   type        = string
@@ -54,3 +64,21 @@ variable "log_retention_days" {
   type        = number
   default     = 14
 }
+
+variable "metadata_refresh_schedule" {
+  description = "EventBridge schedule for the metadata refresh job"
+  type        = string
+  default     = "rate(5 minutes)"
+}
+
+variable "sync_purge_schedule" {
+  description = "EventBridge schedule for the sync tombstone purge"
+  type        = string
+  default     = "rate(1 day)"
+}
+
+variable "outbox_dispatch_schedule" {
+  description = "EventBridge schedule for the outbox dispatcher"
+  type        = string
+  default     = "rate(1 minute)"
+}
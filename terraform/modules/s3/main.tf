@@ -96,3 +96,51 @@ resource "aws_s3_bucket_cors_configuration" "screenshots" {
     max_age_seconds = 3600
   }
 }
+
+# Private bucket for account exports (services/exports), downloaded through
+# presigned URLs only
+resource "aws_s3_bucket" "exports" {
+  bucket = "${var.project_name}-exports-${var.environment}"
+
+  tags = {
+    Name = "${var.project_name}-exports"
+  }
+}
+
+resource "aws_s3_bucket_server_side_encryption_configuration" "exports" {
+  bucket = aws_s3_bucket.exports.id
+
+  rule {
+    apply_server_side_encryption_by_default {
+      sse_algorithm = "AES256"
+    }
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "exports" {
+  bucket = aws_s3_bucket.exports.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+resource "aws_s3_bucket_lifecycle_configuration" "exports" {
+  bucket = aws_s3_bucket.exports.id
+
+  rule {
+    id     = "expire-exports"
+    status = "Enabled"
+
+    filter {}
+
+    expiration {
+      days = var.export_retention_days
+    }
+
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 1
+    }
+  }
+}
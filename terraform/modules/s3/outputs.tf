@@ -22,3 +22,13 @@ output "bucket_url" {
   description = "URL for accessing bucket objects"
   value       = "https://${aws_s3_bucket.screenshots.bucket_regional_domain_name}"
 }
+
+output "exports_bucket_id" {
+  description = "ID of the account exports bucket"
+  value       = aws_s3_bucket.exports.id
+}
+
+output "exports_bucket_arn" {
+  description = "ARN of the account exports bucket"
+  value       = aws_s3_bucket.exports.arn
+}
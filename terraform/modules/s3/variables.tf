@@ -26,3 +26,9 @@ variable "cors_allowed_origins" {
   type        = list(string)
   default     = ["*"]
 }
+
+variable "export_retention_days" {
+  description = "Days account exports are kept"
+  type        = number
+  default     = 7
+}